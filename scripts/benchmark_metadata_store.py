@@ -0,0 +1,232 @@
+"""Benchmarks post-execution queries against a synthetic metadata store.
+
+Creates a sqlite metadata store with `--runs` runs of a pipeline whose
+`--steps` steps form a chain (every step consumes the output artifact of the
+previous one) and measures the wall time and number of MLMD calls of the
+post-execution API.
+
+Usage:
+    python scripts/benchmark_metadata_store.py --runs 100 --steps 40
+"""
+import argparse
+import json
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Callable, Iterator, Tuple
+
+from ml_metadata.proto import metadata_store_pb2
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.artifacts.constants import (
+    DATATYPE_PROPERTY_KEY,
+    PRODUCER_PROPERTY_KEY,
+)
+from coalescenceml.metadata_store import SQLiteMetadataStore
+from coalescenceml.metadata_store.constants import RUN_INDEX_PROPERTY_KEY
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+PIPELINE_NAME = "benchmark_pipeline"
+
+
+class CountingStore:
+    """Proxy around an MLMD store which counts all method calls."""
+
+    def __init__(self, store: Any) -> None:
+        self._store = store
+        self.calls: Counter = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._store, name)
+        if not callable(attribute):
+            return attribute
+
+        def _counted(*args: Any, **kwargs: Any) -> Any:
+            self.calls[name] += 1
+            return attribute(*args, **kwargs)
+
+        return _counted
+
+
+def _clock(start: int = 1) -> Iterator[int]:
+    """Yields increasing timestamps for the synthetic events."""
+    while True:
+        yield start
+        start += 1
+
+
+def populate(
+    metadata_store: SQLiteMetadataStore, runs: int, steps: int
+) -> None:
+    """Fills the metadata store with synthetic pipeline runs."""
+    store = metadata_store.store
+    pipeline_type = store.put_context_type(
+        metadata_store_pb2.ContextType(name=PIPELINE_CONTEXT_TYPE_NAME)
+    )
+    run_type = store.put_context_type(
+        metadata_store_pb2.ContextType(name=PIPELINE_RUN_CONTEXT_TYPE_NAME)
+    )
+    artifact_type = metadata_store_pb2.ArtifactType(name="DataArtifact")
+    for key in (PRODUCER_PROPERTY_KEY, DATATYPE_PROPERTY_KEY):
+        artifact_type.properties[key] = metadata_store_pb2.STRING
+    artifact_type_id = store.put_artifact_type(artifact_type)
+    execution_type_ids = [
+        store.put_execution_type(
+            metadata_store_pb2.ExecutionType(name=f"benchmark.step_{i}")
+        )
+        for i in range(steps)
+    ]
+    pipeline = metadata_store_pb2.Context(
+        type_id=pipeline_type, name=PIPELINE_NAME
+    )
+    # all runs get linked below, no need to build the run index later on
+    pipeline.custom_properties[RUN_INDEX_PROPERTY_KEY].int_value = 1
+    pipeline.id = store.put_contexts([pipeline])[0]
+    clock = _clock()
+
+    for run_index in range(runs):
+        run = metadata_store_pb2.Context(
+            type_id=run_type, name=f"run_{run_index}"
+        )
+        run.id = store.put_contexts([run])[0]
+        metadata_store.link_pipeline_run(PIPELINE_NAME, run.name)
+
+        previous_artifact = None
+        for step_index in range(steps):
+            execution = metadata_store_pb2.Execution(
+                type_id=execution_type_ids[step_index],
+                last_known_state=metadata_store_pb2.Execution.COMPLETE,
+            )
+            execution.custom_properties[
+                INTERNAL_EXECUTION_PARAMETER_PREFIX
+                + PARAM_PIPELINE_PARAMETER_NAME
+            ].string_value = json.dumps(f"step_{step_index}")
+
+            artifact = metadata_store_pb2.Artifact(
+                type_id=artifact_type_id,
+                uri=f"/tmp/artifacts/{run_index}/{step_index}",
+            )
+            artifact.properties[PRODUCER_PROPERTY_KEY].string_value = "p"
+            artifact.properties[DATATYPE_PROPERTY_KEY].string_value = "d"
+
+            artifacts_and_events = []
+            if previous_artifact is not None:
+                input_event = metadata_store_pb2.Event(
+                    type=metadata_store_pb2.Event.INPUT,
+                    milliseconds_since_epoch=next(clock),
+                )
+                input_event.path.steps.add().key = "input"
+                artifacts_and_events.append((previous_artifact, input_event))
+            output_event = metadata_store_pb2.Event(
+                type=metadata_store_pb2.Event.OUTPUT,
+                milliseconds_since_epoch=next(clock),
+            )
+            output_event.path.steps.add().key = "output"
+            artifacts_and_events.append((artifact, output_event))
+
+            _, artifact_ids, _ = store.put_execution(
+                execution, artifacts_and_events, [pipeline, run]
+            )
+            artifact.id = artifact_ids[-1]
+            previous_artifact = artifact
+
+
+def measure(
+    label: str, store: CountingStore, function: Callable[[], Any]
+) -> Tuple[float, int]:
+    """Runs a function and prints its wall time and number of MLMD calls."""
+    store.calls.clear()
+    start = time.perf_counter()
+    function()
+    duration = time.perf_counter() - start
+    call_count = sum(store.calls.values())
+    print(f"{label:<40} {duration * 1000:>10.1f} ms {call_count:>8} calls")
+    return duration, call_count
+
+
+def main() -> None:
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        metadata_store = SQLiteMetadataStore(
+            name="benchmark", uri=f"{directory}/metadata.db"
+        )
+        start = time.perf_counter()
+        populate(metadata_store, runs=args.runs, steps=args.steps)
+        print(
+            f"Created {args.runs} runs with {args.steps} steps in "
+            f"{time.perf_counter() - start:.1f}s.\n"
+        )
+
+        # count the calls that actually reach the database, i.e. the ones
+        # that were not answered by the metadata cache
+        metadata_store.store  # connects to the database
+        store = CountingStore(metadata_store._mlmd_store)
+        metadata_store._mlmd_store = store  # type: ignore[assignment]
+        metadata_store._metadata_cache = None
+        pipeline = metadata_store.get_pipeline(PIPELINE_NAME)
+
+        for label in ("cold", "warm"):
+            print(f"[{label} metadata cache]")
+            measure("list runs", store, lambda: pipeline.runs)
+            run = pipeline.get_run(f"run_{args.runs - 1}")
+            measure("get steps of one run", store, lambda: run.steps)
+            measure(
+                "resolve parents of all steps",
+                store,
+                lambda: [step.parent_steps for step in run.steps],
+            )
+            measure(
+                "inputs and outputs of all steps",
+                store,
+                lambda: [(s.inputs, s.outputs) for s in run.steps],
+            )
+            measure(
+                "status of all steps",
+                store,
+                lambda: [s.status for s in run.steps],
+            )
+            print()
+
+        print(f"Metadata cache: {metadata_store.cache_stats}\n")
+
+        # cache status reporting after every step of the last run, once with
+        # a lookup by names and once with a lookup by execution ID
+        step_names = run.get_step_names()
+        step_ids = [step.id for step in run.steps]
+        metadata_store.clear_cache()
+        measure(
+            "cache status by step name",
+            store,
+            lambda: [
+                metadata_store.get_pipeline(PIPELINE_NAME)
+                .get_run(run.name)
+                .get_step(name)
+                .is_cached
+                for name in step_names
+            ],
+        )
+        metadata_store.clear_cache()
+        measure(
+            "cache status by execution ID",
+            store,
+            lambda: [
+                metadata_store.get_execution_status(step_id)
+                for step_id in step_ids
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmarks concurrent writers against a single SQLite metadata store.
+
+Starts `--pipelines` processes which each write a pipeline run with
+`--steps` steps (one execution with an input and an output artifact per
+step, like the local orchestrator does) to the same sqlite metadata store,
+and reports the wall time and the number of runs that failed, e.g. because
+the database was locked.
+
+Usage:
+    python scripts/benchmark_sqlite_concurrency.py --pipelines 8 --steps 20
+    python scripts/benchmark_sqlite_concurrency.py --journal-mode DELETE \
+        --busy-timeout 0
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from typing import Any, Optional, Tuple
+
+from ml_metadata.proto import metadata_store_pb2
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.metadata_store import SQLiteMetadataStore
+
+
+def put_types(store: Any) -> Tuple[int, int, int, int]:
+    """Creates the types used by the benchmark and returns their IDs."""
+    return (
+        store.put_context_type(
+            metadata_store_pb2.ContextType(name=PIPELINE_CONTEXT_TYPE_NAME)
+        ),
+        store.put_context_type(
+            metadata_store_pb2.ContextType(name=PIPELINE_RUN_CONTEXT_TYPE_NAME)
+        ),
+        store.put_execution_type(
+            metadata_store_pb2.ExecutionType(name="benchmark.step")
+        ),
+        store.put_artifact_type(
+            metadata_store_pb2.ArtifactType(name="DataArtifact")
+        ),
+    )
+
+
+def run_pipeline(
+    uri: str,
+    journal_mode: Optional[str],
+    busy_timeout: int,
+    index: int,
+    steps: int,
+) -> Tuple[int, Optional[str]]:
+    """Writes the metadata of one pipeline run and returns the index of the
+    pipeline and the error that occurred, if any."""
+    metadata_store = SQLiteMetadataStore(
+        name="benchmark",
+        uri=uri,
+        journal_mode=journal_mode,
+        busy_timeout=busy_timeout,
+        cache_enabled=False,
+    )
+    try:
+        store = metadata_store.store
+        pipeline_type, run_type, execution_type, artifact_type = put_types(
+            store
+        )
+        pipeline = metadata_store_pb2.Context(
+            type_id=pipeline_type, name=f"pipeline_{index}"
+        )
+        run = metadata_store_pb2.Context(type_id=run_type, name=f"run_{index}")
+        pipeline.id, run.id = store.put_contexts([pipeline, run])
+
+        previous_artifact = None
+        for step_index in range(steps):
+            execution = metadata_store_pb2.Execution(
+                type_id=execution_type,
+                last_known_state=metadata_store_pb2.Execution.RUNNING,
+            )
+            artifact = metadata_store_pb2.Artifact(
+                type_id=artifact_type,
+                uri=f"/tmp/artifacts/{index}/{step_index}",
+            )
+            artifacts_and_events = []
+            if previous_artifact is not None:
+                input_event = metadata_store_pb2.Event(
+                    type=metadata_store_pb2.Event.INPUT
+                )
+                input_event.path.steps.add().key = "input"
+                artifacts_and_events.append((previous_artifact, input_event))
+            output_event = metadata_store_pb2.Event(
+                type=metadata_store_pb2.Event.OUTPUT
+            )
+            output_event.path.steps.add().key = "output"
+            artifacts_and_events.append((artifact, output_event))
+
+            execution.id, artifact_ids, _ = store.put_execution(
+                execution, artifacts_and_events, [pipeline, run]
+            )
+            artifact.id = artifact_ids[-1]
+            previous_artifact = artifact
+
+            execution.last_known_state = metadata_store_pb2.Execution.COMPLETE
+            store.put_executions([execution])
+    except Exception as e:
+        return index, f"{type(e).__name__}: {e}"
+    return index, None
+
+
+def main() -> None:
+    """Runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pipelines", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--journal-mode", default="WAL")
+    parser.add_argument("--busy-timeout", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"{directory}/metadata.db"
+        # create the schema and types before the writers start
+        put_types(
+            SQLiteMetadataStore(
+                name="benchmark",
+                uri=uri,
+                journal_mode=args.journal_mode,
+                cache_enabled=False,
+            ).store
+        )
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.pipelines) as pool:
+            results = pool.starmap(
+                run_pipeline,
+                [
+                    (
+                        uri,
+                        args.journal_mode,
+                        args.busy_timeout,
+                        index,
+                        args.steps,
+                    )
+                    for index in range(args.pipelines)
+                ],
+            )
+        duration = time.perf_counter() - start
+
+    failures = [(index, error) for index, error in results if error]
+    print(
+        f"{args.pipelines} pipelines with {args.steps} steps "
+        f"(journal_mode={args.journal_mode}, "
+        f"busy_timeout={args.busy_timeout}ms): {duration:.2f}s, "
+        f"{args.pipelines * args.steps / duration:.1f} steps/s, "
+        f"{len(failures)} failed runs"
+    )
+    for index, error in failures:
+        print(f"  pipeline_{index}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ artifacts get stored.
 """
 from coalescenceml.artifact_store.base_artifact_store import BaseArtifactStore
 from coalescenceml.artifact_store.local_artifact_store import LocalArtifactStore
+from coalescenceml.artifact_store.tiered_artifact_store import (
+    TieredArtifactStore,
+)
 
 
-__all__ = ["BaseArtifactStore", "LocalArtifactStore"]
+__all__ = ["BaseArtifactStore", "LocalArtifactStore", "TieredArtifactStore"]
@@ -1,9 +1,12 @@
+import os
 import textwrap
 from abc import ABC
+from collections import defaultdict
 from typing import (
     Any,
     Callable,
     ClassVar,
+    DefaultDict,
     Dict,
     Iterable,
     List,
@@ -39,6 +42,143 @@ def _catch_not_found_error(_func: Callable[..., Any]) -> Callable[..., Any]:
     return inner_function
 
 
+def _to_str(path: PathType) -> str:
+    """Converts a PathType to a str using UTF-8."""
+    return path.decode("utf-8") if isinstance(path, bytes) else path
+
+
+def _get_size(stat_result: Any) -> int:
+    """Extracts the size in bytes from a stat descriptor.
+
+    Local filesystems return an `os.stat_result` while `fsspec` based
+    filesystems return a dictionary with a `size` key.
+    """
+    if isinstance(stat_result, dict):
+        return int(stat_result.get("size") or 0)
+    return int(stat_result.st_size)
+
+
+def _qualify_path(prefix: PathType, path: PathType) -> str:
+    """Prepends the scheme of `prefix` to `path` if `path` has none.
+
+    Object store clients such as `s3fs` or `adlfs` return keys without their
+    scheme (`bucket/key` instead of `s3://bucket/key`). Paths handed back to
+    CoalescenceML need the scheme so they get routed to the right filesystem.
+    """
+    prefix_str, path_str = _to_str(prefix), _to_str(path)
+    if "://" in path_str or "://" not in prefix_str:
+        return path_str
+    scheme = prefix_str.split("://", 1)[0]
+    return f"{scheme}://{path_str}"
+
+
+# Minimum number of requested files below the same prefix for which
+# `_stat_object_files` lists the prefix instead of stat-ing every file
+STAT_LISTING_THRESHOLD = 10
+
+
+def _stat_object_files(
+    filesystem: Any, scheme: str, paths: Iterable[PathType]
+) -> Dict[str, Any]:
+    """Returns the stat descriptors of files in an `fsspec` object store.
+
+    Files are grouped by their parent prefix. Prefixes with at least
+    `STAT_LISTING_THRESHOLD` requested files are listed once, the other
+    files are looked up with one metadata request each, so stat-ing a few
+    files never lists a large prefix.
+
+    Args:
+        filesystem: The `fsspec` filesystem of the object store.
+        scheme: Scheme of the object store, e.g. `s3://`.
+        paths: The file paths to stat.
+
+    Returns:
+        Dictionary mapping each existing path to its stat descriptor.
+        Paths that do not exist are left out.
+    """
+    by_parent: Dict[str, List[str]] = {}
+    for path in paths:
+        path_str = _qualify_path(scheme, path)
+        by_parent.setdefault(path_str.rsplit("/", 1)[0], []).append(path_str)
+
+    stats: Dict[str, Any] = {}
+    for parent, children in by_parent.items():
+        if len(children) < STAT_LISTING_THRESHOLD:
+            for child in children:
+                try:
+                    stats[child] = filesystem.info(child)
+                except FileNotFoundError:
+                    continue
+            continue
+
+        try:
+            listing = filesystem.ls(parent, detail=True)
+        except FileNotFoundError:
+            continue
+        infos = {_qualify_path(parent, i["name"]): i for i in listing}
+        for child in children:
+            if child in infos:
+                stats[child] = infos[child]
+    return stats
+
+
+def _walk_from_listing(
+    top: PathType,
+    files: Iterable[PathType],
+    topdown: bool = True,
+) -> Iterable[Tuple[PathType, List[PathType], List[PathType]]]:
+    """Emulates `os.walk` on top of a flat recursive listing.
+
+    Object stores have no real directories, so walking one "directory" at a
+    time costs one listing request per level. Building the tree from a single
+    recursive listing of `top` only costs the (paginated) listing itself.
+
+    Args:
+        top: Path of directory to walk.
+        files: Full paths of all files below `top`.
+        topdown: Whether to walk directories topdown or bottom-up.
+
+    Yields:
+        Tuples of the current directory path, a list of directories inside
+        the current directory and a list of files inside the current
+        directory.
+    """
+    root = _to_str(top).rstrip("/")
+    subdirs: DefaultDict[str, Set[str]] = defaultdict(set)
+    dir_files: DefaultDict[str, List[str]] = defaultdict(list)
+
+    for file_path in files:
+        file_str = _to_str(file_path)
+        if not file_str.startswith(root + "/"):
+            continue
+        parts = file_str[len(root) + 1 :].split("/")
+        current = root
+        for part in parts[:-1]:
+            subdirs[current].add(part)
+            current = f"{current}/{part}"
+        dir_files[current].append(parts[-1])
+
+    def _walk(
+        directory: str,
+    ) -> Iterable[Tuple[PathType, List[PathType], List[PathType]]]:
+        """Recursively yields the entries for `directory`."""
+        children = sorted(subdirs.get(directory, set()))
+        entry = (
+            directory,
+            list(children),
+            sorted(dir_files.get(directory, [])),
+        )
+        if topdown:
+            yield entry
+        for child in children:
+            yield from _walk(f"{directory}/{child}")
+        if not topdown:
+            yield entry
+
+    if root in subdirs or root in dir_files:
+        yield from _walk(root)
+
+
 class BaseArtifactStore(StackComponent, ABC):
     """Base class for all CoalescenceML artifact stores.
     Attributes:
@@ -127,6 +267,71 @@ class BaseArtifactStore(StackComponent, ABC):
         """Return an iterator that walks the contents of the given directory."""
         raise NotImplementedError()
 
+    def list_prefix(self, prefix: PathType) -> Dict[str, int]:
+        """Lists all files below a prefix together with their sizes.
+
+        The default implementation walks the directory tree and calls `stat`
+        for every file. Artifact stores backed by an object store should
+        override this with a single (paginated) recursive listing request.
+
+        Args:
+            prefix: Path of the directory to list recursively.
+
+        Returns:
+            Dictionary mapping the full path of every file below `prefix` to
+            its size in bytes.
+        """
+        sizes: Dict[str, int] = {}
+        if not self.isdir(prefix):
+            return sizes
+        for root, _, files in self.walk(prefix):
+            for file_name in files:
+                file_path = os.path.join(_to_str(root), _to_str(file_name))
+                sizes[file_path] = _get_size(self.stat(file_path))
+        return sizes
+
+    def stat_many(self, paths: Iterable[PathType]) -> Dict[str, Any]:
+        """Returns the stat descriptors for multiple file paths.
+
+        Args:
+            paths: The file paths to stat.
+
+        Returns:
+            Dictionary mapping each existing path to its stat descriptor.
+            Paths that do not exist are left out.
+        """
+        stats: Dict[str, Any] = {}
+        for path in paths:
+            try:
+                stats[_to_str(path)] = self.stat(path)
+            except FileNotFoundError:
+                continue
+        return stats
+
+    def remove_many(self, paths: Iterable[PathType]) -> None:
+        """Removes multiple files. Dangerous operation.
+
+        Artifact stores backed by an object store should override this to use
+        the batch delete API of the store.
+
+        Args:
+            paths: The file paths to remove.
+        """
+        for path in paths:
+            self.remove(path)
+
+    def finalize_artifact(self, uri: PathType, artifact_type: str) -> None:
+        """Gets called once all files of an artifact have been written.
+
+        Artifact stores which stage writes (e.g. in a local tier) can use this
+        hook to decide whether and when to persist the artifact. The default
+        implementation does nothing.
+
+        Args:
+            uri: The URI of the artifact.
+            artifact_type: The type name of the artifact.
+        """
+
     @root_validator
     def _ensure_artifact_store(cls, values: Dict[str, Any]) -> Any:
         """Validator function for the Artifact Stores. Checks whether
@@ -165,8 +370,16 @@ class BaseArtifactStore(StackComponent, ABC):
 
         return values
 
-    def _register(self, priority: int = 5) -> None:
-        """Create and register a filesystem within the TFX registry"""
+    def _register(
+        self, priority: int = 5, supported_schemes: Optional[Set[str]] = None
+    ) -> None:
+        """Create and register a filesystem within the TFX registry.
+
+        Args:
+            priority: Priority of the filesystem, lower values are preferred.
+            supported_schemes: Schemes to register the filesystem for.
+                Defaults to the `SUPPORTED_SCHEMES` of the class.
+        """
         from tfx.dsl.io.filesystem import Filesystem
         from tfx.dsl.io.filesystem_registry import DEFAULT_FILESYSTEM_REGISTRY
 
@@ -174,7 +387,8 @@ class BaseArtifactStore(StackComponent, ABC):
             self.__class__.__name__,
             (Filesystem,),
             {
-                "SUPPORTED_SCHEMES": self.SUPPORTED_SCHEMES,
+                "SUPPORTED_SCHEMES": supported_schemes
+                or self.SUPPORTED_SCHEMES,
                 "open": staticmethod(_catch_not_found_error(self.open)),
                 "copy": staticmethod(_catch_not_found_error(self.copyfile)),
                 "exists": staticmethod(self.exists),
@@ -188,6 +402,10 @@ class BaseArtifactStore(StackComponent, ABC):
                 "rmtree": staticmethod(_catch_not_found_error(self.rmtree)),
                 "stat": staticmethod(_catch_not_found_error(self.stat)),
                 "walk": staticmethod(_catch_not_found_error(self.walk)),
+                "list_prefix": staticmethod(self.list_prefix),
+                "stat_many": staticmethod(self.stat_many),
+                "remove_many": staticmethod(self.remove_many),
+                "finalize_artifact": staticmethod(self.finalize_artifact),
             },
         )
 
@@ -0,0 +1,54 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+from coalescenceml.logger import get_logger
+from coalescenceml.utils.singleton import SingletonMetaClass
+
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+PoolKey = Tuple[Hashable, ...]
+
+
+class FilesystemPool(metaclass=SingletonMetaClass):
+    """Process-wide pool of filesystem clients and credentials.
+
+    Artifact store instances get recreated frequently (e.g. every time the
+    active stack of the `Directory` is loaded), so caching clients on the
+    instance means connections, TLS sessions and credentials get set up again
+    and again within a single pipeline run. Artifact stores instead fetch
+    their clients from this pool, keyed by everything that influences the
+    client (flavor, account, credentials and connection settings), so all
+    instances and producers in a process share them.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty pool."""
+        self._clients: Dict[PoolKey, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: PoolKey, factory: Callable[[], T]) -> T:
+        """Returns the pooled client for a key, creating it if necessary.
+
+        Args:
+            key: Hashable key which identifies the client.
+            factory: Callable that creates the client if none is pooled yet.
+
+        Returns:
+            The pooled client.
+        """
+        with self._lock:
+            if key not in self._clients:
+                logger.debug("Creating pooled filesystem client for %s.", key)
+                self._clients[key] = factory()
+            return self._clients[key]  # type: ignore[no-any-return]
+
+    def clear(self) -> None:
+        """Removes all clients from the pool."""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        """Returns the number of pooled clients."""
+        return len(self._clients)
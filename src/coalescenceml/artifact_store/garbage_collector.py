@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import bisect
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from ml_metadata import errors
+from ml_metadata.metadata_store import metadata_store
+from ml_metadata.proto import metadata_store_pb2
+from pydantic import BaseModel
+from tfx.dsl.compiler.constants import PIPELINE_RUN_CONTEXT_TYPE_NAME
+
+from coalescenceml.artifacts.constants import TAGS_PROPERTY_KEY
+from coalescenceml.io import utils
+from coalescenceml.logger import get_logger
+
+
+if TYPE_CHECKING:
+    from coalescenceml.artifact_store import BaseArtifactStore
+    from coalescenceml.metadata_store import BaseMetadataStore
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def _batched(items: List[T], batch_size: int) -> Iterator[List[T]]:
+    """Splits a list into consecutive batches of at most `batch_size`."""
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+def _files_below(sorted_paths: List[str], uri: str) -> List[str]:
+    """Returns all paths of a sorted listing that live below `uri`.
+
+    Args:
+        sorted_paths: Lexicographically sorted file paths.
+        uri: The directory (or file) URI of an artifact.
+
+    Returns:
+        The file paths which are equal to or nested below `uri`.
+    """
+    prefix = uri.rstrip("/") + "/"
+    matches = []
+    exact_match = bisect.bisect_left(sorted_paths, uri)
+    if exact_match < len(sorted_paths) and sorted_paths[exact_match] == uri:
+        matches.append(uri)
+
+    index = bisect.bisect_left(sorted_paths, prefix)
+    while index < len(sorted_paths) and sorted_paths[index].startswith(prefix):
+        matches.append(sorted_paths[index])
+        index += 1
+    return matches
+
+
+class GarbageCollectionReport(BaseModel):
+    """Summary of an artifact garbage collection pass.
+
+    Attributes:
+        dry_run: If `True`, nothing was deleted and the report only shows what
+            would have been removed.
+        artifact_ids: IDs of all unreachable artifacts.
+        artifact_uris: URIs of all unreachable artifacts.
+        file_count: Number of files stored below the artifact URIs.
+        reclaimed_bytes: Total size of these files in bytes.
+    """
+
+    dry_run: bool
+    artifact_ids: List[int] = []
+    artifact_uris: List[str] = []
+    file_count: int = 0
+    reclaimed_bytes: int = 0
+
+
+class ArtifactGarbageCollector:
+    """Deletes artifacts which are no longer reachable from retained runs.
+
+    An artifact is retained if it was consumed or produced by
+    * one of the last `keep_last_runs` runs of any pipeline,
+    * a pinned run (see `BaseMetadataStore.pin_pipeline_run`),
+    * a step which is still running,
+    or if it was tagged using `BaseMetadataStore.tag_artifact`. All other
+    artifacts stored inside the artifact store are unreachable. Their files
+    get deleted in bulk and the artifacts are marked as `DELETED` in the
+    metadata store.
+    """
+
+    def __init__(
+        self,
+        metadata_store: BaseMetadataStore,
+        artifact_store: BaseArtifactStore,
+        keep_last_runs: int = 5,
+        pinned_runs: Optional[Iterable[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        """Initializes the garbage collector.
+
+        Args:
+            metadata_store: The metadata store to read the lineage from.
+            artifact_store: The artifact store to delete files from.
+            keep_last_runs: Number of most recent runs to retain for each
+                pipeline.
+            pinned_runs: Names of additional runs to retain.
+            batch_size: Maximum number of IDs or paths sent to the stores in
+                a single request.
+
+        Raises:
+            ValueError: If `keep_last_runs` is negative or `batch_size` is not
+                positive.
+        """
+        if keep_last_runs < 0:
+            raise ValueError("`keep_last_runs` must not be negative.")
+        if batch_size <= 0:
+            raise ValueError("`batch_size` must be positive.")
+
+        self._metadata_store = metadata_store
+        self._artifact_store = artifact_store
+        self._keep_last_runs = keep_last_runs
+        self._pinned_runs = set(pinned_runs or [])
+        self._batch_size = batch_size
+
+    def _get_retained_run_ids(self) -> Set[int]:
+        """Returns the IDs of the pinned runs and of the last runs of each
+        pipeline."""
+        store = self._metadata_store.store
+        retained = {
+            run.id for run in self._metadata_store.get_pinned_run_contexts()
+        }
+        for run_name in sorted(self._pinned_runs):
+            run = store.get_context_by_type_and_name(
+                PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
+            )
+            if run:
+                retained.add(run.id)
+
+        retained.update(
+            run.id
+            for run in self._metadata_store.get_latest_run_contexts(
+                self._keep_last_runs
+            )
+        )
+        return retained
+
+    def _get_executions(
+        self, filter_query: str
+    ) -> Optional[List[metadata_store_pb2.Execution]]:
+        """Returns the executions matching a filter query, `None` if the
+        metadata store can't filter executions."""
+        list_options = metadata_store.ListOptions(filter_query=filter_query)
+        try:
+            return self._metadata_store.store.get_executions(
+                list_options=list_options
+            )
+        except (errors.InvalidArgumentError, errors.UnimplementedError):
+            logger.debug(
+                "Metadata store can't filter executions by '%s'.",
+                filter_query,
+            )
+            return None
+
+    def _get_run_execution_ids(self, run_ids: Set[int]) -> Set[int]:
+        """Returns the IDs of all executions of the given runs."""
+        execution_ids: Set[int] = set()
+        for batch in _batched(sorted(run_ids), self._batch_size):
+            executions = self._get_executions(
+                " OR ".join(f"contexts_a.id = {run_id}" for run_id in batch)
+            )
+            if executions is None:
+                store = self._metadata_store.store
+                executions = [
+                    execution
+                    for run_id in batch
+                    for execution in store.get_executions_by_context(run_id)
+                ]
+            execution_ids.update(execution.id for execution in executions)
+        return execution_ids
+
+    def _get_running_execution_ids(self) -> Set[int]:
+        """Returns the IDs of all executions which are still running."""
+        running_states = (
+            metadata_store_pb2.Execution.NEW,
+            metadata_store_pb2.Execution.RUNNING,
+        )
+        executions = self._get_executions(
+            " OR ".join(
+                "last_known_state = "
+                f"{metadata_store_pb2.Execution.State.Name(state)}"
+                for state in running_states
+            )
+        )
+        if executions is None:
+            executions = self._metadata_store.store.get_executions()
+        return {
+            execution.id
+            for execution in executions
+            if execution.last_known_state in running_states
+        }
+
+    def get_retained_execution_ids(self) -> Set[int]:
+        """Returns the IDs of all executions whose artifacts are retained.
+
+        The executions are looked up in bulk: one query for the running
+        executions and one query per batch of retained runs.
+        """
+        retained = self._get_run_execution_ids(self._get_retained_run_ids())
+        # never touch the artifacts of steps that are still running
+        retained.update(self._get_running_execution_ids())
+        return retained
+
+    def _iter_artifact_pages(
+        self,
+    ) -> Iterator[List[metadata_store_pb2.Artifact]]:
+        """Lists all artifacts in pages of at most `batch_size` artifacts,
+        ordered by their ID."""
+        last_artifact_id = 0
+        while True:
+            page = self._metadata_store.store.get_artifacts(
+                list_options=metadata_store.ListOptions(
+                    limit=self._batch_size,
+                    order_by=metadata_store.OrderByField.ID,
+                    is_asc=True,
+                    filter_query=f"id > {last_artifact_id}",
+                )
+            )
+            if page:
+                yield page
+            if len(page) < self._batch_size:
+                return
+            last_artifact_id = page[-1].id
+
+    def get_retained_artifact_ids(self, execution_ids: Set[int]) -> Set[int]:
+        """Returns the IDs of all artifacts consumed or produced by the
+        given executions.
+
+        Args:
+            execution_ids: IDs of the retained executions.
+
+        Returns:
+            IDs of all artifacts connected to these executions.
+        """
+        artifact_ids: Set[int] = set()
+        for batch in _batched(sorted(execution_ids), self._batch_size):
+            events = self._metadata_store.store.get_events_by_execution_ids(
+                batch
+            )
+            artifact_ids.update(event.artifact_id for event in events)
+        return artifact_ids
+
+    def find_unreachable_artifacts(self) -> List[metadata_store_pb2.Artifact]:
+        """Returns all live artifacts inside the artifact store which are
+        not retained."""
+        retained_ids = self.get_retained_artifact_ids(
+            self.get_retained_execution_ids()
+        )
+        root = self._artifact_store.path.rstrip("/") + "/"
+
+        unreachable = []
+        for page in self._iter_artifact_pages():
+            unreachable.extend(
+                artifact
+                for artifact in page
+                if artifact.id not in retained_ids
+                and artifact.state != metadata_store_pb2.Artifact.DELETED
+                and TAGS_PROPERTY_KEY not in artifact.custom_properties
+                and artifact.uri.startswith(root)
+            )
+        return unreachable
+
+    def collect(self, dry_run: bool = True) -> GarbageCollectionReport:
+        """Finds and deletes all unreachable artifacts.
+
+        Args:
+            dry_run: If `True`, only report what would be deleted.
+
+        Returns:
+            A report of the unreachable artifacts and the reclaimed storage.
+        """
+        artifacts = self.find_unreachable_artifacts()
+        report = GarbageCollectionReport(
+            dry_run=dry_run,
+            artifact_ids=[artifact.id for artifact in artifacts],
+            artifact_uris=sorted({artifact.uri for artifact in artifacts}),
+        )
+        if not artifacts:
+            logger.info("No unreachable artifacts found.")
+            return report
+
+        # One (paginated) listing of the whole store instead of one listing
+        # per artifact
+        file_sizes = self._artifact_store.list_prefix(self._artifact_store.path)
+        sorted_paths = sorted(file_sizes)
+        files_to_delete = [
+            path
+            for uri in report.artifact_uris
+            for path in _files_below(sorted_paths, uri)
+        ]
+        report.file_count = len(files_to_delete)
+        report.reclaimed_bytes = sum(file_sizes[f] for f in files_to_delete)
+
+        if dry_run:
+            logger.info(
+                "Dry run: %d unreachable artifacts with %d files could be "
+                "deleted.",
+                len(artifacts),
+                report.file_count,
+            )
+            return report
+
+        for batch in _batched(files_to_delete, self._batch_size):
+            self._artifact_store.remove_many(batch)
+
+        if not utils.is_remote(self._artifact_store.path):
+            # Local filesystems keep the now empty artifact directories around
+            for uri in report.artifact_uris:
+                if self._artifact_store.isdir(uri):
+                    self._artifact_store.rmtree(uri)
+
+        for artifact in artifacts:
+            artifact.state = metadata_store_pb2.Artifact.DELETED
+        for artifact_batch in _batched(artifacts, self._batch_size):
+            self._metadata_store.store.put_artifacts(artifact_batch)
+
+        logger.info(
+            "Deleted %d unreachable artifacts with %d files.",
+            len(artifacts),
+            report.file_count,
+        )
+        return report
@@ -0,0 +1,475 @@
+import glob
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from pydantic import validator
+
+from coalescenceml.artifact_store.base_artifact_store import (
+    BaseArtifactStore,
+    PathType,
+    _to_str,
+    _walk_from_listing,
+)
+from coalescenceml.artifact_store.exceptions import ArtifactStoreInterfaceError
+from coalescenceml.constants import REMOTE_FS_PREFIX
+from coalescenceml.logger import get_logger
+from coalescenceml.utils.singleton import SingletonMetaClass
+
+
+logger = get_logger(__name__)
+
+COPY_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+def _is_write_mode(mode: str) -> bool:
+    """Returns whether a file mode allows writing."""
+    return any(c in mode for c in "wax+")
+
+
+class _PromotionQueue(metaclass=SingletonMetaClass):
+    """Process-wide queue of artifacts being promoted to the remote tier.
+
+    Artifact store instances get recreated frequently, while the filesystem
+    registered in the TFX registry stays bound to the first one. Keeping the
+    pending promotions in one place allows every instance to wait for them.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty queue."""
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}  # type: ignore[type-arg]
+        self._lock = threading.Lock()
+
+    def submit(
+        self, uri: str, max_workers: int, function: Callable[[], None]
+    ) -> None:
+        """Schedules the promotion of an artifact.
+
+        Args:
+            uri: The URI of the artifact.
+            max_workers: Number of worker threads, only used when the first
+                promotion of the process is scheduled.
+            function: Callable which uploads the artifact.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="coml-promotion",
+                )
+            self._futures[uri] = self._executor.submit(function)
+
+    def wait(self, timeout: Optional[float] = None) -> List[str]:
+        """Waits for all scheduled promotions to finish.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            URIs of all artifacts whose promotion failed or did not finish
+            within the timeout.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+        wait(futures.values(), timeout=timeout)
+
+        failed = []
+        with self._lock:
+            for uri, future in futures.items():
+                if not future.done():
+                    failed.append(uri)
+                    continue
+                if self._futures.get(uri) is future:
+                    del self._futures[uri]
+                if future.exception():
+                    logger.error(
+                        "Failed to promote artifact '%s' to the remote "
+                        "tier: %s",
+                        uri,
+                        future.exception(),
+                    )
+                    failed.append(uri)
+        return failed
+
+    def __len__(self) -> int:
+        """Returns the number of scheduled promotions."""
+        return len(self._futures)
+
+
+class TieredArtifactStore(BaseArtifactStore):
+    """Artifact store with a hot local tier in front of a remote store.
+
+    All files are written to the local tier first and reads are served from
+    it whenever the file exists locally, so artifacts consumed by the next
+    step on the same host never travel through the remote store. Once an
+    artifact is complete it is promoted to the remote tier in the background
+    if its type matches `persist_artifact_types`. Artifacts of other types
+    and auxiliary pipeline files stay local only.
+
+    Attributes:
+        path: Root path of the remote tier, e.g. `s3://bucket/artifacts`.
+        local_path: Root directory of the local tier.
+        remote_flavor: Flavor of the artifact store used for the remote tier.
+        remote_config: Additional attributes of the remote artifact store.
+        persist_artifact_types: Type names of artifacts that need to be
+            persisted remotely. If empty, all artifacts are persisted.
+        promotion_workers: Number of threads uploading artifacts.
+    """
+
+    local_path: str
+    remote_flavor: str
+    remote_config: Dict[str, Any] = {}
+    persist_artifact_types: List[str] = []
+    promotion_workers: int = 4
+
+    _remote_store: Optional[BaseArtifactStore] = None
+
+    # Class Configuration
+    FLAVOR: ClassVar[str] = "tiered"
+    SUPPORTED_SCHEMES: ClassVar[Set[str]] = set(REMOTE_FS_PREFIX)
+
+    @validator("local_path")
+    def ensure_local_path_local(cls, local_path: str) -> str:
+        """Makes sure the local tier is not on a remote filesystem."""
+        if any(local_path.startswith(prefix) for prefix in REMOTE_FS_PREFIX):
+            raise ArtifactStoreInterfaceError(
+                f"The local path `{local_path}` of the tiered artifact store "
+                f"must not start with one of the remote prefixes."
+            )
+        return local_path
+
+    @property
+    def remote_store(self) -> BaseArtifactStore:
+        """The artifact store of the remote tier."""
+        if self._remote_store is None:
+            from coalescenceml.stack.stack_component_class_registry import (
+                StackComponentClassRegistry,
+            )
+
+            remote_class = StackComponentClassRegistry.get_class(
+                component_type=self.TYPE, component_flavor=self.remote_flavor
+            )
+            self._remote_store = remote_class(  # type: ignore[assignment]
+                name=f"{self.name}-remote",
+                path=self.path,
+                **self.remote_config,
+            )
+        return self._remote_store  # type: ignore[return-value]
+
+    def _register(
+        self, priority: int = 5, supported_schemes: Optional[Set[str]] = None
+    ) -> None:
+        """Registers the tiered filesystem for the scheme of the remote path
+        only. It gets a lower priority value than regular artifact stores so
+        it is preferred over the filesystem of the remote store itself."""
+        scheme = self.path.split("://", 1)[0] + "://"
+        super()._register(priority=1, supported_schemes={scheme})
+
+    def _local(self, path: PathType) -> Optional[str]:
+        """Returns the local tier path for a path of the remote tier, or
+        `None` if the path is outside of this artifact store."""
+        root = self.path.rstrip("/")
+        path_str = _to_str(path).rstrip("/")
+        if path_str == root:
+            return self.local_path
+        if not path_str.startswith(root + "/"):
+            return None
+        return os.path.join(self.local_path, path_str[len(root) + 1 :])
+
+    def _remote(self, local_path: str) -> str:
+        """Returns the remote tier path for a path of the local tier."""
+        relative_path = os.path.relpath(local_path, self.local_path)
+        return f"{self.path.rstrip('/')}/{relative_path}"
+
+    def _is_local(self, path: PathType) -> bool:
+        """Returns whether a path exists in the local tier."""
+        local_path = self._local(path)
+        return local_path is not None and os.path.exists(local_path)
+
+    def open(self, name: PathType, mode: str = "r") -> Any:
+        """Opens a file, writing to and preferably reading from the local
+        tier."""
+        local_path = self._local(name)
+        if local_path is None:
+            return self.remote_store.open(name, mode=mode)
+        if _is_write_mode(mode):
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            if ("a" in mode or "+" in mode) and not os.path.exists(local_path):
+                if self.remote_store.exists(name):
+                    self._download(_to_str(name), local_path)
+            return open(local_path, mode=mode)
+        if os.path.exists(local_path):
+            return open(local_path, mode=mode)
+        return self.remote_store.open(name, mode=mode)
+
+    def copyfile(
+        self, src: PathType, dst: PathType, overwrite: bool = False
+    ) -> None:
+        """Copy a file from the source to the destination."""
+        if not overwrite and self.exists(dst):
+            raise FileExistsError(
+                f"Destination file {_to_str(dst)} already exists and argument "
+                f"`overwrite` is false."
+            )
+        with self.open(src, mode="rb") as source:
+            with self.open(dst, mode="wb") as destination:
+                shutil.copyfileobj(source, destination, COPY_BUFFER_SIZE)
+
+    def exists(self, path: PathType) -> bool:
+        """Returns `True` if the given path exists in any tier."""
+        return self._is_local(path) or self.remote_store.exists(path)
+
+    def glob(self, pattern: PathType) -> List[PathType]:
+        """Return the paths of both tiers that match a glob pattern."""
+        matches = {_to_str(match) for match in self.remote_store.glob(pattern)}
+        local_pattern = self._local(pattern)
+        if local_pattern is not None:
+            matches.update(
+                self._remote(match) for match in glob.glob(local_pattern)
+            )
+        return sorted(matches)
+
+    def isdir(self, path: PathType) -> bool:
+        """Returns whether the given path points to a directory in any tier."""
+        local_path = self._local(path)
+        if local_path is not None and os.path.isdir(local_path):
+            return True
+        return self.remote_store.isdir(path)
+
+    def listdir(self, path: PathType) -> List[PathType]:
+        """Returns the entries of a directory in both tiers."""
+        entries: Set[str] = set()
+        local_path = self._local(path)
+        if local_path is not None and os.path.isdir(local_path):
+            entries.update(os.listdir(local_path))
+        if self.remote_store.isdir(path):
+            entries.update(
+                _to_str(entry).rstrip("/").rsplit("/", 1)[-1]
+                for entry in self.remote_store.listdir(path)
+            )
+        elif not entries:
+            raise FileNotFoundError(f"Directory {_to_str(path)} not found.")
+        return sorted(entries)
+
+    def makedirs(self, path: PathType) -> None:
+        """Creates the directory in the local tier."""
+        local_path = self._local(path)
+        if local_path is None:
+            self.remote_store.makedirs(path)
+        else:
+            os.makedirs(local_path, exist_ok=True)
+
+    def mkdir(self, path: PathType) -> None:
+        """Creates the directory in the local tier."""
+        local_path = self._local(path)
+        if local_path is None:
+            self.remote_store.mkdir(path)
+        else:
+            os.makedirs(local_path, exist_ok=True)
+
+    def remove(self, path: PathType) -> None:
+        """Removes the file from both tiers. Dangerous operation."""
+        self.remove_many([path])
+
+    def rename(
+        self, src: PathType, dst: PathType, overwrite: bool = False
+    ) -> None:
+        """Renames the file in every tier that contains it."""
+        if not overwrite and self.exists(dst):
+            raise FileExistsError(
+                f"Destination path {_to_str(dst)} already exists and argument "
+                f"`overwrite` is false."
+            )
+        renamed = False
+        local_src, local_dst = self._local(src), self._local(dst)
+        if local_src and local_dst and os.path.exists(local_src):
+            os.makedirs(os.path.dirname(local_dst), exist_ok=True)
+            os.replace(local_src, local_dst)
+            renamed = True
+        if self.remote_store.exists(src):
+            self.remote_store.rename(src, dst, overwrite=True)
+            renamed = True
+        if not renamed:
+            raise FileNotFoundError(f"File {_to_str(src)} not found.")
+
+    def rmtree(self, path: PathType) -> None:
+        """Deletes the directory recursively from both tiers. Dangerous
+        operation."""
+        local_path = self._local(path)
+        if local_path is not None and os.path.isdir(local_path):
+            shutil.rmtree(local_path)
+        if self.remote_store.isdir(path):
+            self.remote_store.rmtree(path)
+
+    def stat(self, path: PathType) -> Any:
+        """Return the stat descriptor for a given file path, preferring the
+        local tier."""
+        local_path = self._local(path)
+        if local_path is not None and os.path.exists(local_path):
+            return os.stat(local_path)
+        return self.remote_store.stat(path)
+
+    def walk(
+        self,
+        top: PathType,
+        topdown: bool = True,
+        onerror: Optional[Callable[..., None]] = None,
+    ) -> Iterable[Tuple[PathType, List[PathType], List[PathType]]]:
+        """Return an iterator that walks the contents of the given directory
+        in both tiers."""
+        yield from _walk_from_listing(
+            top, self.list_prefix(top).keys(), topdown=topdown
+        )
+
+    def list_prefix(self, prefix: PathType) -> Dict[str, int]:
+        """Lists all files below a prefix in both tiers together with their
+        sizes. Files present in both tiers are reported with their local
+        size."""
+        sizes = dict(self.remote_store.list_prefix(prefix))
+        local_prefix = self._local(prefix)
+        if local_prefix is not None and os.path.isdir(local_prefix):
+            for root, _, files in os.walk(local_prefix):
+                for file_name in files:
+                    local_path = os.path.join(root, file_name)
+                    sizes[self._remote(local_path)] = os.stat(
+                        local_path
+                    ).st_size
+        return sizes
+
+    def stat_many(self, paths: Iterable[PathType]) -> Dict[str, Any]:
+        """Returns the stat descriptors for multiple file paths, preferring
+        the local tier."""
+        stats: Dict[str, Any] = {}
+        remote_paths = []
+        for path in paths:
+            local_path = self._local(path)
+            if local_path is not None and os.path.exists(local_path):
+                stats[_to_str(path)] = os.stat(local_path)
+            else:
+                remote_paths.append(path)
+        stats.update(self.remote_store.stat_many(remote_paths))
+        return stats
+
+    def remove_many(self, paths: Iterable[PathType]) -> None:
+        """Removes multiple files from both tiers. Dangerous operation."""
+        path_list = list(paths)
+        for path in path_list:
+            local_path = self._local(path)
+            if local_path is not None and os.path.exists(local_path):
+                os.remove(local_path)
+        remote_paths = list(self.remote_store.stat_many(path_list))
+        if remote_paths:
+            self.remote_store.remove_many(remote_paths)
+
+    def should_persist(self, artifact_type: str) -> bool:
+        """Returns whether artifacts of a type get promoted to the remote
+        tier.
+
+        Args:
+            artifact_type: The type name of the artifact.
+
+        Returns:
+            `True` if the artifact needs to be persisted remotely.
+        """
+        return (
+            not self.persist_artifact_types
+            or artifact_type in self.persist_artifact_types
+        )
+
+    def finalize_artifact(self, uri: PathType, artifact_type: str) -> None:
+        """Schedules the promotion of a completely written artifact to the
+        remote tier if its type requires it.
+
+        Args:
+            uri: The URI of the artifact.
+            artifact_type: The type name of the artifact.
+        """
+        uri_str = _to_str(uri)
+        if not self._is_local(uri_str):
+            return
+        if not self.should_persist(artifact_type):
+            logger.debug(
+                "Keeping artifact '%s' of type '%s' in the local tier only.",
+                uri_str,
+                artifact_type,
+            )
+            return
+        _PromotionQueue().submit(
+            uri_str, self.promotion_workers, lambda: self.promote(uri_str)
+        )
+
+    def promote(self, uri: PathType) -> None:
+        """Uploads all local files of an artifact to the remote tier.
+
+        Args:
+            uri: The URI of the artifact.
+        """
+        local_uri = self._local(uri)
+        if local_uri is None or not os.path.exists(local_uri):
+            return
+        if os.path.isfile(local_uri):
+            local_files = [local_uri]
+        else:
+            local_files = [
+                os.path.join(root, file_name)
+                for root, _, files in os.walk(local_uri)
+                for file_name in files
+            ]
+        for local_path in local_files:
+            with open(local_path, mode="rb") as source:
+                with self.remote_store.open(
+                    self._remote(local_path), mode="wb"
+                ) as destination:
+                    shutil.copyfileobj(source, destination, COPY_BUFFER_SIZE)
+        logger.debug(
+            "Promoted %d files of artifact '%s' to the remote tier.",
+            len(local_files),
+            _to_str(uri),
+        )
+
+    def _download(self, path: str, local_path: str) -> None:
+        """Copies a file from the remote tier into the local tier."""
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with self.remote_store.open(path, mode="rb") as source:
+            with open(local_path, mode="wb") as destination:
+                shutil.copyfileobj(source, destination, COPY_BUFFER_SIZE)
+
+    def wait_for_promotions(self, timeout: Optional[float] = None) -> None:
+        """Blocks until all scheduled promotions have finished.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Raises:
+            RuntimeError: If an artifact could not be promoted in time.
+        """
+        pending = len(_PromotionQueue())
+        if pending:
+            logger.info(
+                "Waiting for %d artifacts to be promoted to the remote tier...",
+                pending,
+            )
+        failed = _PromotionQueue().wait(timeout=timeout)
+        if failed:
+            raise RuntimeError(
+                f"Failed to promote the following artifacts to the remote "
+                f"tier: {failed}"
+            )
+
+    def cleanup_pipeline_run(self) -> None:
+        """Makes sure all artifacts of the run are persisted remotely before
+        the run is reported as finished."""
+        self.wait_for_promotions()
@@ -4,13 +4,17 @@ from ml_metadata.proto import metadata_store_pb2
 from tfx.types.artifact import Artifact, Property, PropertyType
 
 from coalescenceml.artifacts.constants import (
+    CHECKSUM_PROPERTY_KEY,
     DATATYPE_PROPERTY_KEY,
     PRODUCER_PROPERTY_KEY,
+    SIZE_PROPERTY_KEY,
 )
 
 
 DATATYPE_PROPERTY = Property(type=PropertyType.STRING)
 PRODUCER_PROPERTY = Property(type=PropertyType.STRING)
+CHECKSUM_PROPERTY = Property(type=PropertyType.STRING)
+SIZE_PROPERTY = Property(type=PropertyType.INT)
 
 
 class BaseArtifact(Artifact):
@@ -20,6 +24,8 @@ class BaseArtifact(Artifact):
     PROPERTIES: Dict[str, Property] = {
         DATATYPE_PROPERTY_KEY: DATATYPE_PROPERTY,
         PRODUCER_PROPERTY_KEY: PRODUCER_PROPERTY,
+        CHECKSUM_PROPERTY_KEY: CHECKSUM_PROPERTY,
+        SIZE_PROPERTY_KEY: SIZE_PROPERTY,
     }
     MLMD_TYPE: Any = None
 
@@ -1,2 +1,5 @@
 DATATYPE_PROPERTY_KEY = "datatype"
 PRODUCER_PROPERTY_KEY = "producer"
+CHECKSUM_PROPERTY_KEY = "checksum"
+SIZE_PROPERTY_KEY = "size"
+TAGS_PROPERTY_KEY = "coml-tags"
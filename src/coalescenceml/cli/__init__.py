@@ -14,11 +14,11 @@ Loading and using pre-built examples
 ------------------------------------
 """
 
+from coalescenceml.cli.artifacts import *
 from coalescenceml.cli.config import *
 from coalescenceml.cli.core import *
 from coalescenceml.cli.integration import *
-
-# from coalescenceml.cli.pipeline import *
+from coalescenceml.cli.pipeline import *
 from coalescenceml.cli.stack import *
 from coalescenceml.cli.stack_components import *
 from coalescenceml.cli.version import *
@@ -0,0 +1,152 @@
+from typing import Optional, Tuple
+
+import click
+
+from coalescenceml.cli import utils as cli_utils
+from coalescenceml.cli.cli import cli
+from coalescenceml.constants import console
+from coalescenceml.directory import Directory
+from coalescenceml.utils.readability_utils import get_human_readable_filesize
+
+
+@cli.group()
+def artifacts() -> None:
+    """Inspect and clean up the artifacts of the active stack."""
+
+
+@artifacts.command(
+    "gc", help="Delete artifacts that are unreachable from retained runs."
+)
+@click.option(
+    "--keep-last",
+    "-n",
+    "keep_last_runs",
+    type=int,
+    default=5,
+    show_default=True,
+    help="Number of most recent runs to retain for every pipeline.",
+)
+@click.option(
+    "--pin",
+    "-p",
+    "pinned_runs",
+    multiple=True,
+    help="Name of an additional pipeline run to retain.",
+)
+@click.option(
+    "--delete",
+    "delete",
+    is_flag=True,
+    help="Actually delete the artifacts. Without this flag only a dry-run "
+    "report is printed.",
+)
+@click.option("--yes", "-y", is_flag=True, help="Skip the confirmation.")
+def garbage_collect(
+    keep_last_runs: int,
+    pinned_runs: Tuple[str],
+    delete: bool = False,
+    yes: bool = False,
+) -> None:
+    """Garbage collect artifacts in the artifact store of the active stack."""
+    from coalescenceml.artifact_store.garbage_collector import (
+        ArtifactGarbageCollector,
+    )
+
+    cli_utils.print_active_stack()
+    stack = Directory().active_stack
+    collector = ArtifactGarbageCollector(
+        metadata_store=stack.metadata_store,
+        artifact_store=stack.artifact_store,
+        keep_last_runs=keep_last_runs,
+        pinned_runs=pinned_runs,
+    )
+
+    with console.status("Searching for unreachable artifacts...\n"):
+        report = collector.collect(dry_run=True)
+
+    if not report.artifact_ids:
+        cli_utils.info("No unreachable artifacts found.")
+        return
+
+    cli_utils.print_table(
+        [
+            {
+                "ARTIFACTS": str(len(report.artifact_ids)),
+                "FILES": str(report.file_count),
+                "RECLAIMABLE": get_human_readable_filesize(
+                    report.reclaimed_bytes
+                ),
+            }
+        ]
+    )
+    if not delete:
+        cli_utils.info(
+            "Dry run: nothing was deleted. Pass `--delete` to do so."
+        )
+        return
+
+    if not yes and not cli_utils.confirmation(
+        f"This will permanently delete {len(report.artifact_ids)} artifacts "
+        f"from the artifact store '{stack.artifact_store.name}'. Are you sure "
+        f"you want to proceed?"
+    ):
+        cli_utils.info("Skipping deletion of artifacts...")
+        return
+
+    with console.status("Deleting unreachable artifacts...\n"):
+        report = collector.collect(dry_run=False)
+    cli_utils.info(
+        f"Deleted {len(report.artifact_ids)} artifacts and reclaimed "
+        f"{get_human_readable_filesize(report.reclaimed_bytes)}."
+    )
+
+
+@artifacts.command(
+    "usage", help="Show the storage used by artifacts, from metadata only."
+)
+@click.option(
+    "--by",
+    "by",
+    type=click.Choice(["pipeline", "run", "step", "type"]),
+    default="pipeline",
+    show_default=True,
+    help="How to group the artifacts.",
+)
+@click.option(
+    "--limit",
+    "-n",
+    "limit",
+    type=int,
+    default=None,
+    help="Only show the largest groups.",
+)
+def usage(by: str, limit: Optional[int] = None) -> None:
+    """Show the storage used by the artifacts of the active stack."""
+    cli_utils.print_active_stack()
+    stack = Directory().active_stack
+
+    with console.status("Aggregating artifact sizes...\n"):
+        groups = stack.metadata_store.get_storage_usage(by=by)
+
+    if not groups:
+        cli_utils.info("No artifacts found.")
+        return
+
+    cli_utils.print_table(
+        [
+            {
+                by.upper(): group.name,
+                "ARTIFACTS": str(group.artifact_count),
+                "SIZE": get_human_readable_filesize(group.total_bytes),
+                "UNSIZED": str(group.unsized_artifact_count),
+            }
+            for group in groups[:limit]
+        ]
+    )
+    unsized = sum(group.unsized_artifact_count for group in groups)
+    if unsized:
+        cli_utils.warning(
+            f"No size was recorded for {unsized} artifacts, e.g. because "
+            f"they were written by an older version. They are not included "
+            f"in the sizes."
+        )
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import click
+
+from coalescenceml.cli import utils as cli_utils
+from coalescenceml.cli.cli import cli
+from coalescenceml.constants import console
+from coalescenceml.directory import Directory
+
+
+@cli.group()
+def pipeline() -> None:
+    """Inspect the pipelines and runs of the active stack."""
+
+
+@pipeline.command("export", help="Export the run history to parquet tables.")
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--pipeline",
+    "-p",
+    "pipeline_names",
+    multiple=True,
+    help="Name of a pipeline to export. Defaults to all pipelines.",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    default=None,
+    help="Only export runs created at or after this time.",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(),
+    default=None,
+    help="Only export runs created before this time.",
+)
+@click.option(
+    "--page-size",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Number of runs to read from the metadata store at once.",
+)
+def export_runs(
+    output_dir: str,
+    pipeline_names: Tuple[str],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page_size: int = 100,
+) -> None:
+    """Export the runs, steps, artifacts and edges of the metadata store of
+    the active stack to parquet files."""
+    from coalescenceml.metadata_store.export import MetadataExporter
+
+    cli_utils.print_active_stack()
+    stack = Directory().active_stack
+    exporter = MetadataExporter(
+        metadata_store=stack.metadata_store,
+        output_dir=output_dir,
+        pipeline_names=pipeline_names or None,
+        since=since,
+        until=until,
+        page_size=page_size,
+    )
+
+    with console.status("Exporting run history...\n"):
+        report = exporter.export()
+
+    cli_utils.print_table(
+        [
+            {
+                "TABLE": name.upper(),
+                "ROWS": str(report.row_counts[name]),
+                "FILE": path,
+            }
+            for name, path in report.files.items()
+        ]
+    )
+
+
+@pipeline.command(
+    "prune", help="Delete the metadata of old runs from the metadata store."
+)
+@click.option(
+    "--keep-last",
+    "-n",
+    "keep_last_runs",
+    type=int,
+    default=None,
+    help="Number of most recent runs to retain for every pipeline.",
+)
+@click.option(
+    "--max-age",
+    "max_age_days",
+    type=float,
+    default=None,
+    help="Retain all runs created within this number of days.",
+)
+@click.option(
+    "--pin",
+    "-p",
+    "pinned_runs",
+    multiple=True,
+    help="Name of an additional pipeline run to retain.",
+)
+@click.option(
+    "--archive-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory to export the deleted runs to as parquet files.",
+)
+@click.option(
+    "--delete",
+    "delete",
+    is_flag=True,
+    help="Actually delete the metadata. Without this flag only a dry-run "
+    "report is printed.",
+)
+@click.option("--yes", "-y", is_flag=True, help="Skip the confirmation.")
+def prune_runs(
+    keep_last_runs: Optional[int],
+    max_age_days: Optional[float],
+    pinned_runs: Tuple[str],
+    archive_dir: Optional[str] = None,
+    delete: bool = False,
+    yes: bool = False,
+) -> None:
+    """Delete the metadata of expired runs from the metadata store of the
+    active stack."""
+    from coalescenceml.metadata_store.pruning import MetadataPruner
+
+    if keep_last_runs is None and max_age_days is None:
+        cli_utils.error("Either `--keep-last` or `--max-age` must be set.")
+
+    cli_utils.print_active_stack()
+    stack = Directory().active_stack
+    pruner = MetadataPruner(
+        metadata_store=stack.metadata_store,
+        keep_last_runs=keep_last_runs,
+        max_age=(
+            timedelta(days=max_age_days) if max_age_days is not None else None
+        ),
+        pinned_runs=pinned_runs,
+        archive_dir=archive_dir,
+    )
+
+    with console.status("Searching for expired runs...\n"):
+        report = pruner.prune(dry_run=True)
+
+    if not report.run_names:
+        cli_utils.info("No expired runs found.")
+        return
+
+    cli_utils.print_table(
+        [
+            {
+                "EXPIRED RUNS": str(len(report.run_names)),
+                "EXECUTIONS": str(len(report.execution_ids)),
+                "KEPT FOR LINEAGE": str(len(report.retained_run_names)),
+            }
+        ]
+    )
+    if not delete:
+        cli_utils.info(
+            "Dry run: nothing was deleted. Pass `--delete` to do so."
+        )
+        return
+
+    if not yes and not cli_utils.confirmation(
+        f"This will permanently delete the metadata of "
+        f"{len(report.run_names)} runs from the metadata store "
+        f"'{stack.metadata_store.name}'. Are you sure you want to proceed?"
+    ):
+        cli_utils.info("Skipping deletion of runs...")
+        return
+
+    with console.status("Deleting expired runs...\n"):
+        report = pruner.prune(dry_run=False, measure_latency=True)
+
+    cli_utils.info(
+        f"Deleted {len(report.run_names)} runs, "
+        f"{len(report.execution_ids)} executions, "
+        f"{report.deleted_context_count} contexts and "
+        f"{report.deleted_artifact_count} artifacts."
+    )
+    if report.archive_dir:
+        cli_utils.info(f"Archived the deleted runs to '{report.archive_dir}'.")
+    cli_utils.print_table(
+        [
+            {
+                "QUERY": name,
+                "BEFORE": f"{report.latency_before[name] * 1000:.1f}ms",
+                "AFTER": f"{report.latency_after[name] * 1000:.1f}ms",
+            }
+            for name in report.latency_before
+        ]
+    )
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    """Formats a step duration for a table cell."""
+    return "-" if seconds is None else f"{seconds:.1f}s"
+
+
+@pipeline.command("diff", help="Compare the steps of two pipeline runs.")
+@click.argument("run_a", type=str)
+@click.argument("run_b", type=str)
+@click.option(
+    "--all",
+    "-a",
+    "show_all",
+    is_flag=True,
+    help="Also show the steps that didn't change.",
+)
+def diff_runs(run_a: str, run_b: str, show_all: bool = False) -> None:
+    """Compare the status, duration, parameters and outputs of the steps of
+    two runs, e.g. a good run and a run that regressed."""
+    from coalescenceml.metadata_store.run_diff import diff_pipeline_runs
+
+    cli_utils.print_active_stack()
+    metadata_store = Directory().active_stack.metadata_store
+    runs = []
+    for run_name in (run_a, run_b):
+        run = metadata_store.get_pipeline_run_by_name(run_name)
+        if run is None:
+            cli_utils.error(f"No pipeline run found for name '{run_name}'.")
+        runs.append(run)
+
+    with console.status("Comparing pipeline runs...\n"):
+        diff = diff_pipeline_runs(*runs)
+
+    steps = [step for step in diff.steps if show_all or step.has_changes]
+    slower_steps = diff.get_slower_steps()
+    if not steps and not slower_steps:
+        cli_utils.info(f"The steps of '{run_a}' and '{run_b}' didn't change.")
+        return
+
+    if steps:
+        cli_utils.print_table(
+            [
+                {
+                    "STEP": step.name,
+                    "STATUS": (
+                        f"{step.status_a.value if step.status_a else '-'} -> "
+                        f"{step.status_b.value if step.status_b else '-'}"
+                    ),
+                    "DURATION": (
+                        f"{_format_duration(step.duration_a)} -> "
+                        f"{_format_duration(step.duration_b)}"
+                    ),
+                    "PARAMETERS": ", ".join(
+                        f"{key}: {value_a!r} -> {value_b!r}"
+                        for key, (value_a, value_b) in step.parameters.items()
+                    ),
+                    "CHANGED OUTPUTS": ", ".join(
+                        output.name
+                        if output.changed
+                        else f"{output.name} (unknown)"
+                        for output in step.changed_outputs
+                    ),
+                }
+                for step in steps
+            ]
+        )
+    if slower_steps:
+        slowest = slower_steps[0]
+        cli_utils.warning(
+            f"Step '{slowest.name}' got {slowest.duration_change:.1f}s slower "
+            f"({_format_duration(slowest.duration_a)} -> "
+            f"{_format_duration(slowest.duration_b)})."
+        )
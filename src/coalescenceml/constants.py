@@ -46,6 +46,7 @@ ENV_COML_DEFAULT_STORE_TYPE = "COML_DEFAULT_STORE_TYPE"
 ENV_COML_PREVENT_PIPELINE_EXECUTION = "COML_PREVENT_PIPELINE_EXECUTION"
 ENV_COML_PROFILE_NAME = "COML_PROFILE_NAME"
 ENV_COML_DIRECTORY_PATH = "COML_DIRECTORY_PATH"
+ENV_COML_VERIFY_ARTIFACT_CHECKSUMS = "COML_VERIFY_ARTIFACT_CHECKSUMS"
 
 # Logging variables
 IS_DEBUG_ENV: bool = process_bool_env_var(ENV_COML_DEBUG, default=False)
@@ -69,6 +70,11 @@ SHOULD_PREVENT_PIPELINE_EXECUTION = process_bool_env_var(
     ENV_COML_PREVENT_PIPELINE_EXECUTION
 )
 
+# Artifact integrity
+SHOULD_VERIFY_ARTIFACT_CHECKSUMS = process_bool_env_var(
+    ENV_COML_VERIFY_ARTIFACT_CHECKSUMS
+)
+
 # DIRECTORY and local store directory paths:
 DIRECTORY_DIRECTORY_NAME = ".coalescence"
 LOCAL_STORES_DIRECTORY_NAME = "local_stores"
@@ -4,3 +4,8 @@ class InitializationException(Exception):
 
 class ForbiddenDirectoryAccessError(RuntimeError):
     """Raised when accessing a CoML directory while a step is executed."""
+
+
+class ArtifactChecksumError(Exception):
+    """Raised when the data of an artifact does not match the checksum that
+    was recorded when writing it."""
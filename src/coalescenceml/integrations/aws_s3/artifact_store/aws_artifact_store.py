@@ -1,70 +1,126 @@
-from ast import Tuple
+import os
 from pathlib import Path
 from s3fs import S3FileSystem
 
-from coalescenceml.artifact_store.base_artifact_store import BaseArtifactStore, PathType
-from coalescenceml.integrations.constants import AWS_ENDPOINT_STR, AWS_ENDPOINT_URL
+from coalescenceml.artifact_store.base_artifact_store import (
+    BaseArtifactStore,
+    PathType,
+    _qualify_path,
+    _stat_object_files,
+    _walk_from_listing,
+)
+from coalescenceml.artifact_store.filesystem_pool import FilesystemPool
+from coalescenceml.integrations.constants import (
+    AWS_ENDPOINT_S3,
+    AWS_ENDPOINT_URL,
+    S3,
+)
+from coalescenceml.stack.stack_component_class_registry import (
+    register_stack_component_class,
+)
 
 
 from typing import (
     Any,
     Callable,
+    ClassVar,
+    Dict,
     Iterable,
     List,
     Optional,
+    Set,
+    Tuple,
 )
 
+@register_stack_component_class
 class AWSArtifactStore(BaseArtifactStore):
     """ Artifact Store for AWS S3""" 
 
-    # Class Configuration
-    s3fs: Optional[S3FileSystem] = None
     region: Optional[str] = None
+    max_connections: int = 10
+    keep_alive: bool = True
 
-    @property 
-    def filesystem(self):
-        if not self.s3fs:
-            if self.region:
-                self.s3fs = S3FileSystem(client_kwargs={"endpoint_url": AWS_ENDPOINT_STR + self.region + AWS_ENDPOINT_URL})
-            else:
-                self.s3fs = S3FileSystem()
-        return self.s3fs
+    # Class Configuration
+    FLAVOR: ClassVar[str] = S3
+    SUPPORTED_SCHEMES: ClassVar[Set[str]] = {"s3://"}
+
+    @property
+    def filesystem(self) -> S3FileSystem:
+        """The process-wide pooled filesystem client for this region.
 
-    def open(self, name: PathType) -> Any:
+        Clients are keyed by the credentials taken from the environment, so
+        switching the AWS profile never reuses a client of another account.
+        """
+        credentials_key = (
+            os.getenv("AWS_PROFILE"),
+            os.getenv("AWS_ACCESS_KEY_ID"),
+        )
+        return FilesystemPool().get(
+            (
+                self.FLAVOR,
+                self.region,
+                credentials_key,
+                self.max_connections,
+                self.keep_alive,
+            ),
+            self._create_filesystem,
+        )
+
+    def _create_filesystem(self) -> S3FileSystem:
+        """Creates a new S3 filesystem client with the connection settings
+        of this artifact store."""
+        client_kwargs: Dict[str, str] = {}
+        if self.region:
+            client_kwargs["endpoint_url"] = (
+                AWS_ENDPOINT_S3 + self.region + AWS_ENDPOINT_URL
+            )
+        return S3FileSystem(
+            client_kwargs=client_kwargs,
+            config_kwargs={
+                "max_pool_connections": self.max_connections,
+                "tcp_keepalive": self.keep_alive,
+            },
+        )
+
+    def open(self, name: PathType, mode: str = "r") -> Any:
         """Open a file at the given path."""
-        return self.s3fs.open(name)
+        return self.filesystem.open(name, mode=mode)
 
     def copyfile(self, src: PathType, dst: PathType, overwrite: bool = False) -> None:
         """Copy a file from the source to the destination."""
-        self.s3fs.copy(src,dst)
+        self.filesystem.copy(src, dst)
 
     def exists(self, path: PathType) -> bool:
         """Returns `True` if the given path exists."""
-        return self.s3fs.exists(path)
+        return self.filesystem.exists(path)
 
     def glob(self, pattern: PathType) -> List[PathType]:
         """Return the paths that match a glob pattern."""
-        return self.s3fs.glob(pattern)
+        return self.filesystem.glob(pattern)
 
     def isdir(self, path: PathType) -> bool:
         """Returns whether the given path points to a directory."""
-        return self.s3fs.isdir(path)
+        return self.filesystem.isdir(path)
 
     def listdir(self, path: PathType) -> List[PathType]:
         """Returns a list of files under a given directory in the filesystem."""
-        return self.s3fs.ls(path)
+        return self.filesystem.ls(path)
 
     def makedirs(self, path: PathType) -> None:
-        """Make a directory at the given path, recursively creating parents."""
-        self.s3fs.mkdir(path, createParents = False)
+        """Make a directory at the given path, recursively creating parents.
+
+        S3 has no real directories, so this never has to create one object per
+        path component.
+        """
+        self.filesystem.makedirs(path, exist_ok=True)
 
     def mkdir(self, path: PathType) -> None:
         """Make a directory at the given path; parent directory must exist."""
-        self.s3fs.mkdir(path)
+        self.filesystem.mkdir(path)
 
     def remove(self, path: PathType) -> None:
         """Remove the file at the given path. Dangerous operation."""
-        self.s3fs.rm(path)
+        self.filesystem.rm(path)
 
     def rename(self, src: PathType, dst: PathType, overwrite: bool = False) -> None:
         """Rename source file to destination file.
@@ -79,15 +135,15 @@ class AWSArtifactStore(BaseArtifactStore):
                 f"Destination path {str(dst)} already exists and argument "
                 f"`overwrite` is false."
             )
-        self.s3fs.rename(src, dst)
+        self.filesystem.rename(src, dst)
 
     def rmtree(self, path: PathType) -> None:
         """Deletes dir recursively. Dangerous operation."""
-        self.s3fs.rm(path)
+        self.remove_many(self.list_prefix(path))
 
     def stat(self, path: PathType) -> Any:
         """Return the stat descriptor for a given file path."""
-        return self.s3fs.info(path)
+        return self.filesystem.info(path)
 
     def walk(
         self, 
@@ -106,10 +162,56 @@ class AWSArtifactStore(BaseArtifactStore):
             current directory and a list of files inside the current
             directory.
         """
-        iter = self.s3fs.walk(top)	
-        if topdown:
-            return iter
-        else:
-            return reversed(list(iter))
+        files = self.filesystem.find(top)
+        return _walk_from_listing(
+            top,
+            [_qualify_path(top, f) for f in files],
+            topdown=topdown,
+        )
+
+    def list_prefix(self, prefix: PathType) -> Dict[str, int]:
+        """Lists all files below a prefix together with their sizes.
+
+        Uses a single paginated `ListObjectsV2` listing instead of one request
+        per directory and file.
+
+        Args:
+            prefix: Path of the directory to list recursively.
 
- 
+        Returns:
+            Dictionary mapping the full path of every file below `prefix` to
+            its size in bytes.
+        """
+        listing = self.filesystem.find(prefix, detail=True)
+        return {
+            _qualify_path(prefix, path): int(info.get("size") or 0)
+            for path, info in listing.items()
+            if info.get("type") != "directory"
+        }
+
+    def stat_many(self, paths: Iterable[PathType]) -> Dict[str, Any]:
+        """Returns the stat descriptors for multiple file paths.
+
+        Prefixes with many requested files are listed once instead of
+        issuing one metadata request per file. Files in other prefixes are
+        looked up one by one, so a large prefix isn't listed to stat a few
+        of its files.
+
+        Args:
+            paths: The file paths to stat.
+
+        Returns:
+            Dictionary mapping each existing path to its stat descriptor.
+            Paths that do not exist are left out.
+        """
+        return _stat_object_files(self.filesystem, "s3://", paths)
+
+    def remove_many(self, paths: Iterable[PathType]) -> None:
+        """Removes multiple files using the S3 batch `DeleteObjects` API.
+
+        Args:
+            paths: The file paths to remove.
+        """
+        path_list = [_qualify_path("s3://", path) for path in paths]
+        if path_list:
+            self.filesystem.rm(path_list)
@@ -4,6 +4,7 @@ from typing import (
     Any,
     Callable,
     ClassVar,
+    Dict,
     Iterable,
     List,
     Optional,
@@ -14,7 +15,14 @@ from typing import (
 from adlfs import AzureBlobFileSystem
 from azure.identity.aio import DefaultAzureCredential
 
-from coalescenceml.artifact_store.base_artifact_store import BaseArtifactStore, PathType
+from coalescenceml.artifact_store.base_artifact_store import (
+    BaseArtifactStore,
+    PathType,
+    _qualify_path,
+    _stat_object_files,
+    _walk_from_listing,
+)
+from coalescenceml.artifact_store.filesystem_pool import FilesystemPool
 from coalescenceml.integrations.constants import AZURE
 from coalescenceml.stack.stack_component_class_registry import (
     register_stack_component_class
@@ -26,17 +34,31 @@ class AzureArtifactStore(BaseArtifactStore):
     """ Artifact Store for Azure Datalake artifacts""" 
 
     account_name: str
-    _abfs: Optional[AzureBlobFileSystem] = None
+    max_connections: int = 10
 
     FLAVOR: ClassVar[str] = AZURE
     SUPPORTED_SCHEMES: ClassVar[Set[str]] = {"az://", "abfs://"}
-    
-    @property 
-    def filesystem(self):
-        if not self._abfs:
-            creds = DefaultAzureCredential()
-            self._abfs = AzureBlobFileSystem(account_name=self.account_name, credential = creds, anon = False)
-        return self._abfs
+
+    @property
+    def filesystem(self) -> AzureBlobFileSystem:
+        """The process-wide pooled filesystem client for this account.
+
+        The credential is pooled as well, so the token is only acquired once
+        per process instead of once per artifact store instance.
+        """
+        pool = FilesystemPool()
+        credential = pool.get(
+            (self.FLAVOR, "credential"), DefaultAzureCredential
+        )
+        return pool.get(
+            (self.FLAVOR, self.account_name, self.max_connections),
+            lambda: AzureBlobFileSystem(
+                account_name=self.account_name,
+                credential=credential,
+                anon=False,
+                max_concurrency=self.max_connections,
+            ),
+        )
 
     def open(self, name: PathType, mode: str = "rb") -> Any:
         """ Open a file at""" 
@@ -84,14 +106,62 @@ class AzureArtifactStore(BaseArtifactStore):
 
 
     def rmtree(self, path: PathType) -> None:
-        return self.filesystem.rm(path)
+        return self.remove_many(self.list_prefix(path))
 
     def stat(self, path: PathType) -> Any:
         return self.filesystem.info(path)
 
     def walk(self, top: PathType, topdown: bool = True, onerror: Optional[Callable[..., None]] = None) -> Iterable[Tuple[PathType, List[PathType], List[PathType]]]:
-        it = self.filesystem.walk(top)
-        if topdown:
-            it = list(it)
-        else: 
-            it = reversed(list(it))
+        files = self.filesystem.find(top)
+        return _walk_from_listing(
+            top,
+            [_qualify_path(top, f) for f in files],
+            topdown=topdown,
+        )
+
+    def list_prefix(self, prefix: PathType) -> Dict[str, int]:
+        """Lists all files below a prefix together with their sizes.
+
+        Uses a single paginated blob listing instead of one request per
+        directory and file.
+
+        Args:
+            prefix: Path of the directory to list recursively.
+
+        Returns:
+            Dictionary mapping the full path of every file below `prefix` to
+            its size in bytes.
+        """
+        listing = self.filesystem.find(prefix, detail=True)
+        return {
+            _qualify_path(prefix, path): int(info.get("size") or 0)
+            for path, info in listing.items()
+            if info.get("type") != "directory"
+        }
+
+    def stat_many(self, paths: Iterable[PathType]) -> Dict[str, Any]:
+        """Returns the stat descriptors for multiple file paths.
+
+        Prefixes with many requested files are listed once instead of
+        issuing one metadata request per file. Files in other prefixes are
+        looked up one by one, so a large prefix isn't listed to stat a few
+        of its files.
+
+        Args:
+            paths: The file paths to stat.
+
+        Returns:
+            Dictionary mapping each existing path to its stat descriptor.
+            Paths that do not exist are left out.
+        """
+        return _stat_object_files(self.filesystem, "az://", paths)
+
+    def remove_many(self, paths: Iterable[PathType]) -> None:
+        """Removes multiple blobs using the batch delete API.
+
+        Args:
+            paths: The file paths to remove.
+        """
+        path_list = [_qualify_path("az://", path) for path in paths]
+        if path_list:
+            self.filesystem.rm(path_list)
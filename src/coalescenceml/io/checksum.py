@@ -0,0 +1,260 @@
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from tfx.dsl.io.filesystem import PathType
+
+from coalescenceml.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+CHECKSUM_ALGORITHM = "sha256"
+READ_CHUNK_SIZE = 1024 * 1024
+
+_active_recorders = threading.local()
+
+
+def _to_str(path: PathType) -> str:
+    """Converts a PathType to a str using UTF-8."""
+    return path.decode("utf-8") if isinstance(path, bytes) else path
+
+
+class _HashingFile:
+    """File wrapper which hashes all data while it gets written.
+
+    Everything except `write` is forwarded to the wrapped file. Seeking or
+    truncating invalidates the checksum as the written stream no longer
+    matches the file contents.
+    """
+
+    def __init__(self, file: Any):
+        """Initializes the wrapper.
+
+        Args:
+            file: The file object to wrap.
+        """
+        self._file = file
+        self._hasher = hashlib.new(CHECKSUM_ALGORITHM)
+        self.bytes_written = 0
+        self.is_valid = True
+
+    @property
+    def hexdigest(self) -> str:
+        """Returns the checksum of all data written so far."""
+        return self._hasher.hexdigest()
+
+    def write(self, data: Any) -> Any:
+        """Hashes the data and writes it to the wrapped file."""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        self._hasher.update(raw)
+        self.bytes_written += memoryview(raw).nbytes
+        return self._file.write(data)
+
+    def seek(self, *args: Any, **kwargs: Any) -> Any:
+        """Seeks in the wrapped file and invalidates the checksum."""
+        self.is_valid = False
+        return self._file.seek(*args, **kwargs)
+
+    def truncate(self, *args: Any, **kwargs: Any) -> Any:
+        """Truncates the wrapped file and invalidates the checksum."""
+        self.is_valid = False
+        return self._file.truncate(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        """Forwards all other attributes to the wrapped file."""
+        return getattr(self._file, name)
+
+    def __enter__(self) -> "_HashingFile":
+        """Enters the context of the wrapped file."""
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *args: Any) -> Any:
+        """Exits the context of the wrapped file."""
+        return self._file.__exit__(*args)
+
+
+class ChecksumRecorder:
+    """Records streaming checksums of all files written through `fileio`
+    while the recorder is active.
+
+    Example:
+        with ChecksumRecorder() as recorder:
+            producer.handle_return(data)
+        checksum = recorder.get_artifact_checksum(artifact.uri)
+    """
+
+    def __init__(self) -> None:
+        """Initializes a recorder without any recorded files."""
+        self._files: Dict[str, _HashingFile] = {}
+        self._invalid_paths: List[str] = []
+
+    @staticmethod
+    def get_active() -> Optional["ChecksumRecorder"]:
+        """Returns the innermost active recorder of the current thread."""
+        stack = getattr(_active_recorders, "stack", None)
+        return stack[-1] if stack else None
+
+    def wrap(self, path: PathType, file: Any, mode: str) -> Any:
+        """Wraps a file opened for writing so that its contents get hashed.
+
+        Args:
+            path: Path of the opened file.
+            file: The opened file object.
+            mode: The mode in which the file was opened.
+
+        Returns:
+            The wrapped file object.
+        """
+        path_str = _to_str(path)
+        if "a" in mode or "+" in mode:
+            # We can't know the previous contents of the file
+            self._invalid_paths.append(path_str)
+            return file
+        hashing_file = _HashingFile(file)
+        self._files[path_str] = hashing_file
+        return hashing_file
+
+    @property
+    def file_checksums(self) -> Dict[str, str]:
+        """Returns the checksums of all validly recorded files."""
+        return {
+            path: file.hexdigest
+            for path, file in self._files.items()
+            if file.is_valid and path not in self._invalid_paths
+        }
+
+    @property
+    def file_sizes(self) -> Dict[str, int]:
+        """Returns the number of bytes written to each recorded file."""
+        return {path: file.bytes_written for path, file in self._files.items()}
+
+    def get_artifact_checksum(
+        self, uri: str, stored_files: Optional[Iterable[str]] = None
+    ) -> Optional[str]:
+        """Returns the checksum of all files written below an artifact URI.
+
+        The checksum is only returned if every file inside the artifact was
+        written through `fileio` while this recorder was active. This check
+        costs one listing of the artifact URI but no additional pass over
+        the data.
+
+        Args:
+            uri: The artifact URI.
+            stored_files: Optional paths of all files below `uri`. If not
+                given, the artifact URI gets listed.
+
+        Returns:
+            The artifact checksum or `None` if it could not be computed.
+        """
+        from coalescenceml.io import fileio
+
+        prefix = uri.rstrip("/") + "/"
+        recorded = {
+            path: digest
+            for path, digest in self.file_checksums.items()
+            if path.startswith(prefix)
+        }
+        if stored_files is None:
+            stored_files = fileio.list_prefix(uri)
+        if not recorded or set(stored_files) != set(recorded):
+            logger.debug(
+                "Not all files of artifact '%s' were written through fileio, "
+                "skipping checksum.",
+                uri,
+            )
+            return None
+        return combine_checksums(uri, recorded)
+
+    def __enter__(self) -> "ChecksumRecorder":
+        """Activates the recorder for the current thread."""
+        if not hasattr(_active_recorders, "stack"):
+            _active_recorders.stack = []
+        _active_recorders.stack.append(self)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Deactivates the recorder for the current thread."""
+        _active_recorders.stack.remove(self)
+
+
+def combine_checksums(uri: str, file_checksums: Dict[str, str]) -> str:
+    """Combines the checksums of all files of an artifact into one.
+
+    Args:
+        uri: The artifact URI.
+        file_checksums: Mapping of file paths below `uri` to their checksums.
+
+    Returns:
+        The artifact checksum, prefixed with the name of the hash algorithm.
+    """
+    prefix_length = len(uri.rstrip("/")) + 1
+    hasher = hashlib.new(CHECKSUM_ALGORITHM)
+    for path in sorted(file_checksums):
+        hasher.update(
+            f"{path[prefix_length:]}\0{file_checksums[path]}\n".encode()
+        )
+    return f"{CHECKSUM_ALGORITHM}:{hasher.hexdigest()}"
+
+
+def calculate_file_checksum(path: PathType) -> str:
+    """Calculates the checksum of a single file by streaming its contents.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        The hex digest of the file contents.
+    """
+    from coalescenceml.io import fileio
+
+    hasher = hashlib.new(CHECKSUM_ALGORITHM)
+    with fileio.open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def calculate_artifact_checksum(
+    uri: str, paths: Optional[Iterable[str]] = None
+) -> str:
+    """Calculates the checksum of an artifact by reading all its files.
+
+    Args:
+        uri: The artifact URI.
+        paths: Optional paths of all files below `uri`. If not given, the
+            artifact URI gets listed.
+
+    Returns:
+        The artifact checksum, prefixed with the name of the hash algorithm.
+    """
+    from coalescenceml.io import fileio
+
+    if paths is None:
+        paths = fileio.list_prefix(uri)
+    return combine_checksums(
+        uri, {path: calculate_file_checksum(path) for path in paths}
+    )
+
+
+def verify_artifact_checksum(uri: str, expected_checksum: str) -> bool:
+    """Verifies that the files of an artifact match the recorded checksum.
+
+    Args:
+        uri: The artifact URI.
+        expected_checksum: The checksum recorded when writing the artifact.
+
+    Returns:
+        `True` if the checksums match, `False` otherwise.
+    """
+    algorithm = expected_checksum.split(":", 1)[0]
+    if algorithm != CHECKSUM_ALGORITHM:
+        logger.warning(
+            "Unable to verify checksum of artifact '%s' which was computed "
+            "with unsupported algorithm '%s'.",
+            uri,
+            algorithm,
+        )
+        return True
+    return calculate_artifact_checksum(uri) == expected_checksum
@@ -0,0 +1,115 @@
+import functools
+import threading
+from typing import Any, Iterator, List, NamedTuple
+
+
+_lock = threading.Lock()
+_bytes_read = 0
+_bytes_written = 0
+
+
+class IOCounters(NamedTuple):
+    """Number of bytes transferred through `fileio` by this process."""
+
+    bytes_read: int
+    bytes_written: int
+
+
+def get_io_counters() -> IOCounters:
+    """Returns the number of bytes read and written through `fileio` since
+    the process started.
+
+    The counters are global to the process, so the bytes transferred during
+    an operation are the difference of the counters before and after it.
+    """
+    with _lock:
+        return IOCounters(_bytes_read, _bytes_written)
+
+
+def _count(bytes_read: int = 0, bytes_written: int = 0) -> None:
+    """Adds transferred bytes to the process counters."""
+    global _bytes_read, _bytes_written
+    with _lock:
+        _bytes_read += bytes_read
+        _bytes_written += bytes_written
+
+
+def _size(data: Any) -> int:
+    """Returns the size of data read from or written to a file in bytes."""
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    return memoryview(data).nbytes
+
+
+class CountingFile:
+    """File wrapper which counts the bytes read from and written to it.
+
+    Everything except reading and writing is forwarded to the wrapped file.
+    Optional read methods like `readinto` are only exposed if the wrapped
+    file has them, as callers like `pickle` check for their existence.
+    """
+
+    def __init__(self, file: Any):
+        """Initializes the wrapper.
+
+        Args:
+            file: The file object to wrap.
+        """
+        self._file = file
+
+    def read(self, *args: Any, **kwargs: Any) -> Any:
+        """Reads from the wrapped file."""
+        data = self._file.read(*args, **kwargs)
+        _count(bytes_read=_size(data))
+        return data
+
+    def write(self, data: Any) -> Any:
+        """Writes data to the wrapped file."""
+        _count(bytes_written=_size(data))
+        return self._file.write(data)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterates over the lines of the wrapped file."""
+        for line in self._file:
+            _count(bytes_read=_size(line))
+            yield line
+
+    def _readline(self, readline: Any, *args: Any, **kwargs: Any) -> Any:
+        """Reads a line from the wrapped file."""
+        line = readline(*args, **kwargs)
+        _count(bytes_read=_size(line))
+        return line
+
+    def _readlines(
+        self, readlines: Any, *args: Any, **kwargs: Any
+    ) -> List[Any]:
+        """Reads all lines from the wrapped file."""
+        lines = readlines(*args, **kwargs)
+        _count(bytes_read=sum(_size(line) for line in lines))
+        return lines  # type: ignore[no-any-return]
+
+    def _readinto(self, readinto: Any, buffer: Any) -> Any:
+        """Reads from the wrapped file into a buffer."""
+        size = readinto(buffer)
+        _count(bytes_read=size or 0)
+        return size
+
+    def __getattr__(self, name: str) -> Any:
+        """Forwards all other attributes to the wrapped file.
+
+        Raises:
+            AttributeError: If the wrapped file has no such attribute.
+        """
+        attribute = getattr(self._file, name)
+        if name in ("readline", "readlines", "readinto"):
+            return functools.partial(getattr(self, f"_{name}"), attribute)
+        return attribute
+
+    def __enter__(self) -> "CountingFile":
+        """Enters the context of the wrapped file."""
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *args: Any) -> Any:
+        """Exits the context of the wrapped file."""
+        return self._file.__exit__(*args)
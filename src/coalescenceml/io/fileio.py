@@ -339,6 +339,12 @@
 #     """
 #     return Path(dir_path).parent.stem
 
+import os
+from typing import Any, Dict, Iterable
+
+from tfx.dsl.io import fileio as tfx_fileio
+from tfx.dsl.io.filesystem import PathType
+from tfx.dsl.io.filesystem_registry import DEFAULT_FILESYSTEM_REGISTRY
 from tfx.dsl.io.fileio import (  # noqa
     copy,
     exists,
@@ -347,7 +353,6 @@ from tfx.dsl.io.fileio import (  # noqa
     listdir,
     makedirs,
     mkdir,
-    open,
     remove,
     rename,
     rmtree,
@@ -355,19 +360,144 @@ from tfx.dsl.io.fileio import (  # noqa
     walk,
 )
 
+from coalescenceml.io.checksum import ChecksumRecorder
+from coalescenceml.io.counters import CountingFile, get_io_counters
+
+
+def _to_str(path: PathType) -> str:
+    """Converts a PathType to a str using UTF-8."""
+    return path.decode("utf-8") if isinstance(path, bytes) else path
+
+
+def open(path: PathType, mode: str = "r") -> Any:
+    """Opens a file.
+
+    While a `ChecksumRecorder` is active, files opened for writing are
+    wrapped so that a checksum of their contents gets computed while the
+    data is streamed to the filesystem. All files count the bytes read from
+    and written to them, see `get_io_counters`.
+
+    Args:
+        path: Path of the file to open.
+        mode: The mode in which the file should be opened.
+
+    Returns:
+        The opened file object.
+    """
+    file = tfx_fileio.open(path, mode=mode)
+    recorder = ChecksumRecorder.get_active()
+    if recorder is not None and any(c in mode for c in "wax"):
+        file = recorder.wrap(path, file, mode)
+    return CountingFile(file)
+
+
+def list_prefix(prefix: PathType) -> Dict[str, int]:
+    """Lists all files below a prefix together with their sizes.
+
+    If the filesystem registered for the path is backed by an artifact store,
+    the store's bulk listing is used (a single paginated request for object
+    stores). Otherwise the directory tree is walked.
+
+    Args:
+        prefix: Path of the directory to list recursively.
+
+    Returns:
+        Dictionary mapping the full path of every file below `prefix` to its
+        size in bytes.
+    """
+    filesystem = DEFAULT_FILESYSTEM_REGISTRY.get_filesystem_for_path(prefix)
+    if hasattr(filesystem, "list_prefix"):
+        return filesystem.list_prefix(prefix)  # type: ignore[no-any-return]
+
+    sizes: Dict[str, int] = {}
+    if not isdir(prefix):
+        return sizes
+    for root, _, files in walk(prefix):
+        for file_name in files:
+            file_path = os.path.join(_to_str(root), _to_str(file_name))
+            sizes[file_path] = int(stat(file_path).st_size)
+    return sizes
+
+
+def stat_many(paths: Iterable[PathType]) -> Dict[str, Any]:
+    """Returns the stat descriptors for multiple file paths.
+
+    Args:
+        paths: The file paths to stat. All paths must live on the same
+            filesystem.
+
+    Returns:
+        Dictionary mapping each existing path to its stat descriptor. Paths
+        that do not exist are left out.
+    """
+    path_list = list(paths)
+    if not path_list:
+        return {}
+    filesystem = DEFAULT_FILESYSTEM_REGISTRY.get_filesystem_for_path(
+        path_list[0]
+    )
+    if hasattr(filesystem, "stat_many"):
+        return filesystem.stat_many(path_list)  # type: ignore[no-any-return]
+
+    return {_to_str(path): stat(path) for path in path_list if exists(path)}
+
+
+def remove_many(paths: Iterable[PathType]) -> None:
+    """Removes multiple files, using batch deletes where available.
+
+    Args:
+        paths: The file paths to remove. All paths must live on the same
+            filesystem.
+
+    Warning:
+        Dangerous operation! Do at your own peril...
+    """
+    path_list = list(paths)
+    if not path_list:
+        return
+    filesystem = DEFAULT_FILESYSTEM_REGISTRY.get_filesystem_for_path(
+        path_list[0]
+    )
+    if hasattr(filesystem, "remove_many"):
+        filesystem.remove_many(path_list)
+        return
+
+    for path in path_list:
+        remove(path)
+
+
+def finalize_artifact(uri: PathType, artifact_type: str) -> None:
+    """Signals that all files of an artifact have been written.
+
+    Filesystems backed by an artifact store forward this to the store's
+    `finalize_artifact` hook, all other filesystems ignore it.
+
+    Args:
+        uri: The URI of the artifact.
+        artifact_type: The type name of the artifact.
+    """
+    filesystem = DEFAULT_FILESYSTEM_REGISTRY.get_filesystem_for_path(uri)
+    if hasattr(filesystem, "finalize_artifact"):
+        filesystem.finalize_artifact(uri, artifact_type)
+
 
 __all__ = [
     "copy",
     "exists",
+    "finalize_artifact",
+    "get_io_counters",
     "glob",
     "isdir",
     "listdir",
+    "list_prefix",
     "makedirs",
     "mkdir",
     "open",
     "remove",
+    "remove_many",
     "rename",
     "rmtree",
     "stat",
+    "stat_many",
     "walk",
 ]
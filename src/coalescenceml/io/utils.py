@@ -86,7 +86,7 @@
 import fnmatch
 import os
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Set
 
 import click
 from tfx.dsl.io.filesystem import PathType
@@ -100,11 +100,10 @@ from coalescenceml.io.fileio import (
     copy,
     exists,
     isdir,
-    listdir,
+    list_prefix,
     makedirs,
     mkdir,
     open,
-    walk,
 )
 
 
@@ -144,13 +143,10 @@ def find_files(dir_path: PathType, pattern: str) -> Iterable[str]:
     Yields:
          All matching filenames if found.
     """
-    for root, dirs, files in walk(dir_path):
-        for basename in files:
-            if fnmatch.fnmatch(convert_to_str(basename), pattern):
-                filename = os.path.join(
-                    convert_to_str(root), convert_to_str(basename)
-                )
-                yield filename
+    # A single recursive listing instead of one request per directory
+    for filename in sorted(list_prefix(dir_path)):
+        if fnmatch.fnmatch(os.path.basename(filename), pattern):
+            yield filename
 
 
 def is_remote(path: str) -> bool:
@@ -217,22 +213,23 @@ def copy_dir(
         destination_dir: Path to copy to.
         overwrite: Boolean. If false, function throws an error before overwrite.
     """
-    for source_file in listdir(source_dir):
-        source_path = os.path.join(source_dir, convert_to_str(source_file))
-        destination_path = os.path.join(
-            destination_dir, convert_to_str(source_file)
-        )
-        if isdir(source_path):
-            if source_path == destination_dir:
-                # if the destination is a subdirectory of the source, we skip
-                # copying it to avoid an infinite loop.
-                return
-            copy_dir(source_path, destination_path, overwrite)
-        else:
-            create_dir_recursive_if_not_exists(
-                str(Path(destination_path).parent)
-            )
-            copy(str(source_path), str(destination_path), overwrite)
+    source_root = convert_to_str(source_dir).rstrip("/")
+    destination_root = convert_to_str(destination_dir).rstrip("/")
+    created_dirs: Set[str] = set()
+    for source_path in sorted(list_prefix(source_root)):
+        if destination_root != source_root and source_path.startswith(
+            destination_root + "/"
+        ):
+            # if the destination is a subdirectory of the source, we skip
+            # copying it to avoid an infinite loop.
+            continue
+        relative_path = source_path[len(source_root) + 1 :]
+        destination_path = os.path.join(destination_root, relative_path)
+        destination_parent = str(Path(destination_path).parent)
+        if destination_parent not in created_dirs:
+            create_dir_recursive_if_not_exists(destination_parent)
+            created_dirs.add(destination_parent)
+        copy(source_path, destination_path, overwrite)
 
 
 def get_grandparent(dir_path: str) -> str:
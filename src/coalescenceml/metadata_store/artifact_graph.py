@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import TYPE_CHECKING, DefaultDict, Dict, List, Optional, Set, Tuple
+
+from ml_metadata import proto
+
+from coalescenceml.artifacts.constants import (
+    CHECKSUM_PROPERTY_KEY,
+    DATATYPE_PROPERTY_KEY,
+    PRODUCER_PROPERTY_KEY,
+    SIZE_PROPERTY_KEY,
+)
+from coalescenceml.logger import get_logger
+from coalescenceml.post_execution import ArtifactView
+
+
+if TYPE_CHECKING:
+    from coalescenceml.metadata_store import BaseMetadataStore
+
+logger = get_logger(__name__)
+
+StepArtifacts = Tuple[Dict[str, ArtifactView], Dict[str, ArtifactView]]
+
+
+class ArtifactGraph:
+    """Artifact lineage of a set of executions, usually all steps of a
+    pipeline run.
+
+    The events of all executions and of all artifacts they touched are
+    loaded with one bulk query each when the graph is created. Artifacts
+    and artifact types are loaded with one bulk query each the first time
+    the inputs or outputs of any step are requested. Afterwards parents,
+    inputs, outputs and producers of every step are answered from memory.
+    """
+
+    def __init__(
+        self, metadata_store: BaseMetadataStore, execution_ids: List[int]
+    ):
+        """Loads the events of the given executions and their artifacts.
+
+        Args:
+            metadata_store: The metadata store to load the lineage from.
+            execution_ids: IDs of the executions to include.
+        """
+        self._metadata_store = metadata_store
+        store = metadata_store.read_store
+
+        self._events_by_execution: DefaultDict[
+            int, List[proto.Event]
+        ] = defaultdict(list)
+        for event in store.get_events_by_execution_ids(execution_ids):
+            self._events_by_execution[event.execution_id].append(event)
+
+        self._artifact_ids = sorted(
+            {
+                event.artifact_id
+                for events in self._events_by_execution.values()
+                for event in events
+            }
+        )
+        output_events: DefaultDict[int, List[proto.Event]] = defaultdict(list)
+        if self._artifact_ids:
+            for event in store.get_events_by_artifact_ids(self._artifact_ids):
+                if event.type == event.OUTPUT:
+                    output_events[event.artifact_id].append(event)
+
+        # the execution that originally produced each artifact, later
+        # executions with an output event reused it from the cache
+        self._original_producers: Dict[int, int] = {
+            artifact_id: min(event.execution_id for event in events)
+            for artifact_id, events in output_events.items()
+        }
+
+        # the execution whose output was consumed by each input event
+        self._input_producers: Dict[Tuple[int, int], int] = {}
+        self._parents: DefaultDict[int, Set[int]] = defaultdict(set)
+        for execution_id, events in self._events_by_execution.items():
+            for event in events:
+                if event.type != event.INPUT:
+                    continue
+                # should NOT be the same execution and it should be BEFORE
+                # the time of the current event.
+                candidates = [
+                    e
+                    for e in output_events[event.artifact_id]
+                    if e.execution_id != execution_id
+                    and e.milliseconds_since_epoch
+                    < event.milliseconds_since_epoch
+                ]
+                if not candidates:
+                    continue
+                # take the latest one
+                producer = max(
+                    candidates, key=lambda e: e.milliseconds_since_epoch
+                )
+                self._input_producers[
+                    (execution_id, event.artifact_id)
+                ] = producer.execution_id
+                self._parents[execution_id].add(producer.execution_id)
+
+        self._artifacts: Optional[Dict[int, proto.Artifact]] = None
+        self._artifact_types: Dict[int, str] = {}
+        self._step_artifacts: Dict[int, StepArtifacts] = {}
+
+    def get_parent_step_ids(self, execution_id: int) -> List[int]:
+        """Returns the IDs of the executions whose outputs were consumed by
+        the given execution."""
+        return sorted(self._parents[execution_id])
+
+    def get_producer_step_id(self, artifact_id: int) -> Optional[int]:
+        """Returns the ID of the execution that originally produced an
+        artifact, or `None` if the artifact is not part of this graph."""
+        return self._original_producers.get(artifact_id)
+
+    def _ensure_artifacts_fetched(self) -> None:
+        """Fetches all artifacts of the graph and the artifact types."""
+        if self._artifacts is not None:
+            return
+
+        if not self._artifact_ids:
+            self._artifacts = {}
+            return
+
+        store = self._metadata_store.read_store
+        self._artifacts = {
+            artifact.id: artifact
+            for artifact in store.get_artifacts_by_id(self._artifact_ids)
+        }
+        self._artifact_types = {
+            type_.id: type_.name
+            for type_ in store.get_artifact_types_by_id(
+                sorted({a.type_id for a in self._artifacts.values()})
+            )
+        }
+
+    def get_step_artifacts(self, execution_id: int) -> StepArtifacts:
+        """Returns input and output artifacts of a step.
+
+        Args:
+            execution_id: The execution ID of the step.
+
+        Returns:
+            A tuple (inputs, outputs) where inputs and outputs are both Dicts
+            mapping artifact names to the input and output artifacts
+            respectively.
+        """
+        if execution_id in self._step_artifacts:
+            return self._step_artifacts[execution_id]
+
+        self._ensure_artifacts_fetched()
+        assert self._artifacts is not None
+
+        inputs: Dict[str, ArtifactView] = {}
+        outputs: Dict[str, ArtifactView] = {}
+        events = sorted(
+            self._events_by_execution[execution_id],
+            key=lambda event: event.artifact_id,
+        )
+        for event_proto in events:
+            artifact_proto = self._artifacts[event_proto.artifact_id]
+            artifact_name = event_proto.path.steps[0].key
+
+            checksum = None
+            if CHECKSUM_PROPERTY_KEY in artifact_proto.properties:
+                checksum = artifact_proto.properties[
+                    CHECKSUM_PROPERTY_KEY
+                ].string_value
+            size = None
+            if SIZE_PROPERTY_KEY in artifact_proto.properties:
+                size = artifact_proto.properties[SIZE_PROPERTY_KEY].int_value
+
+            parent_step_id = execution_id
+            if event_proto.type == event_proto.INPUT:
+                # input artifacts belong to the parent step that produced
+                # them in this run
+                parent_step_id = self._input_producers.get(
+                    (execution_id, artifact_proto.id), execution_id
+                )
+
+            artifact = ArtifactView(
+                id_=artifact_proto.id,
+                type_=self._artifact_types[artifact_proto.type_id],
+                uri=artifact_proto.uri,
+                producer=artifact_proto.properties[
+                    PRODUCER_PROPERTY_KEY
+                ].string_value,
+                data_type=artifact_proto.properties[
+                    DATATYPE_PROPERTY_KEY
+                ].string_value,
+                metadata_store=self._metadata_store,
+                parent_step_id=parent_step_id,
+                checksum=checksum,
+                producer_step_id=self.get_producer_step_id(artifact_proto.id),
+                size=size,
+            )
+
+            if event_proto.type == event_proto.INPUT:
+                inputs[artifact_name] = artifact
+            elif event_proto.type == event_proto.OUTPUT:
+                outputs[artifact_name] = artifact
+
+        self._step_artifacts[execution_id] = (inputs, outputs)
+        return inputs, outputs
@@ -1,10 +1,26 @@
+import hashlib
+import itertools
 import json
+import os
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from datetime import datetime
 from json import JSONDecodeError
-from typing import ClassVar, Dict, List, Optional, Tuple, Union
+from typing import (
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
-from ml_metadata import proto
+from ml_metadata import errors, proto
 from ml_metadata.metadata_store import metadata_store
 from ml_metadata.proto import metadata_store_pb2
 from tfx.dsl.compiler.constants import (
@@ -12,12 +28,34 @@ from tfx.dsl.compiler.constants import (
     PIPELINE_RUN_CONTEXT_TYPE_NAME,
 )
 
-from coalescenceml.artifacts.constants import (
-    DATATYPE_PROPERTY_KEY,
-    PRODUCER_PROPERTY_KEY,
-)
+from coalescenceml.artifacts.constants import TAGS_PROPERTY_KEY
 from coalescenceml.enums import ExecutionStatus, StackComponentFlavor
 from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.artifact_graph import ArtifactGraph
+from coalescenceml.metadata_store.constants import (
+    FINISHED_RUN_PROPERTY_KEY,
+    PINNED_RUN_PROPERTY_KEY,
+    RUN_INDEX_PROPERTY_KEY,
+)
+from coalescenceml.metadata_store.lineage import (
+    ARTIFACT_NODE,
+    BOTH,
+    EXECUTION_NODE,
+    LineageGraph,
+    LineageIndex,
+    load_lineage,
+)
+from coalescenceml.metadata_store.metadata_cache import (
+    CacheStats,
+    MetadataCache,
+)
+from coalescenceml.metadata_store.snapshot import MetadataSnapshot
+from coalescenceml.metadata_store.step_metrics import StepMetrics
+from coalescenceml.metadata_store.storage_usage import (
+    GROUP_BY_PIPELINE,
+    StorageUsage,
+    get_storage_usage,
+)
 from coalescenceml.post_execution import (
     ArtifactView,
     PipelineRunView,
@@ -33,6 +71,49 @@ from coalescenceml.step.utils import (
 
 logger = get_logger(__name__)
 
+RUN_QUERY_PAGE_SIZE = 100
+
+
+def _to_milliseconds(time: Optional[datetime]) -> Optional[int]:
+    """Converts a datetime to milliseconds since epoch."""
+    if time is None:
+        return None
+    return int(time.timestamp() * 1000)
+
+
+def get_execution_status_from_proto(
+    execution: proto.Execution,
+) -> ExecutionStatus:
+    """Converts the state of an MLMD execution to an execution status."""
+    state = execution.last_known_state
+
+    if state == execution.COMPLETE:
+        return ExecutionStatus.COMPLETED
+    elif state == execution.RUNNING:
+        return ExecutionStatus.RUNNING
+    elif state == execution.CACHED:
+        return ExecutionStatus.CACHED
+    else:
+        return ExecutionStatus.FAILED
+
+
+def get_run_status_from_executions(
+    executions: Iterable[proto.Execution],
+) -> ExecutionStatus:
+    """Computes the status of a pipeline run from its executions."""
+    statuses = [
+        get_execution_status_from_proto(execution) for execution in executions
+    ]
+    if any(status == ExecutionStatus.FAILED for status in statuses):
+        return ExecutionStatus.FAILED
+    elif all(
+        status == ExecutionStatus.COMPLETED or status == ExecutionStatus.CACHED
+        for status in statuses
+    ):
+        return ExecutionStatus.COMPLETED
+    else:
+        return ExecutionStatus.RUNNING
+
 
 class BaseMetadataStore(StackComponent, ABC):
     """Base class for all CoalescenceML metadata stores."""
@@ -42,28 +123,202 @@ class BaseMetadataStore(StackComponent, ABC):
     FLAVOR: ClassVar[str]
 
     upgrade_migration_enabled: bool = True
-    _tfx_config: Optional[Union[
-        metadata_store_pb2.ConnectionConfig,
-        metadata_store_pb2.MetadataStoreClientConfig,
-    ]] = None
+    cache_enabled: bool = False
+    cache_ttl: float = 5.0
+    lineage_index_path: Optional[str] = None
+    snapshot_dir: Optional[str] = None
+    _tfx_config: Optional[
+        Union[
+            metadata_store_pb2.ConnectionConfig,
+            metadata_store_pb2.MetadataStoreClientConfig,
+        ]
+    ] = None
     _mlmd_store: Optional[metadata_store.MetadataStore] = None
+    _mlmd_replica_store: Optional[metadata_store.MetadataStore] = None
+    _metadata_cache: Optional[MetadataCache] = None
+    _replica_cache: Optional[MetadataCache] = None
+    _lineage_index: Optional[LineageIndex] = None
+    _snapshot: Optional[MetadataSnapshot] = None
 
     @property
     def store(self) -> metadata_store.MetadataStore:
-        """General property that hooks into TFX metadata store."""
-        if self._mlmd_store is None: # See if it exists
-            # Otherwise create it!
-            config = self.get_tfx_metadata_config()
-            mlmd_store = metadata_store.MetadataStore(
-                config,
-                enable_upgrade_migration=self.upgrade_migration_enabled
-                and isinstance(config, metadata_store_pb2.ConnectionConfig),
+        """General property that hooks into TFX metadata store.
+
+        If `cache_enabled` is set, the store is wrapped in a `MetadataCache`
+        which memoizes types, finished executions, their events and
+        artifacts. Listings of running executions are then served from the
+        cache for up to `cache_ttl` seconds, so the cache is opt-in.
+        """
+        mlmd_store = self.mlmd_store
+        if not self.cache_enabled:
+            return mlmd_store
+
+        if self._metadata_cache is None:
+            self._metadata_cache = MetadataCache(
+                mlmd_store, ttl=self.cache_ttl, snapshot=self.snapshot
+            )
+        return cast(metadata_store.MetadataStore, self._metadata_cache)
+
+    @property
+    def read_store(self) -> metadata_store.MetadataStore:
+        """Store used by the read paths of the post-execution API.
+
+        This is the read replica if one is configured and `store` otherwise.
+        Reads which must see preceding writes of this process (e.g. by the
+        orchestrator) use `store`, as a replica might lag behind.
+        """
+        replica_store = self.mlmd_replica_store
+        if replica_store is None:
+            return self.store
+        if not self.cache_enabled:
+            return replica_store
+
+        if self._replica_cache is None:
+            self._replica_cache = MetadataCache(
+                replica_store, ttl=self.cache_ttl, snapshot=self.snapshot
             )
-            self._tfx_config = config
-            self._mlmd_store = mlmd_store
+        return cast(metadata_store.MetadataStore, self._replica_cache)
+
+    @property
+    def mlmd_store(self) -> metadata_store.MetadataStore:
+        """The connection to the MLMD store, without the metadata cache.
+
+        The connection is opened once and reused for the lifetime of this
+        metadata store.
+        """
+        if self._mlmd_store is None:  # See if it exists
+            # Otherwise create it!
+            self._mlmd_store = self._connect()
 
         return self._mlmd_store
 
+    @property
+    def mlmd_replica_store(self) -> Optional[metadata_store.MetadataStore]:
+        """The connection to the read replica of the MLMD store, without the
+        metadata cache, or `None` if no read replica is configured."""
+        if self._mlmd_replica_store is None:
+            self._mlmd_replica_store = self._connect_replica()
+
+        return self._mlmd_replica_store
+
+    def _connect(self) -> metadata_store.MetadataStore:
+        """Opens a new connection to the MLMD store.
+
+        Subclasses can override this to prepare the database or to wrap the
+        connection.
+        """
+        config = self.get_tfx_metadata_config()
+        self._tfx_config = config
+        return self._open_connection(
+            config,
+            enable_upgrade_migration=self.upgrade_migration_enabled,
+        )
+
+    def _connect_replica(self) -> Optional[metadata_store.MetadataStore]:
+        """Opens a new connection to the read replica of the MLMD store.
+
+        Returns:
+            The connection or `None` if no read replica is configured.
+        """
+        config = self.get_replica_tfx_metadata_config()
+        if config is None:
+            return None
+        # The replica gets its schema from the primary
+        return self._open_connection(config, enable_upgrade_migration=False)
+
+    @staticmethod
+    def _open_connection(
+        config: Union[
+            metadata_store_pb2.ConnectionConfig,
+            metadata_store_pb2.MetadataStoreClientConfig,
+        ],
+        enable_upgrade_migration: bool,
+    ) -> metadata_store.MetadataStore:
+        """Opens an MLMD connection with the given config."""
+        return metadata_store.MetadataStore(
+            config,
+            enable_upgrade_migration=enable_upgrade_migration
+            and isinstance(config, metadata_store_pb2.ConnectionConfig),
+        )
+
+    @property
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Hit and miss counters of the metadata cache used by the read
+        paths, `None` if the cache is disabled or wasn't used yet."""
+        metadata_cache = self._replica_cache or self._metadata_cache
+        if metadata_cache is None:
+            return None
+        return metadata_cache.stats
+
+    def clear_cache(self) -> None:
+        """Removes all entries from the metadata caches."""
+        for metadata_cache in (self._metadata_cache, self._replica_cache):
+            if metadata_cache is not None:
+                metadata_cache.clear()
+
+    @property
+    def lineage_index(self) -> Optional[LineageIndex]:
+        """Persistent adjacency index used by lineage queries, `None` if no
+        `lineage_index_path` is configured."""
+        if self.lineage_index_path is None:
+            return None
+        if self._lineage_index is None:
+            self._lineage_index = LineageIndex(self, self.lineage_index_path)
+        return self._lineage_index
+
+    @property
+    def snapshot(self) -> Optional[MetadataSnapshot]:
+        """Persistent on-disk snapshot which backs the metadata caches,
+        `None` if no `snapshot_dir` is configured or `cache_enabled` isn't
+        set.
+
+        The snapshot is stored in a file named after the UUID of this
+        metadata store and is synchronized when it's opened.
+        """
+        if self.snapshot_dir is None or not self.cache_enabled:
+            return None
+        if self._snapshot is None:
+            config = (
+                self.get_replica_tfx_metadata_config()
+                or self.get_tfx_metadata_config()
+            )
+            self._snapshot = MetadataSnapshot(
+                os.path.join(self.snapshot_dir, f"{self.uuid}.db"),
+                fingerprint=hashlib.sha256(
+                    config.SerializeToString()
+                ).hexdigest(),
+            )
+            self.sync_snapshot()
+        return self._snapshot
+
+    def sync_snapshot(self) -> int:
+        """Fetches the metadata written since the last synchronization into
+        the snapshot.
+
+        Returns:
+            The number of fetched executions and artifacts.
+        """
+        if self.snapshot is None:
+            return 0
+        store = self.mlmd_replica_store or self.mlmd_store
+        return self.snapshot.sync(store)
+
+    def get_database_url(self) -> Optional[str]:
+        """Return the SQLAlchemy URL of the database which backs the MLMD
+        store, `None` if it can't be accessed directly.
+
+        The database is only accessed directly by maintenance operations
+        which MLMD doesn't support, like deleting metadata.
+        """
+        return None
+
+    def get_replica_tfx_metadata_config(
+        self,
+    ) -> Optional[metadata_store_pb2.ConnectionConfig]:
+        """Return tfx metadata config of the read replica, `None` if the
+        metadata store has no read replica."""
+        return None
+
     @abstractmethod
     def get_tfx_metadata_config(
         self,
@@ -78,7 +333,8 @@ class BaseMetadataStore(StackComponent, ABC):
     def step_type_mapping(self) -> Dict[int, str]:
         """Maps type_id's to step names."""
         return {
-            type_.id: type_.name for type_ in self.store.get_execution_types()
+            type_.id: type_.name
+            for type_ in self.read_store.get_execution_types()
         }
 
     def _check_if_executions_belong_to_pipeline(
@@ -87,15 +343,303 @@ class BaseMetadataStore(StackComponent, ABC):
         pipeline: PipelineView,
     ) -> bool:
         """Returns `True` if the executions are associated with the pipeline
-        context."""
-        for execution in executions:
-            associated_contexts = self.store.get_contexts_by_execution(
-                execution.id
+        context.
+
+        All executions of a pipeline run belong to the same pipeline, so
+        checking a single execution is sufficient.
+        """
+        if not executions:
+            return False
+        associated_contexts = self.read_store.get_contexts_by_execution(
+            executions[0].id
+        )
+        return any(
+            context.id == pipeline._id  # noqa
+            for context in associated_contexts
+        )
+
+    def link_pipeline_run(self, pipeline_name: str, run_name: str) -> None:
+        """Adds a pipeline run to the run index of its pipeline.
+
+        The index is stored as MLMD parent context relation between the
+        pipeline context and the pipeline run context, which allows listing
+        the runs of a pipeline with a single indexed query.
+
+        Args:
+            pipeline_name: Name of the pipeline.
+            run_name: Name of the pipeline run.
+        """
+        pipeline_context = self.store.get_context_by_type_and_name(
+            PIPELINE_CONTEXT_TYPE_NAME, pipeline_name
+        )
+        run_context = self.store.get_context_by_type_and_name(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
+        )
+        if not pipeline_context or not run_context:
+            logger.debug(
+                "Unable to index pipeline run '%s' of pipeline '%s' as its "
+                "contexts do not exist.",
+                run_name,
+                pipeline_name,
+            )
+            return
+        self._put_parent_contexts(pipeline_context.id, [run_context.id])
+
+    def mark_pipeline_run_finished(self, run_name: str) -> None:
+        """Marks a pipeline run as finished, which means that no executions
+        will be added to it anymore.
+
+        The executions of finished runs are kept in the metadata snapshot.
+
+        Args:
+            run_name: Name of the pipeline run.
+        """
+        run = self.store.get_context_by_type_and_name(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
+        )
+        if not run:
+            logger.debug(
+                "Unable to mark pipeline run '%s' as finished as its context "
+                "does not exist.",
+                run_name,
+            )
+            return
+        run.custom_properties[FINISHED_RUN_PROPERTY_KEY].int_value = 1
+        self.store.put_contexts([run])
+
+    def _put_parent_contexts(
+        self, pipeline_id: int, run_ids: List[int]
+    ) -> None:
+        """Stores the pipeline context as parent of the run contexts."""
+        for run_id in run_ids:
+            try:
+                self.store.put_parent_contexts(
+                    [
+                        metadata_store_pb2.ParentContext(
+                            child_id=run_id, parent_id=pipeline_id
+                        )
+                    ]
+                )
+            except errors.AlreadyExistsError:
+                pass
+
+    def _get_pipeline_executions_after(
+        self, pipeline_context: proto.Context, execution_id: int
+    ) -> List[proto.Execution]:
+        """Returns the executions of a pipeline with an ID greater than
+        `execution_id`."""
+        list_options = metadata_store.ListOptions(
+            filter_query=(
+                f"contexts_a.id = {pipeline_context.id} AND "
+                f"id > {execution_id}"
             )
-            for context in associated_contexts:
-                if context.id == pipeline._id:  # noqa
-                    return True
-        return False
+        )
+        try:
+            return self.store.get_executions(list_options=list_options)
+        except (errors.InvalidArgumentError, errors.UnimplementedError):
+            logger.debug(
+                "Metadata store can't filter executions by context, "
+                "filtering executions of pipeline '%s' in memory.",
+                pipeline_context.name,
+            )
+        return [
+            execution
+            for execution in self.store.get_executions_by_context(
+                pipeline_context.id
+            )
+            if execution.id > execution_id
+        ]
+
+    def _find_unindexed_runs(
+        self, pipeline_context: proto.Context
+    ) -> Tuple[List[proto.Context], int]:
+        """Finds the runs of a pipeline which are missing in its run index.
+
+        The run index stores the ID of the newest execution of the pipeline
+        it has seen. Only executions with a greater ID are checked, so runs
+        which weren't linked by the orchestrator (e.g. runs of older clients
+        or runs whose linking failed) are found with one query if nothing
+        changed, and a number of MLMD calls proportional to the number of
+        new runs otherwise. A pipeline which was never indexed has all of
+        its executions checked. Nothing is written to the metadata store.
+
+        Args:
+            pipeline_context: The context of the pipeline.
+
+        Returns:
+            The unindexed run contexts and the ID of the newest execution of
+            the pipeline.
+        """
+        indexed_until = 0
+        if RUN_INDEX_PROPERTY_KEY in pipeline_context.custom_properties:
+            indexed_until = pipeline_context.custom_properties[
+                RUN_INDEX_PROPERTY_KEY
+            ].int_value
+        executions = self._get_pipeline_executions_after(
+            pipeline_context, indexed_until
+        )
+        if not executions:
+            return [], indexed_until
+
+        pending_execution_ids = {execution.id for execution in executions}
+        linked_run_ids = {
+            run.id
+            for run in self.store.get_children_contexts_by_context(
+                pipeline_context.id
+            )
+        }
+        run_context_type_id = self.store.get_context_type(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME
+        ).id
+        runs = []
+        while pending_execution_ids:
+            execution_id = pending_execution_ids.pop()
+            for context in self.store.get_contexts_by_execution(execution_id):
+                if context.type_id != run_context_type_id:
+                    continue
+                if context.id not in linked_run_ids:
+                    runs.append(context)
+                    linked_run_ids.add(context.id)
+                pending_execution_ids.difference_update(
+                    execution.id
+                    for execution in self.store.get_executions_by_context(
+                        context.id
+                    )
+                )
+        return runs, max(execution.id for execution in executions)
+
+    def _update_pipeline_run_index(
+        self, pipeline_context: proto.Context
+    ) -> None:
+        """Links all runs of a pipeline which are missing in its run index.
+
+        Args:
+            pipeline_context: The context of the pipeline to index.
+        """
+        runs, indexed_until = self._find_unindexed_runs(pipeline_context)
+        self._put_parent_contexts(pipeline_context.id, [r.id for r in runs])
+        if (
+            RUN_INDEX_PROPERTY_KEY in pipeline_context.custom_properties
+            and pipeline_context.custom_properties[
+                RUN_INDEX_PROPERTY_KEY
+            ].int_value
+            == indexed_until
+        ):
+            return
+
+        # The passed context might come from the replica or the cache, so
+        # only the index position is written on top of the current context
+        # to keep concurrent updates of its other properties
+        context = self.mlmd_store.get_contexts_by_id([pipeline_context.id])[0]
+        index_property = context.custom_properties[RUN_INDEX_PROPERTY_KEY]
+        if index_property.int_value < indexed_until:
+            index_property.int_value = indexed_until
+            self.mlmd_store.put_contexts([context])
+        logger.debug(
+            "Indexed %d runs of pipeline '%s'.",
+            len(runs),
+            pipeline_context.name,
+        )
+
+    def _ensure_pipeline_run_index(self, pipeline: PipelineView) -> None:
+        """Adds all runs of a pipeline which are missing to its run
+        index."""
+        pipeline_context = self.read_store.get_contexts_by_id(
+            [pipeline._id]  # noqa
+        )[0]
+        self._update_pipeline_run_index(pipeline_context)
+
+    def _get_pipeline_run_contexts(
+        self, pipeline: PipelineView
+    ) -> List[proto.Context]:
+        """Returns the run contexts of a pipeline in chronological order."""
+        self._ensure_pipeline_run_index(pipeline)
+        runs = self.read_store.get_children_contexts_by_context(
+            pipeline._id  # noqa
+        )
+        runs.sort(key=lambda run: (run.create_time_since_epoch, run.id))
+        return runs
+
+    def _query_pipeline_run_contexts(
+        self,
+        pipeline: PipelineView,
+        page_size: int,
+        ascending: bool,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        cursor: Optional[Tuple[int, int]] = None,
+    ) -> List[proto.Context]:
+        """Returns one page of run contexts of a pipeline.
+
+        The page is queried with MLMD list options, so only the requested
+        runs are read from the database. MLMD versions that can't filter
+        contexts by their parent fall back to filtering all runs of the
+        pipeline in memory.
+
+        Args:
+            pipeline: The pipeline whose runs to query.
+            page_size: Maximum number of runs to return.
+            ascending: Whether to return the oldest runs first.
+            since: Only return runs created at or after this time (in
+                milliseconds since epoch).
+            until: Only return runs created before this time (in
+                milliseconds since epoch).
+            cursor: Creation time and ID of the last run of the previous
+                page. Only runs after it in the requested order are returned.
+
+        Returns:
+            The run contexts, ordered by creation time and ID.
+        """
+        operator = ">" if ascending else "<"
+        conditions = [
+            f"type = '{PIPELINE_RUN_CONTEXT_TYPE_NAME}'",
+            f"parent_contexts_a.id = {pipeline._id}",  # noqa
+        ]
+        if since is not None:
+            conditions.append(f"create_time_since_epoch >= {since}")
+        if until is not None:
+            conditions.append(f"create_time_since_epoch < {until}")
+        if cursor is not None:
+            create_time, id_ = cursor
+            conditions.append(
+                f"(create_time_since_epoch {operator} {create_time} OR "
+                f"(create_time_since_epoch = {create_time} AND "
+                f"id {operator} {id_}))"
+            )
+        list_options = metadata_store.ListOptions(
+            limit=page_size,
+            order_by=metadata_store.OrderByField.CREATE_TIME,
+            is_asc=ascending,
+            filter_query=" AND ".join(conditions),
+        )
+        try:
+            return self.read_store.get_contexts(list_options=list_options)
+        except (errors.InvalidArgumentError, errors.UnimplementedError):
+            logger.debug(
+                "Metadata store can't filter contexts by parent, filtering "
+                "runs of pipeline '%s' in memory.",
+                pipeline.name,
+            )
+
+        runs = [
+            run
+            for run in self._get_pipeline_run_contexts(pipeline)
+            if (since is None or run.create_time_since_epoch >= since)
+            and (until is None or run.create_time_since_epoch < until)
+        ]
+        if not ascending:
+            runs.reverse()
+        if cursor is not None:
+            runs = [
+                run
+                for run in runs
+                if (
+                    (run.create_time_since_epoch, run.id) > cursor
+                    if ascending
+                    else (run.create_time_since_epoch, run.id) < cursor
+                )
+            ]
+        return runs[:page_size]
 
     def _get_step_view_from_execution(
         self, execution: proto.Execution
@@ -108,8 +652,65 @@ class BaseMetadataStore(StackComponent, ABC):
         Returns:
             Original `StepView` derived from the proto.Execution.
         """
-        impl_name = self.step_type_mapping[execution.type_id].split(".")[-1]
+        return self._get_step_views_from_executions([execution])[0]
+
+    def _get_step_views_from_executions(
+        self, executions: List[proto.Execution]
+    ) -> List[StepView]:
+        """Get original StepViews for multiple executions.
+
+        The execution types and the artifact lineage of all executions are
+        fetched with a few bulk calls. All returned steps share the same
+        `ArtifactGraph`, so parents, inputs and outputs of every step are
+        resolved in memory.
+
+        Args:
+            executions: proto.Execution objects from mlmd store.
+
+        Returns:
+            Original `StepView`s derived from the executions, in the same
+            order.
+        """
+        if not executions:
+            return []
+
+        step_type_mapping = {
+            type_.id: type_.name
+            for type_ in self.read_store.get_execution_types_by_id(
+                sorted({execution.type_id for execution in executions})
+            )
+        }
+        graph = ArtifactGraph(self, [execution.id for execution in executions])
+        return [
+            self._create_step_view(
+                execution,
+                entrypoint_name=step_type_mapping[execution.type_id].split(".")[
+                    -1
+                ],
+                artifact_graph=graph,
+            )
+            for execution in executions
+        ]
+
+    def _create_step_view(
+        self,
+        execution: proto.Execution,
+        entrypoint_name: str,
+        artifact_graph: ArtifactGraph,
+    ) -> StepView:
+        """Creates a StepView from an execution.
 
+        Args:
+            execution: proto.Execution object from mlmd store.
+            entrypoint_name: Name of the step implementation.
+            artifact_graph: Artifact lineage which contains the execution.
+
+        Returns:
+            The `StepView` of the execution.
+
+        Raises:
+            KeyError: If the step name is missing in the execution properties.
+        """
         step_name_property = execution.custom_properties.get(
             INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME,
             None,
@@ -132,48 +733,23 @@ class BaseMetadataStore(StackComponent, ABC):
                     # ignore it
                     pass
 
-        events_for_execution = self.store.get_events_by_execution_ids(
-            [execution.id]
-        )
-
-        parents_step_ids = set()
-        for current_event in events_for_execution:
-            if current_event.type == current_event.INPUT:
-                # this means the artifact is an input artifact
-                events_for_input_artifact = [
-                    e
-                    for e in self.store.get_events_by_artifact_ids(
-                        [current_event.artifact_id]
-                    )
-                    # should be output type and should NOT be the same id as
-                    # the execution we are querying and it should be BEFORE
-                    # the time of the current event.
-                    if e.type == e.OUTPUT
-                    and e.execution_id != current_event.execution_id
-                    and e.milliseconds_since_epoch
-                    < current_event.milliseconds_since_epoch
-                ]
-
-                # sort by time
-                events_for_input_artifact.sort(
-                    key=lambda x: x.milliseconds_since_epoch
-                )
-                # take the latest one and add execution to the parents.
-                parents_step_ids.add(events_for_input_artifact[-1].execution_id)
-
         return StepView(
             id_=execution.id,
-            parents_step_ids=list(parents_step_ids),
-            entrypoint_name=impl_name,
+            parents_step_ids=artifact_graph.get_parent_step_ids(execution.id),
+            entrypoint_name=entrypoint_name,
             name=step_name,
             parameters=step_parameters,
             metadata_store=self,
+            artifact_graph=artifact_graph,
+            metrics=StepMetrics.from_custom_properties(
+                execution.custom_properties
+            ),
         )
 
     def get_pipelines(self) -> List[PipelineView]:
         """Returns a list of all pipelines stored in this metadata store."""
         pipelines = []
-        for pipeline_context in self.store.get_contexts_by_type(
+        for pipeline_context in self.read_store.get_contexts_by_type(
             PIPELINE_CONTEXT_TYPE_NAME
         ):
             pipeline = PipelineView(
@@ -188,7 +764,7 @@ class BaseMetadataStore(StackComponent, ABC):
 
     def get_pipeline(self, pipeline_name: str) -> Optional[PipelineView]:
         """Returns a pipeline for the given name."""
-        pipeline_context = self.store.get_context_by_type_and_name(
+        pipeline_context = self.read_store.get_context_by_type_and_name(
             PIPELINE_CONTEXT_TYPE_NAME, pipeline_name
         )
         if pipeline_context:
@@ -205,24 +781,19 @@ class BaseMetadataStore(StackComponent, ABC):
     def get_pipeline_runs(
         self, pipeline: PipelineView
     ) -> Dict[str, PipelineRunView]:
-        """Gets all runs for the given pipeline."""
-        all_pipeline_runs = self.store.get_contexts_by_type(
-            PIPELINE_RUN_CONTEXT_TYPE_NAME
-        )
-        runs: Dict[str, PipelineRunView] = OrderedDict()
+        """Gets all runs for the given pipeline.
 
-        for run in all_pipeline_runs:
-            executions = self.store.get_executions_by_context(run.id)
-            if self._check_if_executions_belong_to_pipeline(
-                executions, pipeline
-            ):
-                run_view = PipelineRunView(
-                    id_=run.id,
-                    name=run.name,
-                    executions=executions,
-                    metadata_store=self,
-                )
-                runs[run.name] = run_view
+        The runs are looked up in the run index of the pipeline, so the cost
+        does not depend on the number of runs of other pipelines. Executions
+        of the runs are fetched lazily.
+        """
+        runs: Dict[str, PipelineRunView] = OrderedDict()
+        for run in self._get_pipeline_run_contexts(pipeline):
+            runs[run.name] = PipelineRunView(
+                id_=run.id,
+                name=run.name,
+                metadata_store=self,
+            )
 
         logger.debug(
             "Fetched %d pipeline runs for pipeline named '%s'.",
@@ -232,11 +803,137 @@ class BaseMetadataStore(StackComponent, ABC):
 
         return runs
 
+    def iter_pipeline_runs(
+        self,
+        pipeline: PipelineView,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "desc",
+        start_after: Optional[PipelineRunView] = None,
+        page_size: int = RUN_QUERY_PAGE_SIZE,
+    ) -> Iterator[PipelineRunView]:
+        """Iterates over the runs of a pipeline, one page at a time.
+
+        Pages are only queried while the iterator is consumed, so stopping
+        early reads only the runs up to that point.
+
+        Args:
+            pipeline: The pipeline whose runs to iterate over.
+            since: Only return runs created at or after this time.
+            until: Only return runs created before this time.
+            order: `"desc"` to return the latest runs first, `"asc"` to
+                return the oldest runs first.
+            start_after: Only return runs after this run in the requested
+                order, e.g. the last run of a previous query.
+            page_size: Number of runs to query at once.
+
+        Yields:
+            The runs of the pipeline ordered by creation time.
+
+        Raises:
+            ValueError: If the order is neither `"asc"` nor `"desc"`.
+        """
+        for page in self.iter_pipeline_run_contexts(
+            pipeline,
+            since=since,
+            until=until,
+            order=order,
+            start_after=start_after,
+            page_size=page_size,
+        ):
+            for run in page:
+                yield PipelineRunView(
+                    id_=run.id, name=run.name, metadata_store=self
+                )
+
+    def iter_pipeline_run_contexts(
+        self,
+        pipeline: PipelineView,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "desc",
+        start_after: Optional[PipelineRunView] = None,
+        page_size: int = RUN_QUERY_PAGE_SIZE,
+    ) -> Iterator[List[proto.Context]]:
+        """Iterates over the MLMD contexts of the runs of a pipeline, one
+        page at a time.
+
+        This is the paging behind `iter_pipeline_runs` for callers which need
+        the contexts themselves, e.g. to read the creation time or custom
+        properties of the runs. See `iter_pipeline_runs` for a description
+        of the arguments.
+
+        Yields:
+            Pages of at most `page_size` run contexts, ordered by creation
+            time.
+
+        Raises:
+            ValueError: If the order is neither `"asc"` nor `"desc"`.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(
+                f"Invalid order '{order}', must be either 'asc' or 'desc'."
+            )
+        ascending = order == "asc"
+        self._ensure_pipeline_run_index(pipeline)
+
+        cursor = None
+        if start_after is not None:
+            context = self.read_store.get_contexts_by_id(
+                [start_after._id]  # noqa
+            )[0]
+            cursor = (context.create_time_since_epoch, context.id)
+
+        while True:
+            page = self._query_pipeline_run_contexts(
+                pipeline,
+                page_size=page_size,
+                ascending=ascending,
+                since=_to_milliseconds(since),
+                until=_to_milliseconds(until),
+                cursor=cursor,
+            )
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            cursor = (page[-1].create_time_since_epoch, page[-1].id)
+
+    def query_pipeline_runs(
+        self,
+        pipeline: PipelineView,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        status: Optional[ExecutionStatus] = None,
+        limit: Optional[int] = None,
+        order: str = "desc",
+        start_after: Optional[PipelineRunView] = None,
+    ) -> List[PipelineRunView]:
+        """Queries runs of a pipeline.
+
+        See `PipelineView.query_runs` for a description of the arguments.
+        """
+        page_size = RUN_QUERY_PAGE_SIZE
+        if limit is not None and status is None:
+            page_size = max(1, min(limit, RUN_QUERY_PAGE_SIZE))
+
+        runs: Iterator[PipelineRunView] = self.iter_pipeline_runs(
+            pipeline,
+            since=since,
+            until=until,
+            order=order,
+            start_after=start_after,
+            page_size=page_size,
+        )
+        if status is not None:
+            runs = (run for run in runs if run.status == status)
+        return list(itertools.islice(runs, limit))
+
     def get_pipeline_run(
         self, pipeline: PipelineView, run_name: str
     ) -> Optional[PipelineRunView]:
         """Gets a specific run for the given pipeline."""
-        run = self.store.get_context_by_type_and_name(
+        run = self.read_store.get_context_by_type_and_name(
             PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
         )
 
@@ -244,8 +941,17 @@ class BaseMetadataStore(StackComponent, ABC):
             # No context found for the given run name
             return None
 
-        executions = self.store.get_executions_by_context(run.id)
-        if self._check_if_executions_belong_to_pipeline(executions, pipeline):
+        parent_ids = {
+            parent.id
+            for parent in self.read_store.get_parent_contexts_by_context(run.id)
+        }
+        executions = self.read_store.get_executions_by_context(run.id)
+        if pipeline._id in parent_ids or (  # noqa
+            not parent_ids
+            and self._check_if_executions_belong_to_pipeline(
+                executions, pipeline
+            )
+        ):
             logger.debug("Fetched pipeline run with name '%s'", run_name)
             return PipelineRunView(
                 id_=run.id,
@@ -257,6 +963,37 @@ class BaseMetadataStore(StackComponent, ABC):
         logger.info("No pipeline run found for name '%s'", run_name)
         return None
 
+    def get_pipeline_run_by_name(
+        self, run_name: str
+    ) -> Optional[PipelineRunView]:
+        """Gets a pipeline run by its name, regardless of its pipeline.
+
+        Run names are unique within a metadata store, so this doesn't need
+        to look up the pipeline first.
+        """
+        run = self.read_store.get_context_by_type_and_name(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
+        )
+        if not run:
+            logger.info("No pipeline run found for name '%s'", run_name)
+            return None
+        return PipelineRunView(id_=run.id, name=run.name, metadata_store=self)
+
+    def get_pipeline_run_executions(
+        self, pipeline_run: PipelineRunView
+    ) -> List[proto.Execution]:
+        """Gets all executions of the given pipeline run."""
+        return self.read_store.get_executions_by_context(
+            pipeline_run._id
+        )  # noqa
+
+    def get_pipeline_run_status(
+        self, pipeline_run: PipelineRunView
+    ) -> ExecutionStatus:
+        """Gets the status of a pipeline run from the states of the
+        executions of the run, without looking up its steps."""
+        return get_run_status_from_executions(pipeline_run.executions)
+
     def get_pipeline_run_steps(
         self, pipeline_run: PipelineRunView
     ) -> Dict[str, StepView]:
@@ -264,8 +1001,9 @@ class BaseMetadataStore(StackComponent, ABC):
         steps: Dict[str, StepView] = OrderedDict()
         # reverse the executions as they get returned in reverse chronological
         # order from the metadata store
-        for execution in reversed(pipeline_run._executions):  # noqa
-            step = self._get_step_view_from_execution(execution)
+        for step in self._get_step_views_from_executions(
+            list(reversed(pipeline_run.executions))
+        ):
             steps[step.name] = step
 
         logger.debug(
@@ -278,22 +1016,54 @@ class BaseMetadataStore(StackComponent, ABC):
 
     def get_step_by_id(self, step_id: int) -> StepView:
         """Gets a `StepView` by its ID"""
-        execution = self.store.get_executions_by_id([step_id])[0]
+        execution = self.read_store.get_executions_by_id([step_id])[0]
         return self._get_step_view_from_execution(execution)
 
+    def get_steps_by_ids(self, step_ids: List[int]) -> List[StepView]:
+        """Gets multiple `StepView`s by their IDs using bulk queries."""
+        if not step_ids:
+            return []
+        executions = {
+            execution.id: execution
+            for execution in self.read_store.get_executions_by_id(step_ids)
+        }
+        return self._get_step_views_from_executions(
+            [executions[step_id] for step_id in step_ids]
+        )
+
     def get_step_status(self, step: StepView) -> ExecutionStatus:
         """Gets the execution status of a single step."""
-        proto = self.store.get_executions_by_id([step._id])[0]  # noqa
-        state = proto.last_known_state
-
-        if state == proto.COMPLETE:
-            return ExecutionStatus.COMPLETED
-        elif state == proto.RUNNING:
-            return ExecutionStatus.RUNNING
-        elif state == proto.CACHED:
-            return ExecutionStatus.CACHED
-        else:
-            return ExecutionStatus.FAILED
+        return self._get_execution_status(self.read_store, step._id)  # noqa
+
+    def get_execution_status(self, execution_id: int) -> ExecutionStatus:
+        """Gets the execution status of a step by its execution ID.
+
+        This requires a single lookup of the execution and doesn't build the
+        views of the pipeline, run or step. The execution is read from the
+        primary store without the metadata cache, so the status of a step
+        that was just executed is always up to date.
+
+        Args:
+            execution_id: The MLMD execution ID of the step.
+
+        Returns:
+            The execution status of the step.
+        """
+        return self._get_execution_status(self.mlmd_store, execution_id)
+
+    @staticmethod
+    def _get_execution_status(
+        store: metadata_store.MetadataStore, execution_id: int
+    ) -> ExecutionStatus:
+        """Reads the execution status of a step from the given store.
+
+        Raises:
+            KeyError: If no execution with the given ID exists.
+        """
+        executions = store.get_executions_by_id([execution_id])
+        if not executions:
+            raise KeyError(f"No execution found for ID {execution_id}.")
+        return get_execution_status_from_proto(executions[0])
 
     def get_step_artifacts(
         self, step: StepView
@@ -308,58 +1078,8 @@ class BaseMetadataStore(StackComponent, ABC):
             are both Dicts mapping artifact names
             to the input and output artifacts respectively.
         """
-        # maps artifact types to their string representation
-        artifact_type_mapping = {
-            type_.id: type_.name for type_ in self.store.get_artifact_types()
-        }
-
-        events = self.store.get_events_by_execution_ids([step._id])  # noqa
-        artifacts = self.store.get_artifacts_by_id(
-            [event.artifact_id for event in events]
-        )
-
-        inputs: Dict[str, ArtifactView] = {}
-        outputs: Dict[str, ArtifactView] = {}
-
-        # sort them according to artifact_id's so that the zip works.
-        events.sort(key=lambda x: x.artifact_id)
-        artifacts.sort(key=lambda x: x.id)
-
-        for event_proto, artifact_proto in zip(events, artifacts):
-            artifact_type = artifact_type_mapping[artifact_proto.type_id]
-            artifact_name = event_proto.path.steps[0].key
-
-            producer = artifact_proto.properties[
-                PRODUCER_PROPERTY_KEY
-            ].string_value
-
-            data_type = artifact_proto.properties[
-                DATATYPE_PROPERTY_KEY
-            ].string_value
-
-            parent_step_id = step.id
-            if event_proto.type == event_proto.INPUT:
-                # In the case that this is an input event, we actually need
-                # to resolve it via its parents outputs.
-                for parent in step.parent_steps:
-                    for a in parent.outputs.values():
-                        if artifact_proto.id == a.id:
-                            parent_step_id = parent.id
-
-            artifact = ArtifactView(
-                id_=event_proto.artifact_id,
-                type_=artifact_type,
-                uri=artifact_proto.uri,
-                producer=producer,
-                data_type=data_type,
-                metadata_store=self,
-                parent_step_id=parent_step_id,
-            )
-
-            if event_proto.type == event_proto.INPUT:
-                inputs[artifact_name] = artifact
-            elif event_proto.type == event_proto.OUTPUT:
-                outputs[artifact_name] = artifact
+        graph = step._artifact_graph or ArtifactGraph(self, [step.id])  # noqa
+        inputs, outputs = graph.get_step_artifacts(step.id)
 
         logger.debug(
             "Fetched %d inputs and %d outputs for step '%s'.",
@@ -381,10 +1101,211 @@ class BaseMetadataStore(StackComponent, ABC):
         Returns:
             Original StepView that produced the artifact.
         """
-        executions_ids = set(
-            event.execution_id
-            for event in self.store.get_events_by_artifact_ids([artifact.id])
-            if event.type == event.OUTPUT
+        producer_step_id = artifact.producer_step_id
+        if producer_step_id is None:
+            producer_step_id = min(
+                event.execution_id
+                for event in self.read_store.get_events_by_artifact_ids(
+                    [artifact.id]
+                )
+                if event.type == event.OUTPUT
+            )
+        return self.get_step_by_id(producer_step_id)
+
+    def get_lineage(
+        self,
+        artifacts: Sequence[ArtifactView] = (),
+        steps: Sequence[StepView] = (),
+        direction: str = BOTH,
+        max_depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+    ) -> LineageGraph:
+        """Loads the lineage of artifacts and steps.
+
+        The events of each level of the lineage are read with bulk queries,
+        or from the persistent `lineage_index` if a `lineage_index_path` is
+        configured. Steps that are still running are only part of the
+        indexed lineage once they finished.
+
+        Args:
+            artifacts: Artifacts to start the search from.
+            steps: Steps to start the search from.
+            direction: `"upstream"` to find what was used to produce the
+                artifacts and steps, `"downstream"` to find what used them
+                or `"both"`.
+            max_depth: Maximum number of hops from the start nodes, where
+                each hop goes from an artifact to a step or vice versa.
+            max_nodes: Approximate maximum number of nodes in the graph.
+
+        Returns:
+            A graph with nodes `("artifact", id)` and `("execution", id)`
+            whose edges point in the direction of the data flow.
+        """
+        start_nodes = [
+            (ARTIFACT_NODE, artifact.id) for artifact in artifacts
+        ] + [(EXECUTION_NODE, step.id) for step in steps]
+        graph = load_lineage(
+            self,
+            start_nodes,
+            direction=direction,
+            max_depth=max_depth,
+            max_nodes=max_nodes,
+            index=self.lineage_index,
+        )
+        logger.debug(
+            "Fetched lineage with %d nodes for %d start nodes.",
+            len(graph),
+            len(start_nodes),
+        )
+        return graph
+
+    def put_step_metrics(self, execution_id: int, metrics: StepMetrics) -> None:
+        """Records the timing and resource usage of a step execution.
+
+        Args:
+            execution_id: The MLMD execution ID of the step.
+            metrics: The metrics to record.
+
+        Raises:
+            KeyError: If no execution with the given ID exists.
+        """
+        # Read the execution without the metadata cache: writing back a
+        # cached copy from before the launcher completed the execution
+        # would reset its state
+        executions = self.mlmd_store.get_executions_by_id([execution_id])
+        if not executions:
+            raise KeyError(f"No execution found for ID `{execution_id}`.")
+
+        execution = executions[0]
+        for key, value in metrics.to_custom_properties().items():
+            execution.custom_properties[key].CopyFrom(value)
+        self.store.put_executions([execution])
+        logger.debug(
+            "Recorded metrics of execution %d: %s", execution_id, metrics
+        )
+
+    def pin_pipeline_run(self, run_name: str, pinned: bool = True) -> None:
+        """Pins (or unpins) a pipeline run.
+
+        Artifacts of pinned runs are never removed by the artifact garbage
+        collector.
+
+        Args:
+            run_name: Name of the pipeline run.
+            pinned: Whether the run should be pinned or unpinned.
+
+        Raises:
+            KeyError: If no run with the given name exists.
+        """
+        run = self.store.get_context_by_type_and_name(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name
+        )
+        if not run:
+            raise KeyError(f"No pipeline run found for name `{run_name}`.")
+
+        run.custom_properties[PINNED_RUN_PROPERTY_KEY].int_value = int(pinned)
+        self.store.put_contexts([run])
+        logger.debug("Set pinned=%s for pipeline run '%s'.", pinned, run_name)
+
+    def get_pinned_run_contexts(self) -> List[proto.Context]:
+        """Returns the contexts of all pinned pipeline runs.
+
+        The runs are queried with a filter on their pinned property. MLMD
+        versions that can't filter contexts by custom properties fall back
+        to filtering all runs in memory.
+        """
+        list_options = metadata_store.ListOptions(
+            filter_query=(
+                f"type = '{PIPELINE_RUN_CONTEXT_TYPE_NAME}' AND "
+                f"custom_properties.`{PINNED_RUN_PROPERTY_KEY}`.int_value = 1"
+            )
+        )
+        try:
+            return self.store.get_contexts(list_options=list_options)
+        except (errors.InvalidArgumentError, errors.UnimplementedError):
+            logger.debug(
+                "Metadata store can't filter contexts by custom properties, "
+                "filtering pinned runs in memory."
+            )
+        return [
+            run
+            for run in self.store.get_contexts_by_type(
+                PIPELINE_RUN_CONTEXT_TYPE_NAME
+            )
+            if PINNED_RUN_PROPERTY_KEY in run.custom_properties
+            and run.custom_properties[PINNED_RUN_PROPERTY_KEY].int_value
+        ]
+
+    def get_latest_run_contexts(self, limit: int) -> List[proto.Context]:
+        """Returns the contexts of the last runs of every pipeline.
+
+        The runs are read from the run index of each pipeline. Runs which
+        are missing in a run index are looked up without updating it, so
+        nothing is written to the metadata store. The primary store is
+        read, as a replica might not contain the latest runs yet.
+
+        Args:
+            limit: Number of runs to return per pipeline.
+
+        Returns:
+            The run contexts, the latest runs of each pipeline first.
+        """
+        if limit <= 0:
+            return []
+        latest_runs = []
+        for pipeline_context in self.store.get_contexts_by_type(
+            PIPELINE_CONTEXT_TYPE_NAME
+        ):
+            runs, _ = self._find_unindexed_runs(pipeline_context)
+            runs += self.store.get_children_contexts_by_context(
+                pipeline_context.id
+            )
+            runs.sort(
+                key=lambda run: (run.create_time_since_epoch, run.id),
+                reverse=True,
+            )
+            latest_runs.extend(runs[:limit])
+        return latest_runs
+
+    def tag_artifact(self, artifact: ArtifactView, tag: str) -> None:
+        """Adds a tag to an artifact, e.g. to mark a released model.
+
+        Tagged artifacts are never removed by the artifact garbage collector.
+
+        Args:
+            artifact: The artifact to tag.
+            tag: The tag to add.
+        """
+        artifact_proto = self.store.get_artifacts_by_id([artifact.id])[0]
+        tags: Set[str] = set()
+        if TAGS_PROPERTY_KEY in artifact_proto.custom_properties:
+            tags.update(
+                json.loads(
+                    artifact_proto.custom_properties[
+                        TAGS_PROPERTY_KEY
+                    ].string_value
+                )
+            )
+        tags.add(tag)
+        artifact_proto.custom_properties[
+            TAGS_PROPERTY_KEY
+        ].string_value = json.dumps(sorted(tags))
+        self.store.put_artifacts([artifact_proto])
+        logger.debug("Tagged artifact %d with '%s'.", artifact.id, tag)
+
+    def get_storage_usage(
+        self, by: str = GROUP_BY_PIPELINE
+    ) -> List[StorageUsage]:
+        """Aggregates the storage used by artifacts from the artifact sizes
+        recorded when writing them, without listing the artifact store.
+
+        Args:
+            by: How to group the artifacts, one of `pipeline`, `run`, `step`
+                or `type`.
+
+        Returns:
+            The usage of each group, the largest group first.
+        """
+        return get_storage_usage(
+            self.read_store, by=by, database_url=self.get_database_url()
         )
-        execution = self.store.get_executions_by_id(executions_ids)[0]
-        return self._get_step_view_from_execution(execution)
@@ -0,0 +1,103 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from ml_metadata.metadata_store import metadata_store
+
+from coalescenceml.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class ConnectionPool:
+    """Thread-safe pool of MLMD connections.
+
+    An MLMD `MetadataStore` holds a single database connection and must not
+    be used by multiple threads at once. The pool hands out up to `size`
+    connections, which are opened lazily when all open connections are in
+    use, and blocks callers while all of them are busy. Calling any method
+    of the `MetadataStore` interface on the pool runs it on a borrowed
+    connection.
+
+    Connections on which a call failed with an error that `is_broken`
+    accepts (e.g. because the server closed the connection) are discarded
+    instead of being returned to the pool.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], metadata_store.MetadataStore],
+        size: int,
+        is_broken: Optional[Callable[[Exception], bool]] = None,
+    ):
+        """Initializes an empty pool.
+
+        Args:
+            factory: Opens a new connection.
+            size: Maximum number of open connections.
+            is_broken: Returns whether a connection can't be used anymore
+                after a call failed with the given error.
+
+        Raises:
+            ValueError: If the size is smaller than one.
+        """
+        if size < 1:
+            raise ValueError(
+                f"Connection pool size must be at least 1, got {size}."
+            )
+        self._factory = factory
+        self._size = size
+        self._is_broken = is_broken
+        self._idle: "queue.LifoQueue[metadata_store.MetadataStore]"
+        self._idle = queue.LifoQueue()
+        self._available = threading.BoundedSemaphore(size)
+
+    @property
+    def size(self) -> int:
+        """Maximum number of open connections."""
+        return self._size
+
+    @contextmanager
+    def connection(self) -> Iterator[metadata_store.MetadataStore]:
+        """Borrows a connection from the pool.
+
+        Yields:
+            An MLMD store which is exclusively used by the caller until the
+            context is exited.
+        """
+        with self._available:
+            try:
+                store = self._idle.get_nowait()
+            except queue.Empty:
+                logger.debug("Opening new metadata store connection.")
+                store = self._factory()
+
+            try:
+                yield store
+            except Exception as e:
+                if self._is_broken and self._is_broken(e):
+                    logger.debug(
+                        "Discarding metadata store connection after error: "
+                        "%s",
+                        e,
+                    )
+                else:
+                    self._idle.put(store)
+                raise
+            else:
+                self._idle.put(store)
+
+    def __getattr__(self, name: str) -> Any:
+        """Returns a function which calls the MLMD store method with the
+        given name on a borrowed connection."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _pooled(*args: Any, **kwargs: Any) -> Any:
+            with self.connection() as store:
+                return getattr(store, name)(*args, **kwargs)
+
+        _pooled.__name__ = name
+        return _pooled
@@ -0,0 +1,4 @@
+FINISHED_RUN_PROPERTY_KEY = "coml-run-finished"
+PINNED_RUN_PROPERTY_KEY = "coml-pinned"
+RUN_INDEX_PROPERTY_KEY = "coml-run-index"
+STEP_METRICS_PROPERTY_PREFIX = "coml-metrics-"
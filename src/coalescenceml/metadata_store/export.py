@@ -0,0 +1,513 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from json import JSONDecodeError
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ml_metadata.proto import metadata_store_pb2
+from pydantic import BaseModel
+from tfx.dsl.compiler.constants import PIPELINE_CONTEXT_TYPE_NAME
+
+from coalescenceml.io import fileio
+from coalescenceml.io.utils import create_dir_recursive_if_not_exists
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.base_metadata_store import (
+    get_execution_status_from_proto,
+    get_run_status_from_executions,
+)
+from coalescenceml.metadata_store.constants import PINNED_RUN_PROPERTY_KEY
+from coalescenceml.metadata_store.step_metrics import StepMetrics
+from coalescenceml.metadata_store.storage_usage import get_artifact_size
+from coalescenceml.post_execution import PipelineView
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+if TYPE_CHECKING:
+    from coalescenceml.metadata_store import BaseMetadataStore
+
+logger = get_logger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+BATCH_SIZE = 1000
+
+RUNS_TABLE = "runs"
+STEPS_TABLE = "steps"
+ARTIFACTS_TABLE = "artifacts"
+EDGES_TABLE = "edges"
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    RUNS_TABLE: pa.schema(
+        [
+            ("run_id", pa.int64()),
+            ("run_name", pa.string()),
+            ("pipeline_name", pa.string()),
+            ("status", pa.string()),
+            ("pinned", pa.bool_()),
+            ("num_steps", pa.int64()),
+            ("create_time", pa.timestamp("ms")),
+            ("end_time", pa.timestamp("ms")),
+            ("duration_seconds", pa.float64()),
+        ]
+    ),
+    STEPS_TABLE: pa.schema(
+        [
+            ("step_id", pa.int64()),
+            ("run_id", pa.int64()),
+            ("run_name", pa.string()),
+            ("pipeline_name", pa.string()),
+            ("step_name", pa.string()),
+            ("entrypoint_name", pa.string()),
+            ("status", pa.string()),
+            ("create_time", pa.timestamp("ms")),
+            ("last_update_time", pa.timestamp("ms")),
+            ("duration_seconds", pa.float64()),
+            ("cpu_seconds", pa.float64()),
+            ("peak_memory_bytes", pa.int64()),
+            ("bytes_read", pa.int64()),
+            ("bytes_written", pa.int64()),
+            ("parameters", pa.string()),
+        ]
+    ),
+    ARTIFACTS_TABLE: pa.schema(
+        [
+            ("artifact_id", pa.int64()),
+            ("type", pa.string()),
+            ("uri", pa.string()),
+            ("state", pa.string()),
+            ("producer_step_id", pa.int64()),
+            ("size_bytes", pa.int64()),
+            ("create_time", pa.timestamp("ms")),
+            ("properties", pa.string()),
+        ]
+    ),
+    EDGES_TABLE: pa.schema(
+        [
+            ("run_id", pa.int64()),
+            ("step_id", pa.int64()),
+            ("artifact_id", pa.int64()),
+            ("direction", pa.string()),
+            ("name", pa.string()),
+        ]
+    ),
+}
+
+T = TypeVar("T")
+
+
+def _batched(items: List[T], batch_size: int) -> Iterator[List[T]]:
+    """Splits a list into consecutive batches of at most `batch_size`."""
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+def _to_datetime(milliseconds: int) -> Optional[datetime]:
+    """Converts milliseconds since epoch to a datetime, `None` if unset."""
+    if not milliseconds:
+        return None
+    return datetime.utcfromtimestamp(milliseconds / 1000)
+
+
+def _get_value(value: metadata_store_pb2.Value) -> Any:
+    """Returns the python value of an MLMD property value."""
+    field = value.WhichOneof("value")
+    return getattr(value, field) if field else None
+
+
+def _get_step_parameters(execution: metadata_store_pb2.Execution) -> str:
+    """Returns the step parameters of an execution as JSON string."""
+    parameters = {}
+    for key, value in execution.custom_properties.items():
+        if key.startswith(INTERNAL_EXECUTION_PARAMETER_PREFIX):
+            continue
+        try:
+            parameters[key] = json.loads(value.string_value)
+        except JSONDecodeError:
+            # not a parameter that was written by coalescenceml
+            pass
+    return json.dumps(parameters, sort_keys=True, default=str)
+
+
+class ExportReport(BaseModel):
+    """Summary of a metadata export.
+
+    Attributes:
+        output_dir: Directory which contains the exported tables.
+        files: Maps the table names to the paths of their parquet files.
+        row_counts: Maps the table names to their number of rows.
+    """
+
+    output_dir: str
+    files: Dict[str, str] = {}
+    row_counts: Dict[str, int] = {}
+
+
+class _TableWriter:
+    """Writes the rows of a table to a parquet file, one row group per
+    page."""
+
+    def __init__(self, path: str, schema: pa.Schema):
+        """Opens the parquet file."""
+        self.path = path
+        self.row_count = 0
+        self._schema = schema
+        self._file = fileio.open(path, "wb")
+        self._writer = pq.ParquetWriter(pa.output_stream(self._file), schema)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """Appends rows to the file."""
+        if not rows:
+            return
+        columns = {
+            name: [row.get(name) for row in rows] for name in self._schema.names
+        }
+        self._writer.write_table(
+            pa.Table.from_pydict(columns, schema=self._schema)
+        )
+        self.row_count += len(rows)
+
+    def close(self) -> None:
+        """Finalizes the parquet file."""
+        self._writer.close()
+        self._file.close()
+
+
+class MetadataExporter:
+    """Exports the run history of a metadata store to parquet tables.
+
+    The exporter writes four tables to the output directory:
+    * `runs.parquet`: one row per pipeline run with its status and duration
+    * `steps.parquet`: one row per step of a run with its status, timing and
+        parameters
+    * `artifacts.parquet`: one row per artifact with its type, URI and
+        properties
+    * `edges.parquet`: one row per input or output artifact of a step
+
+    Runs are read one page at a time. The executions of every run are
+    queried once, while the events, artifacts and types of all runs of a
+    page are read with bulk queries. Each page is appended to the tables as
+    a parquet row group, so the memory usage does not depend on the size of
+    the history.
+    """
+
+    def __init__(
+        self,
+        metadata_store: BaseMetadataStore,
+        output_dir: str,
+        pipeline_names: Optional[Iterable[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        run_ids: Optional[Iterable[int]] = None,
+    ):
+        """Initializes the exporter.
+
+        Args:
+            metadata_store: The metadata store to export.
+            output_dir: Directory to write the parquet files to.
+            pipeline_names: Names of the pipelines to export. Defaults to all
+                pipelines.
+            since: Only export runs created at or after this time.
+            until: Only export runs created before this time.
+            page_size: Number of runs to read and write at once.
+            run_ids: Context IDs of the runs to export. Defaults to all runs
+                of the selected pipelines.
+
+        Raises:
+            ValueError: If `page_size` is not positive.
+        """
+        if page_size <= 0:
+            raise ValueError("`page_size` must be positive.")
+
+        self._metadata_store = metadata_store
+        self._output_dir = output_dir
+        self._pipeline_names = (
+            set(pipeline_names) if pipeline_names is not None else None
+        )
+        self._since = since
+        self._until = until
+        self._page_size = page_size
+        self._run_ids = set(run_ids) if run_ids is not None else None
+        self._exported_artifact_ids: Set[int] = set()
+
+    def export(self) -> ExportReport:
+        """Exports the runs of all selected pipelines.
+
+        Returns:
+            A report with the paths and row counts of the written tables.
+        """
+        create_dir_recursive_if_not_exists(self._output_dir)
+        writers = {
+            name: _TableWriter(
+                os.path.join(self._output_dir, f"{name}.parquet"), schema
+            )
+            for name, schema in SCHEMAS.items()
+        }
+        self._exported_artifact_ids = set()
+        try:
+            for pipeline_context in self._get_pipeline_contexts():
+                pipeline = PipelineView(
+                    id_=pipeline_context.id,
+                    name=pipeline_context.name,
+                    metadata_store=self._metadata_store,
+                )
+                for runs in self._iter_run_pages(pipeline):
+                    self._export_page(pipeline, runs, writers)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        report = ExportReport(
+            output_dir=self._output_dir,
+            files={name: writer.path for name, writer in writers.items()},
+            row_counts={
+                name: writer.row_count for name, writer in writers.items()
+            },
+        )
+        logger.info(
+            "Exported %d runs with %d steps to '%s'.",
+            report.row_counts[RUNS_TABLE],
+            report.row_counts[STEPS_TABLE],
+            self._output_dir,
+        )
+        return report
+
+    def _get_pipeline_contexts(self) -> List[metadata_store_pb2.Context]:
+        """Returns the contexts of all selected pipelines."""
+        return [
+            context
+            for context in self._metadata_store.read_store.get_contexts_by_type(
+                PIPELINE_CONTEXT_TYPE_NAME
+            )
+            if self._pipeline_names is None
+            or context.name in self._pipeline_names
+        ]
+
+    def _iter_run_pages(
+        self, pipeline: PipelineView
+    ) -> Iterator[List[metadata_store_pb2.Context]]:
+        """Iterates over the run contexts of a pipeline, oldest first."""
+        for page in self._metadata_store.iter_pipeline_run_contexts(
+            pipeline,
+            since=self._since,
+            until=self._until,
+            order="asc",
+            page_size=self._page_size,
+        ):
+            runs = [
+                run
+                for run in page
+                if self._run_ids is None or run.id in self._run_ids
+            ]
+            if runs:
+                yield runs
+
+    def _export_page(
+        self,
+        pipeline: PipelineView,
+        runs: List[metadata_store_pb2.Context],
+        writers: Dict[str, _TableWriter],
+    ) -> None:
+        """Reads the steps, artifacts and edges of a page of runs and
+        appends them to the tables."""
+        store = self._metadata_store.read_store
+        run_executions = {
+            run.id: store.get_executions_by_context(run.id) for run in runs
+        }
+        executions = {
+            execution.id: execution
+            for run_id in run_executions
+            for execution in run_executions[run_id]
+        }
+
+        events: List[metadata_store_pb2.Event] = []
+        for batch in _batched(sorted(executions), BATCH_SIZE):
+            events.extend(store.get_events_by_execution_ids(batch))
+        events_by_execution: DefaultDict[
+            int, List[metadata_store_pb2.Event]
+        ] = defaultdict(list)
+        producer_step_ids: Dict[int, int] = {}
+        for event in events:
+            events_by_execution[event.execution_id].append(event)
+            if event.type == event.OUTPUT:
+                producer_step_ids.setdefault(
+                    event.artifact_id, event.execution_id
+                )
+                producer_step_ids[event.artifact_id] = min(
+                    producer_step_ids[event.artifact_id], event.execution_id
+                )
+
+        new_artifact_ids = sorted(
+            {event.artifact_id for event in events}
+            - self._exported_artifact_ids
+        )
+        artifacts: List[metadata_store_pb2.Artifact] = []
+        for batch in _batched(new_artifact_ids, BATCH_SIZE):
+            artifacts.extend(store.get_artifacts_by_id(batch))
+        self._exported_artifact_ids.update(new_artifact_ids)
+
+        execution_types = self._get_type_names(
+            store.get_execution_types_by_id,
+            {execution.type_id for execution in executions.values()},
+        )
+        artifact_types = self._get_type_names(
+            store.get_artifact_types_by_id,
+            {artifact.type_id for artifact in artifacts},
+        )
+
+        run_rows = []
+        step_rows = []
+        edge_rows = []
+        step_name_key = (
+            INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
+        )
+        for run in runs:
+            end_time = run.create_time_since_epoch
+            for execution in sorted(run_executions[run.id], key=lambda e: e.id):
+                status = get_execution_status_from_proto(execution)
+                end_time = max(end_time, execution.last_update_time_since_epoch)
+                step_name = None
+                if step_name_key in execution.custom_properties:
+                    step_name = json.loads(
+                        execution.custom_properties[step_name_key].string_value
+                    )
+                metrics = StepMetrics.from_custom_properties(
+                    execution.custom_properties
+                )
+                if metrics:
+                    duration = metrics.wall_time
+                else:
+                    duration = (
+                        execution.last_update_time_since_epoch
+                        - execution.create_time_since_epoch
+                    ) / 1000
+                step_rows.append(
+                    {
+                        "step_id": execution.id,
+                        "run_id": run.id,
+                        "run_name": run.name,
+                        "pipeline_name": pipeline.name,
+                        "step_name": step_name,
+                        "entrypoint_name": execution_types.get(
+                            execution.type_id
+                        ),
+                        "status": status.value,
+                        "create_time": _to_datetime(
+                            execution.create_time_since_epoch
+                        ),
+                        "last_update_time": _to_datetime(
+                            execution.last_update_time_since_epoch
+                        ),
+                        "duration_seconds": duration,
+                        "cpu_seconds": metrics.cpu_time if metrics else None,
+                        "peak_memory_bytes": (
+                            metrics.peak_memory if metrics else None
+                        ),
+                        "bytes_read": metrics.bytes_read if metrics else None,
+                        "bytes_written": (
+                            metrics.bytes_written if metrics else None
+                        ),
+                        "parameters": _get_step_parameters(execution),
+                    }
+                )
+                for event in events_by_execution[execution.id]:
+                    if event.type == event.INPUT:
+                        direction = "input"
+                    elif event.type == event.OUTPUT:
+                        direction = "output"
+                    else:
+                        continue
+                    edge_rows.append(
+                        {
+                            "run_id": run.id,
+                            "step_id": execution.id,
+                            "artifact_id": event.artifact_id,
+                            "direction": direction,
+                            "name": ".".join(
+                                step.key for step in event.path.steps
+                            ),
+                        }
+                    )
+
+            pinned = run.custom_properties.get(PINNED_RUN_PROPERTY_KEY, None)
+            run_rows.append(
+                {
+                    "run_id": run.id,
+                    "run_name": run.name,
+                    "pipeline_name": pipeline.name,
+                    "status": get_run_status_from_executions(
+                        run_executions[run.id]
+                    ).value,
+                    "pinned": bool(pinned and pinned.int_value),
+                    "num_steps": len(run_executions[run.id]),
+                    "create_time": _to_datetime(run.create_time_since_epoch),
+                    "end_time": _to_datetime(end_time),
+                    "duration_seconds": (end_time - run.create_time_since_epoch)
+                    / 1000,
+                }
+            )
+
+        artifact_rows = [
+            {
+                "artifact_id": artifact.id,
+                "type": artifact_types.get(artifact.type_id),
+                "uri": artifact.uri,
+                "state": metadata_store_pb2.Artifact.State.Name(artifact.state),
+                "producer_step_id": producer_step_ids.get(artifact.id),
+                "size_bytes": get_artifact_size(artifact),
+                "create_time": _to_datetime(artifact.create_time_since_epoch),
+                "properties": json.dumps(
+                    {
+                        key: _get_value(value)
+                        for properties in (
+                            artifact.properties,
+                            artifact.custom_properties,
+                        )
+                        for key, value in properties.items()
+                    },
+                    sort_keys=True,
+                ),
+            }
+            for artifact in artifacts
+        ]
+
+        writers[RUNS_TABLE].write(run_rows)
+        writers[STEPS_TABLE].write(step_rows)
+        writers[ARTIFACTS_TABLE].write(artifact_rows)
+        writers[EDGES_TABLE].write(edge_rows)
+        logger.debug(
+            "Exported page of %d runs of pipeline '%s'.",
+            len(runs),
+            pipeline.name,
+        )
+
+    @staticmethod
+    def _get_type_names(
+        get_types_by_id: Callable[[List[int]], List[Any]],
+        type_ids: Set[int],
+    ) -> Dict[int, str]:
+        """Reads the names of the given MLMD types with one bulk query."""
+        if not type_ids:
+            return {}
+        return {
+            type_.id: type_.name for type_ in get_types_by_id(sorted(type_ids))
+        }
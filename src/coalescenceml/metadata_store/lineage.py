@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ml_metadata import proto
+from ml_metadata.metadata_store import metadata_store
+from tfx.dsl.compiler.constants import PIPELINE_RUN_CONTEXT_TYPE_NAME
+
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.metadata_cache import (
+    TERMINAL_EXECUTION_STATES,
+)
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+if TYPE_CHECKING:
+    from coalescenceml.metadata_store import BaseMetadataStore
+
+logger = get_logger(__name__)
+
+ARTIFACT_NODE = "artifact"
+EXECUTION_NODE = "execution"
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+BOTH = "both"
+
+# A node of the lineage graph: ("artifact", artifact_id) or
+# ("execution", execution_id)
+LineageNode = Tuple[str, int]
+# An edge in the direction of the data flow: artifact -> consuming execution
+# or execution -> produced artifact
+LineageEdge = Tuple[LineageNode, LineageNode]
+
+LINEAGE_BATCH_SIZE = 500
+
+
+def _batched(values: List[int], batch_size: int) -> Iterable[List[int]]:
+    """Splits a list into batches of at most `batch_size` elements."""
+    for start in range(0, len(values), batch_size):
+        yield values[start : start + batch_size]
+
+
+def _edges_from_events(events: Iterable[proto.Event]) -> Set[LineageEdge]:
+    """Converts MLMD events to lineage edges."""
+    edges: Set[LineageEdge] = set()
+    for event in events:
+        artifact = (ARTIFACT_NODE, event.artifact_id)
+        execution = (EXECUTION_NODE, event.execution_id)
+        if event.type in (event.INPUT, event.DECLARED_INPUT):
+            edges.add((artifact, execution))
+        elif event.type in (event.OUTPUT, event.DECLARED_OUTPUT):
+            edges.add((execution, artifact))
+    return edges
+
+
+class LineageGraph:
+    """Lineage of artifacts and executions, with a networkx-like interface.
+
+    Nodes are tuples `("artifact", id)` or `("execution", id)`. Edges point
+    in the direction of the data flow, i.e. from an artifact to the
+    executions that consumed it and from an execution to the artifacts it
+    produced. `nodes` maps every node to its attributes:
+
+    * artifacts: `type`, `uri`, `state` and `depth`
+    * executions: `type`, `step_name`, `state` and `depth`
+
+    where `depth` is the number of hops from the closest start node.
+    """
+
+    def __init__(self, metadata_store: BaseMetadataStore):
+        """Initializes an empty graph.
+
+        Args:
+            metadata_store: The metadata store the lineage was loaded from.
+        """
+        self._metadata_store = metadata_store
+        self.nodes: Dict[LineageNode, Dict[str, Any]] = {}
+        self._successors: DefaultDict[LineageNode, Set[LineageNode]]
+        self._successors = defaultdict(set)
+        self._predecessors: DefaultDict[LineageNode, Set[LineageNode]]
+        self._predecessors = defaultdict(set)
+
+    @property
+    def edges(self) -> List[LineageEdge]:
+        """All edges of the graph."""
+        return sorted(
+            (source, target)
+            for source, targets in self._successors.items()
+            for target in targets
+        )
+
+    def add_node(self, node: LineageNode, **attributes: Any) -> None:
+        """Adds a node or updates the attributes of an existing node."""
+        self.nodes.setdefault(node, {}).update(attributes)
+
+    def add_edge(self, source: LineageNode, target: LineageNode) -> None:
+        """Adds an edge, and its nodes if they don't exist yet."""
+        self.nodes.setdefault(source, {})
+        self.nodes.setdefault(target, {})
+        self._successors[source].add(target)
+        self._predecessors[target].add(source)
+
+    def has_node(self, node: LineageNode) -> bool:
+        """Returns whether the node is part of the graph."""
+        return node in self.nodes
+
+    def successors(self, node: LineageNode) -> List[LineageNode]:
+        """Returns the nodes that consumed or were produced by a node."""
+        return sorted(self._successors.get(node, ()))
+
+    def predecessors(self, node: LineageNode) -> List[LineageNode]:
+        """Returns the nodes that were consumed by or produced a node."""
+        return sorted(self._predecessors.get(node, ()))
+
+    def artifact_ids(self) -> List[int]:
+        """Returns the IDs of all artifacts in the graph."""
+        return sorted(id_ for kind, id_ in self.nodes if kind == ARTIFACT_NODE)
+
+    def execution_ids(self) -> List[int]:
+        """Returns the IDs of all executions in the graph."""
+        return sorted(id_ for kind, id_ in self.nodes if kind == EXECUTION_NODE)
+
+    def get_pipeline_run_names(self, execution_id: int) -> List[str]:
+        """Returns the names of the pipeline runs an execution belongs to."""
+        store = self._metadata_store.read_store
+        run_context_type = store.get_context_type(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME
+        )
+        return sorted(
+            context.name
+            for context in store.get_contexts_by_execution(execution_id)
+            if context.type_id == run_context_type.id
+        )
+
+    def to_networkx(self) -> Any:
+        """Converts the graph to a `networkx.DiGraph`.
+
+        Raises:
+            ImportError: If networkx is not installed.
+        """
+        try:
+            import networkx
+        except ImportError as e:
+            raise ImportError(
+                "Converting a lineage graph requires networkx, install it "
+                "with `pip install networkx`."
+            ) from e
+
+        graph = networkx.DiGraph()
+        graph.add_nodes_from(self.nodes.items())
+        graph.add_edges_from(self.edges)
+        return graph
+
+    def __len__(self) -> int:
+        """Returns the number of nodes."""
+        return len(self.nodes)
+
+    def __contains__(self, node: Any) -> bool:
+        """Returns whether the node is part of the graph."""
+        return node in self.nodes
+
+    def __repr__(self) -> str:
+        """Returns a string representation of the graph."""
+        return (
+            f"{self.__class__.__qualname__}(nodes={len(self.nodes)}, "
+            f"edges={len(self.edges)})"
+        )
+
+
+class LineageIndex:
+    """Persistent adjacency index of the lineage in a metadata store.
+
+    The index stores all edges between artifacts and executions in a local
+    SQLite database, so lineage queries don't need to read any events from
+    the metadata store. It is synchronized incrementally: executions are
+    indexed once they reached a terminal state, after which their events
+    don't change anymore. Executions which are still running are checked
+    again on the next synchronization.
+    """
+
+    def __init__(self, metadata_store: BaseMetadataStore, path: str):
+        """Opens (or creates) the index.
+
+        Args:
+            metadata_store: The metadata store to index.
+            path: Path of the SQLite file in which the index is stored.
+        """
+        self._metadata_store = metadata_store
+        self._path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS edges (
+                source_kind TEXT NOT NULL,
+                source_id INTEGER NOT NULL,
+                target_kind TEXT NOT NULL,
+                target_id INTEGER NOT NULL,
+                PRIMARY KEY (source_kind, source_id, target_kind, target_id)
+            );
+            CREATE INDEX IF NOT EXISTS edges_by_target
+                ON edges (target_kind, target_id);
+            CREATE TABLE IF NOT EXISTS pending_executions (
+                id INTEGER PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+    @property
+    def path(self) -> str:
+        """Path of the SQLite file in which the index is stored."""
+        return self._path
+
+    def _get_state(self, key: str, default: Any) -> Any:
+        """Reads a value from the state table."""
+        row = self._connection.execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_state(self, key: str, value: Any) -> None:
+        """Writes a value to the state table."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def sync(self) -> int:
+        """Adds the edges of all executions that finished since the last
+        synchronization.
+
+        Returns:
+            The number of newly indexed executions.
+        """
+        store = self._metadata_store.read_store
+        last_execution_id = self._get_state("last_execution_id", 0)
+        pending_ids = [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT id FROM pending_executions"
+            )
+        ]
+
+        executions: List[proto.Execution] = []
+        for batch in _batched(pending_ids, LINEAGE_BATCH_SIZE):
+            executions.extend(store.get_executions_by_id(batch))
+        executions.extend(
+            store.get_executions(
+                list_options=metadata_store.ListOptions(
+                    order_by=metadata_store.OrderByField.ID,
+                    is_asc=True,
+                    filter_query=f"id > {last_execution_id}",
+                )
+            )
+        )
+
+        finished_ids = [
+            execution.id
+            for execution in executions
+            if execution.last_known_state in TERMINAL_EXECUTION_STATES
+        ]
+        running_ids = [
+            execution.id
+            for execution in executions
+            if execution.last_known_state not in TERMINAL_EXECUTION_STATES
+        ]
+
+        with self._connection:
+            for batch in _batched(finished_ids, LINEAGE_BATCH_SIZE):
+                edges = _edges_from_events(
+                    store.get_events_by_execution_ids(batch)
+                )
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO edges VALUES (?, ?, ?, ?)",
+                    [
+                        (source[0], source[1], target[0], target[1])
+                        for source, target in edges
+                    ],
+                )
+            self._connection.execute("DELETE FROM pending_executions")
+            self._connection.executemany(
+                "INSERT INTO pending_executions (id) VALUES (?)",
+                [(id_,) for id_ in running_ids],
+            )
+            self._set_state(
+                "last_execution_id",
+                max(
+                    [last_execution_id]
+                    + [execution.id for execution in executions]
+                ),
+            )
+
+        logger.debug(
+            "Indexed lineage of %d executions, %d executions pending.",
+            len(finished_ids),
+            len(running_ids),
+        )
+        return len(finished_ids)
+
+    def get_edges(
+        self, nodes: List[LineageNode], downstream: bool
+    ) -> Set[LineageEdge]:
+        """Returns all edges that start (downstream) or end (upstream) at
+        one of the given nodes."""
+        column = "source" if downstream else "target"
+        edges: Set[LineageEdge] = set()
+        for kind in (ARTIFACT_NODE, EXECUTION_NODE):
+            ids = sorted(id_ for node_kind, id_ in nodes if node_kind == kind)
+            for batch in _batched(ids, LINEAGE_BATCH_SIZE):
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT source_kind, source_id, target_kind, target_id "
+                    f"FROM edges WHERE {column}_kind = ? "
+                    f"AND {column}_id IN ({placeholders})",
+                    [kind, *batch],
+                )
+                edges.update(
+                    ((row[0], row[1]), (row[2], row[3])) for row in rows
+                )
+        return edges
+
+    def remove_executions(self, execution_ids: Iterable[int]) -> None:
+        """Removes the edges of executions that were deleted from the
+        metadata store."""
+        rows = [(EXECUTION_NODE, id_) for id_ in execution_ids]
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM edges WHERE source_kind = ? AND source_id = ?",
+                rows,
+            )
+            self._connection.executemany(
+                "DELETE FROM edges WHERE target_kind = ? AND target_id = ?",
+                rows,
+            )
+            self._connection.executemany(
+                "DELETE FROM pending_executions WHERE id = ?",
+                [(id_,) for _, id_ in rows],
+            )
+
+    def close(self) -> None:
+        """Closes the connection to the index."""
+        self._connection.close()
+
+
+def _get_edges_from_store(
+    store: metadata_store.MetadataStore,
+    nodes: List[LineageNode],
+) -> Set[LineageEdge]:
+    """Returns all edges of the given nodes, with one bulk query per node
+    kind and batch."""
+    artifact_ids = sorted(id_ for kind, id_ in nodes if kind == ARTIFACT_NODE)
+    execution_ids = sorted(id_ for kind, id_ in nodes if kind == EXECUTION_NODE)
+    edges: Set[LineageEdge] = set()
+    for batch in _batched(artifact_ids, LINEAGE_BATCH_SIZE):
+        edges.update(
+            _edges_from_events(store.get_events_by_artifact_ids(batch))
+        )
+    for batch in _batched(execution_ids, LINEAGE_BATCH_SIZE):
+        edges.update(
+            _edges_from_events(store.get_events_by_execution_ids(batch))
+        )
+    return edges
+
+
+def load_lineage(
+    metadata_store: BaseMetadataStore,
+    start_nodes: List[LineageNode],
+    direction: str = BOTH,
+    max_depth: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    index: Optional[LineageIndex] = None,
+) -> LineageGraph:
+    """Loads the lineage of artifacts or executions with a bounded
+    breadth-first search.
+
+    Every level of the search reads the events of all nodes of that level
+    with one bulk query per node kind (or from the `index`), and the
+    attributes of all nodes are read with one bulk query per node kind at
+    the end.
+
+    Args:
+        metadata_store: The metadata store to load the lineage from.
+        start_nodes: The nodes to start the search from.
+        direction: `"upstream"` to follow the data flow backwards (what
+            was used to produce the start nodes), `"downstream"` to follow
+            it forwards (what used the start nodes) or `"both"`.
+        max_depth: Maximum number of hops from the start nodes.
+        max_nodes: Maximum number of nodes in the graph. The search stops
+            after the level at which this number was reached.
+        index: Optional adjacency index to read the edges from. It is
+            synchronized before the search.
+
+    Returns:
+        The lineage graph.
+
+    Raises:
+        ValueError: If the direction is invalid.
+    """
+    if direction not in (UPSTREAM, DOWNSTREAM, BOTH):
+        raise ValueError(
+            f"Invalid direction '{direction}', must be one of "
+            f"'{UPSTREAM}', '{DOWNSTREAM}' or '{BOTH}'."
+        )
+
+    if index is not None:
+        index.sync()
+
+    store = metadata_store.read_store
+    graph = LineageGraph(metadata_store)
+    for node in start_nodes:
+        graph.add_node(node, depth=0)
+
+    searches = [
+        (downstream, list(start_nodes), set(start_nodes))
+        for downstream, enabled in (
+            (False, direction in (UPSTREAM, BOTH)),
+            (True, direction in (DOWNSTREAM, BOTH)),
+        )
+        if enabled
+    ]
+    for downstream, frontier, visited in searches:
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            if max_nodes is not None and len(graph) >= max_nodes:
+                logger.debug("Stopping lineage search at %d nodes.", max_nodes)
+                break
+            depth += 1
+            if index is not None:
+                edges = index.get_edges(frontier, downstream=downstream)
+            else:
+                frontier_nodes = set(frontier)
+                edges = {
+                    edge
+                    for edge in _get_edges_from_store(store, frontier)
+                    if (edge[0] if downstream else edge[1]) in frontier_nodes
+                }
+
+            next_frontier = []
+            for source, target in sorted(edges):
+                graph.add_edge(source, target)
+                neighbour = target if downstream else source
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    next_frontier.append(neighbour)
+                    graph.add_node(neighbour, depth=depth)
+                elif "depth" not in graph.nodes[neighbour]:
+                    graph.add_node(neighbour, depth=depth)
+            frontier = next_frontier
+
+    _add_node_attributes(store, graph)
+    return graph
+
+
+def _add_node_attributes(
+    store: metadata_store.MetadataStore, graph: LineageGraph
+) -> None:
+    """Reads the attributes of all nodes of the graph in bulk."""
+    artifact_ids = graph.artifact_ids()
+    execution_ids = graph.execution_ids()
+
+    artifacts: List[proto.Artifact] = []
+    for batch in _batched(artifact_ids, LINEAGE_BATCH_SIZE):
+        artifacts.extend(store.get_artifacts_by_id(batch))
+    executions: List[proto.Execution] = []
+    for batch in _batched(execution_ids, LINEAGE_BATCH_SIZE):
+        executions.extend(store.get_executions_by_id(batch))
+
+    artifact_types: Dict[int, str] = {}
+    if artifacts:
+        artifact_types = {
+            type_.id: type_.name
+            for type_ in store.get_artifact_types_by_id(
+                sorted({artifact.type_id for artifact in artifacts})
+            )
+        }
+    execution_types: Dict[int, str] = {}
+    if executions:
+        execution_types = {
+            type_.id: type_.name
+            for type_ in store.get_execution_types_by_id(
+                sorted({execution.type_id for execution in executions})
+            )
+        }
+
+    for artifact in artifacts:
+        graph.add_node(
+            (ARTIFACT_NODE, artifact.id),
+            type=artifact_types.get(artifact.type_id),
+            uri=artifact.uri,
+            state=proto.Artifact.State.Name(artifact.state),
+        )
+
+    step_name_key = (
+        INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
+    )
+    for execution in executions:
+        step_name = None
+        if step_name_key in execution.custom_properties:
+            step_name = json.loads(
+                execution.custom_properties[step_name_key].string_value
+            )
+        graph.add_node(
+            (EXECUTION_NODE, execution.id),
+            type=execution_types.get(execution.type_id),
+            step_name=step_name,
+            state=proto.Execution.State.Name(execution.last_known_state),
+        )
@@ -0,0 +1,678 @@
+import threading
+import time
+from collections import Counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from ml_metadata import proto
+from ml_metadata.metadata_store import metadata_store
+
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.constants import FINISHED_RUN_PROPERTY_KEY
+
+
+if TYPE_CHECKING:
+    from coalescenceml.metadata_store.snapshot import MetadataSnapshot
+
+
+logger = get_logger(__name__)
+
+M = TypeVar("M")
+
+# Executions in these states never change again, so they (and their events)
+# can be cached for the lifetime of the cache.
+TERMINAL_EXECUTION_STATES = frozenset(
+    {
+        proto.Execution.COMPLETE,
+        proto.Execution.CACHED,
+        proto.Execution.FAILED,
+        proto.Execution.CANCELED,
+    }
+)
+# Live artifacts can still be deleted or tagged, possibly by other clients
+FINAL_ARTIFACT_STATES = frozenset({proto.Artifact.DELETED})
+
+_TYPE_KINDS = ("execution", "artifact", "context")
+
+
+def _copy(message: M) -> M:
+    """Returns a copy of a proto message so callers can't modify cached
+    entries."""
+    clone = type(message)()  # type: ignore[call-arg]
+    clone.CopyFrom(message)  # type: ignore[attr-defined]
+    return clone
+
+
+class CacheStats:
+    """Hit and miss counters of a `MetadataCache`, per cached method."""
+
+    def __init__(self) -> None:
+        """Initializes all counters with zero."""
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of all lookups that were answered from the cache."""
+        hits = sum(self.hits.values())
+        lookups = hits + sum(self.misses.values())
+        return hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        """Returns the hits and misses of every cached method."""
+        return {
+            name: {"hits": self.hits[name], "misses": self.misses[name]}
+            for name in sorted(set(self.hits) | set(self.misses))
+        }
+
+    def reset(self) -> None:
+        """Resets all counters."""
+        self.hits.clear()
+        self.misses.clear()
+
+    def __repr__(self) -> str:
+        """String representation of the stats."""
+        return (
+            f"CacheStats(hit_rate={self.hit_rate:.2f}, "
+            f"hits={sum(self.hits.values())}, "
+            f"misses={sum(self.misses.values())})"
+        )
+
+
+class MetadataCache:
+    """Memoizing wrapper around an MLMD `MetadataStore`.
+
+    Most of what the post-execution API reads from MLMD never changes once
+    it was written: types, executions in a terminal state and their events.
+    These are cached for the lifetime of the wrapper, like deleted
+    artifacts. Executions which are still running, artifacts which may
+    still be deleted or tagged and listings which grow while a pipeline runs
+    (executions of a context, events of an artifact) are cached for `ttl`
+    seconds only.
+
+    If a `MetadataSnapshot` is given, the permanently cached entries and
+    the executions of finished pipeline runs are also stored on disk, so
+    they survive the process.
+
+    Writes which go through this wrapper invalidate the affected entries.
+    Writes by other clients (e.g. the TFX launcher, which uses its own
+    connection) only become visible once the respective entry expires, which
+    is why entries that may still change are never cached permanently. All
+    methods which are not cached are forwarded to the wrapped store.
+    """
+
+    def __init__(
+        self,
+        store: metadata_store.MetadataStore,
+        ttl: float = 5.0,
+        snapshot: Optional["MetadataSnapshot"] = None,
+    ):
+        """Initializes an empty cache.
+
+        Args:
+            store: The MLMD store to wrap.
+            ttl: Seconds after which entries that may still change expire.
+            snapshot: Persistent snapshot which backs the cache.
+        """
+        self._store = store
+        self._ttl = ttl
+        self._snapshot = snapshot
+        self._lock = threading.RLock()
+        self.stats = CacheStats()
+
+        self._types_by_id: Dict[str, Dict[int, Any]] = {
+            kind: {} for kind in _TYPE_KINDS
+        }
+        self._types_by_name: Dict[str, Dict[str, Any]] = {
+            kind: {} for kind in _TYPE_KINDS
+        }
+        self._all_types: Dict[str, Optional[List[Any]]] = {
+            kind: None for kind in _TYPE_KINDS
+        }
+        # entries are (value, expiry time or None if the entry never expires)
+        self._executions: Dict[int, Tuple[proto.Execution, Optional[float]]]
+        self._executions = {}
+        self._execution_events: Dict[int, List[proto.Event]] = {}
+        self._artifacts: Dict[int, Tuple[proto.Artifact, Optional[float]]]
+        self._artifacts = {}
+        self._listings: Dict[Hashable, Tuple[List[Any], float]] = {}
+
+    @property
+    def store(self) -> metadata_store.MetadataStore:
+        """The wrapped MLMD store."""
+        return self._store
+
+    def __getattr__(self, name: str) -> Any:
+        """Forwards all methods that are not cached to the wrapped store."""
+        return getattr(self._store, name)
+
+    def clear(self) -> None:
+        """Removes all entries from the cache and its snapshot."""
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.clear()
+            for kind in _TYPE_KINDS:
+                self._types_by_id[kind].clear()
+                self._types_by_name[kind].clear()
+                self._all_types[kind] = None
+            self._executions.clear()
+            self._execution_events.clear()
+            self._artifacts.clear()
+            self._listings.clear()
+
+    def _record(self, name: str, hits: int, misses: int) -> None:
+        """Updates the hit and miss counters of a method."""
+        self.stats.hits[name] += hits
+        self.stats.misses[name] += misses
+
+    def _expiry(self) -> float:
+        """Returns the expiry time for entries cached right now."""
+        return time.monotonic() + self._ttl
+
+    # Types
+
+    def _get_all_types(
+        self, kind: str, fetch: Callable[[], List[M]]
+    ) -> List[M]:
+        """Returns all types of a kind, fetching them once."""
+        with self._lock:
+            cached = self._all_types[kind]
+            if cached is None:
+                self._record(f"get_{kind}_types", 0, 1)
+                cached = list(fetch())
+                self._all_types[kind] = cached
+                self._add_types(kind, cached)
+            else:
+                self._record(f"get_{kind}_types", 1, 0)
+            return [_copy(type_) for type_ in cached]
+
+    def _add_types(self, kind: str, types: Iterable[Any]) -> None:
+        """Adds types to the ID and name lookups."""
+        for type_ in types:
+            self._types_by_id[kind][type_.id] = type_
+            self._types_by_name[kind][type_.name] = type_
+
+    def _get_types_by_id(
+        self,
+        kind: str,
+        type_ids: Sequence[int],
+        fetch: Callable[[List[int]], List[M]],
+    ) -> List[M]:
+        """Returns types by their IDs, fetching only unknown types."""
+        with self._lock:
+            known = self._types_by_id[kind]
+            missing = sorted({id_ for id_ in type_ids if id_ not in known})
+            if missing and self._snapshot is not None:
+                self._add_types(kind, self._snapshot.get_types(kind, missing))
+                missing = [id_ for id_ in missing if id_ not in known]
+            self._record(
+                f"get_{kind}_types_by_id",
+                len(type_ids) - len(missing),
+                len(missing),
+            )
+            if missing:
+                fetched = fetch(missing)
+                self._add_types(kind, fetched)
+                if self._snapshot is not None:
+                    self._snapshot.put_types(kind, fetched)
+                # another client created new types, the list of all types is
+                # outdated
+                self._all_types[kind] = None
+            return [_copy(known[id_]) for id_ in type_ids if id_ in known]
+
+    def _get_type(
+        self, kind: str, type_name: str, fetch: Callable[[str], M]
+    ) -> M:
+        """Returns a type by its name, fetching it if it's unknown."""
+        with self._lock:
+            type_ = self._types_by_name[kind].get(type_name)
+            if type_ is None:
+                self._record(f"get_{kind}_type", 0, 1)
+                type_ = fetch(type_name)
+                self._add_types(kind, [type_])
+            else:
+                self._record(f"get_{kind}_type", 1, 0)
+            return _copy(type_)
+
+    def _invalidate_types(self, kind: str) -> None:
+        """Invalidates the cached types of a kind after a type was written."""
+        with self._lock:
+            self._types_by_id[kind].clear()
+            self._types_by_name[kind].clear()
+            self._all_types[kind] = None
+
+    def get_execution_types(self) -> List[proto.ExecutionType]:
+        """Cached version of `MetadataStore.get_execution_types`."""
+        return self._get_all_types("execution", self._store.get_execution_types)
+
+    def get_artifact_types(self) -> List[proto.ArtifactType]:
+        """Cached version of `MetadataStore.get_artifact_types`."""
+        return self._get_all_types("artifact", self._store.get_artifact_types)
+
+    def get_context_types(self) -> List[proto.ContextType]:
+        """Cached version of `MetadataStore.get_context_types`."""
+        return self._get_all_types("context", self._store.get_context_types)
+
+    def get_execution_types_by_id(
+        self, type_ids: Sequence[int]
+    ) -> List[proto.ExecutionType]:
+        """Cached version of `MetadataStore.get_execution_types_by_id`."""
+        return self._get_types_by_id(
+            "execution", type_ids, self._store.get_execution_types_by_id
+        )
+
+    def get_artifact_types_by_id(
+        self, type_ids: Sequence[int]
+    ) -> List[proto.ArtifactType]:
+        """Cached version of `MetadataStore.get_artifact_types_by_id`."""
+        return self._get_types_by_id(
+            "artifact", type_ids, self._store.get_artifact_types_by_id
+        )
+
+    def get_context_types_by_id(
+        self, type_ids: Sequence[int]
+    ) -> List[proto.ContextType]:
+        """Cached version of `MetadataStore.get_context_types_by_id`."""
+        return self._get_types_by_id(
+            "context", type_ids, self._store.get_context_types_by_id
+        )
+
+    def get_execution_type(self, type_name: str) -> proto.ExecutionType:
+        """Cached version of `MetadataStore.get_execution_type`."""
+        return self._get_type(
+            "execution", type_name, self._store.get_execution_type
+        )
+
+    def get_artifact_type(self, type_name: str) -> proto.ArtifactType:
+        """Cached version of `MetadataStore.get_artifact_type`."""
+        return self._get_type(
+            "artifact", type_name, self._store.get_artifact_type
+        )
+
+    def get_context_type(self, type_name: str) -> proto.ContextType:
+        """Cached version of `MetadataStore.get_context_type`."""
+        return self._get_type(
+            "context", type_name, self._store.get_context_type
+        )
+
+    def put_execution_type(self, *args: Any, **kwargs: Any) -> int:
+        """Writes an execution type and invalidates the cached types."""
+        self._invalidate_types("execution")
+        return self._store.put_execution_type(*args, **kwargs)
+
+    def put_artifact_type(self, *args: Any, **kwargs: Any) -> int:
+        """Writes an artifact type and invalidates the cached types."""
+        self._invalidate_types("artifact")
+        return self._store.put_artifact_type(*args, **kwargs)
+
+    def put_context_type(self, *args: Any, **kwargs: Any) -> int:
+        """Writes a context type and invalidates the cached types."""
+        self._invalidate_types("context")
+        return self._store.put_context_type(*args, **kwargs)
+
+    # Executions
+
+    def _cache_executions(
+        self, executions: Iterable[proto.Execution], persist: bool = True
+    ) -> None:
+        """Caches executions, permanently if they're in a terminal state.
+
+        Args:
+            executions: The executions to cache.
+            persist: Whether to store the permanently cached executions in
+                the snapshot.
+        """
+        expiry = self._expiry()
+        permanent_executions = []
+        for execution in executions:
+            permanent = execution.last_known_state in TERMINAL_EXECUTION_STATES
+            self._executions[execution.id] = (
+                _copy(execution),
+                None if permanent else expiry,
+            )
+            if permanent:
+                permanent_executions.append(execution)
+        if persist and self._snapshot is not None:
+            self._snapshot.put_executions(permanent_executions)
+
+    def _get_cached_execution(
+        self, execution_id: int
+    ) -> Optional[proto.Execution]:
+        """Returns a cached execution if it exists and didn't expire."""
+        entry = self._executions.get(execution_id)
+        if entry is None:
+            return None
+        execution, expiry = entry
+        if expiry is not None and expiry < time.monotonic():
+            del self._executions[execution_id]
+            return None
+        return execution
+
+    def _is_terminal(self, execution_id: int) -> bool:
+        """Returns whether an execution is cached in a terminal state."""
+        entry = self._executions.get(execution_id)
+        return entry is not None and entry[1] is None
+
+    def get_executions_by_id(
+        self, execution_ids: Sequence[int]
+    ) -> List[proto.Execution]:
+        """Cached version of `MetadataStore.get_executions_by_id`.
+
+        Executions in a terminal state are cached permanently, all others
+        for `ttl` seconds.
+        """
+        with self._lock:
+            missing = sorted(
+                {
+                    id_
+                    for id_ in execution_ids
+                    if self._get_cached_execution(id_) is None
+                }
+            )
+            if missing and self._snapshot is not None:
+                self._cache_executions(
+                    self._snapshot.get_executions(missing), persist=False
+                )
+                missing = [
+                    id_ for id_ in missing if id_ not in self._executions
+                ]
+            self._record(
+                "get_executions_by_id",
+                len(execution_ids) - len(missing),
+                len(missing),
+            )
+            if missing:
+                self._cache_executions(
+                    self._store.get_executions_by_id(missing)
+                )
+            return [
+                _copy(self._executions[id_][0])
+                for id_ in execution_ids
+                if id_ in self._executions
+            ]
+
+    def get_executions_by_context(
+        self, context_id: int, *args: Any, **kwargs: Any
+    ) -> List[proto.Execution]:
+        """Cached version of `MetadataStore.get_executions_by_context`.
+
+        New executions get added to a context while its pipeline is running,
+        so the listing is cached for `ttl` seconds only. Calls with list
+        options are forwarded to the wrapped store.
+        """
+        if args or kwargs:
+            return self._store.get_executions_by_context(
+                context_id, *args, **kwargs
+            )
+        if self._snapshot is not None:
+            execution_ids = self._snapshot.get_context_executions(context_id)
+            if execution_ids is not None:
+                self._record("executions_by_context", 1, 0)
+                return self.get_executions_by_id(execution_ids)
+
+        executions = self._get_listing(
+            ("executions_by_context", context_id),
+            lambda: self._store.get_executions_by_context(context_id),
+            on_fetch=self._cache_executions,
+        )
+        if (
+            self._snapshot is not None
+            and executions
+            and all(
+                execution.last_known_state in TERMINAL_EXECUTION_STATES
+                for execution in executions
+            )
+            and self._is_finished_run(context_id)
+        ):
+            self._snapshot.put_context_executions(
+                context_id, [execution.id for execution in executions]
+            )
+        return executions
+
+    def _is_finished_run(self, context_id: int) -> bool:
+        """Returns whether a context is a pipeline run which was marked as
+        finished, so no executions will be added to it anymore."""
+        contexts = self._store.get_contexts_by_id([context_id])
+        return bool(contexts) and (
+            FINISHED_RUN_PROPERTY_KEY in contexts[0].custom_properties
+        )
+
+    def put_executions(self, executions: Sequence[proto.Execution]) -> Any:
+        """Writes executions and invalidates their cached versions."""
+        self._invalidate_executions(executions)
+        return self._store.put_executions(executions)
+
+    def put_execution(
+        self, execution: proto.Execution, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Writes an execution with its artifacts and events and invalidates
+        all affected entries."""
+        self._invalidate_executions([execution])
+        artifacts_and_events = (
+            args[0] if args else kwargs.get("artifact_and_events", [])
+        )
+        self._invalidate_artifacts(
+            [artifact for artifact, _ in artifacts_and_events]
+        )
+        return self._store.put_execution(execution, *args, **kwargs)
+
+    def put_attributions_and_associations(
+        self, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Writes attributions and associations and invalidates the cached
+        listings."""
+        with self._lock:
+            self._listings.clear()
+        return self._store.put_attributions_and_associations(*args, **kwargs)
+
+    def _invalidate_executions(
+        self, executions: Iterable[proto.Execution]
+    ) -> None:
+        """Removes executions and their events from the cache."""
+        with self._lock:
+            execution_ids = [
+                execution.id
+                for execution in executions
+                if execution.HasField("id")
+            ]
+            for execution_id in execution_ids:
+                self._executions.pop(execution_id, None)
+                self._execution_events.pop(execution_id, None)
+            if self._snapshot is not None:
+                self._snapshot.remove_executions(execution_ids)
+            self._listings.clear()
+
+    # Events
+
+    def get_events_by_execution_ids(
+        self, execution_ids: Sequence[int]
+    ) -> List[proto.Event]:
+        """Cached version of `MetadataStore.get_events_by_execution_ids`.
+
+        Events of executions that are cached in a terminal state are cached
+        permanently, events of all other executions are always fetched.
+        """
+        with self._lock:
+            missing = sorted(
+                {
+                    id_
+                    for id_ in execution_ids
+                    if id_ not in self._execution_events
+                }
+            )
+            if missing and self._snapshot is not None:
+                self._execution_events.update(
+                    self._snapshot.get_events(missing)
+                )
+                missing = [
+                    id_ for id_ in missing if id_ not in self._execution_events
+                ]
+            self._record(
+                "get_events_by_execution_ids",
+                len(set(execution_ids)) - len(missing),
+                len(missing),
+            )
+            fetched: Dict[int, List[proto.Event]] = {id_: [] for id_ in missing}
+            if missing:
+                for event in self._store.get_events_by_execution_ids(missing):
+                    fetched[event.execution_id].append(event)
+                terminal_events = {
+                    id_: events
+                    for id_, events in fetched.items()
+                    if self._is_terminal(id_)
+                }
+                self._execution_events.update(terminal_events)
+                if self._snapshot is not None:
+                    self._snapshot.put_events(terminal_events)
+
+            events = []
+            for id_ in dict.fromkeys(execution_ids):
+                source = self._execution_events.get(id_, fetched.get(id_, []))
+                events.extend(_copy(event) for event in source)
+            return events
+
+    def get_events_by_artifact_ids(
+        self, artifact_ids: Sequence[int]
+    ) -> List[proto.Event]:
+        """Cached version of `MetadataStore.get_events_by_artifact_ids`.
+
+        Every execution that consumes an artifact adds an event to it, so
+        the events are cached for `ttl` seconds only.
+        """
+        return self._get_listing(
+            ("events_by_artifact_ids", tuple(artifact_ids)),
+            lambda: self._store.get_events_by_artifact_ids(artifact_ids),
+        )
+
+    # Artifacts
+
+    def _cache_artifacts(
+        self, artifacts: Iterable[proto.Artifact], persist: bool = True
+    ) -> None:
+        """Caches artifacts, permanently if they're in a final state.
+
+        Args:
+            artifacts: The artifacts to cache.
+            persist: Whether to store the permanently cached artifacts in
+                the snapshot.
+        """
+        expiry = self._expiry()
+        permanent_artifacts = []
+        for artifact in artifacts:
+            permanent = artifact.state in FINAL_ARTIFACT_STATES
+            self._artifacts[artifact.id] = (
+                _copy(artifact),
+                None if permanent else expiry,
+            )
+            if permanent:
+                permanent_artifacts.append(artifact)
+        if persist and self._snapshot is not None:
+            self._snapshot.put_artifacts(permanent_artifacts)
+
+    def _get_cached_artifact(
+        self, artifact_id: int
+    ) -> Optional[proto.Artifact]:
+        """Returns a cached artifact if it exists and didn't expire."""
+        entry = self._artifacts.get(artifact_id)
+        if entry is None:
+            return None
+        artifact, expiry = entry
+        if expiry is not None and expiry < time.monotonic():
+            del self._artifacts[artifact_id]
+            return None
+        return artifact
+
+    def get_artifacts_by_id(
+        self, artifact_ids: Sequence[int]
+    ) -> List[proto.Artifact]:
+        """Cached version of `MetadataStore.get_artifacts_by_id`.
+
+        Artifacts in a final state are cached permanently, all others for
+        `ttl` seconds.
+        """
+        with self._lock:
+            missing = sorted(
+                {
+                    id_
+                    for id_ in artifact_ids
+                    if self._get_cached_artifact(id_) is None
+                }
+            )
+            if missing and self._snapshot is not None:
+                self._cache_artifacts(
+                    [
+                        artifact
+                        for artifact in self._snapshot.get_artifacts(missing)
+                        if artifact.state in FINAL_ARTIFACT_STATES
+                    ],
+                    persist=False,
+                )
+                missing = [id_ for id_ in missing if id_ not in self._artifacts]
+            self._record(
+                "get_artifacts_by_id",
+                len(artifact_ids) - len(missing),
+                len(missing),
+            )
+            if missing:
+                self._cache_artifacts(self._store.get_artifacts_by_id(missing))
+            return [
+                _copy(self._artifacts[id_][0])
+                for id_ in artifact_ids
+                if id_ in self._artifacts
+            ]
+
+    def put_artifacts(self, artifacts: Sequence[proto.Artifact]) -> Any:
+        """Writes artifacts and invalidates their cached versions."""
+        self._invalidate_artifacts(artifacts)
+        return self._store.put_artifacts(artifacts)
+
+    def _invalidate_artifacts(
+        self, artifacts: Iterable[proto.Artifact]
+    ) -> None:
+        """Removes artifacts from the cache."""
+        with self._lock:
+            artifact_ids = [
+                artifact.id for artifact in artifacts if artifact.HasField("id")
+            ]
+            for artifact_id in artifact_ids:
+                self._artifacts.pop(artifact_id, None)
+            if self._snapshot is not None:
+                self._snapshot.remove_artifacts(artifact_ids)
+            self._listings.clear()
+
+    # Listings
+
+    def _get_listing(
+        self,
+        key: Hashable,
+        fetch: Callable[[], List[M]],
+        on_fetch: Optional[Callable[[List[M]], None]] = None,
+    ) -> List[M]:
+        """Returns a listing which is cached for `ttl` seconds."""
+        name = str(key[0]) if isinstance(key, tuple) else str(key)
+        with self._lock:
+            entry = self._listings.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._record(name, 1, 0)
+                return [_copy(value) for value in entry[0]]
+
+            self._record(name, 0, 1)
+            values = list(fetch())
+            self._listings[key] = (
+                [_copy(value) for value in values],
+                self._expiry(),
+            )
+            if on_fetch:
+                on_fetch(values)
+            return values
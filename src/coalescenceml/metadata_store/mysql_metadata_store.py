@@ -1,19 +1,79 @@
-from typing import ClassVar, Union
+from typing import Callable, ClassVar, Optional, Union, cast
 
+from ml_metadata import errors
+from ml_metadata.metadata_store import metadata_store
 from ml_metadata.proto import metadata_store_pb2
+from pydantic import validator
+from sqlalchemy.engine import URL
 from tfx.orchestration import metadata
 
 from coalescenceml.metadata_store import BaseMetadataStore
+from coalescenceml.metadata_store.connection_pool import ConnectionPool
+from coalescenceml.metadata_store.retry import RetryingConnection
+
+
+# Errors after which the failed transaction was rolled back and can be
+# retried safely
+_RETRYABLE_MESSAGES = ("Deadlock found", "Lock wait timeout exceeded")
+# Errors after which the connection can't be used anymore
+_CONNECTION_LOST_MESSAGES = (
+    "MySQL server has gone away",
+    "Lost connection to MySQL server",
+    "Can't connect to MySQL server",
+)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Returns whether an MLMD call failed with a transient error after
+    which the call had no effect."""
+    if isinstance(error, errors.AbortedError):
+        return True
+    return isinstance(error, errors.StatusError) and any(
+        message in str(error) for message in _RETRYABLE_MESSAGES
+    )
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Returns whether an MLMD call failed because the connection to the
+    MySQL server was lost or couldn't be established."""
+    if isinstance(error, errors.UnavailableError):
+        return True
+    return isinstance(error, errors.StatusError) and any(
+        message in str(error) for message in _CONNECTION_LOST_MESSAGES
+    )
 
 
 class MySQLMetadataStore(BaseMetadataStore):
-    """MySQL backend for CoalescenceML metadata store."""
+    """MySQL backend for CoalescenceML metadata store.
+
+    Attributes:
+        host: Host of the MySQL server.
+        port: Port of the MySQL server.
+        database: Name of the database.
+        username: Name of the MySQL user.
+        password: Password of the MySQL user.
+        replica_host: Host of a read replica of the database. If set, the
+            read paths of the post-execution API query the replica instead
+            of the primary server, while pipelines write to the primary.
+        replica_port: Port of the read replica, defaults to `port`.
+        pool_size: Maximum number of connections that are opened to each
+            server. Connections are opened lazily, so this only has an
+            effect if the metadata store is used by multiple threads.
+        retry_timeout: Seconds for which calls that failed with a transient
+            error (deadlocks, lock wait timeouts and, for reads, lost
+            connections) get retried with exponential backoff. Set to `0`
+            to disable retries.
+    """
 
     host: str
     port: int
     database: str
     username: str
     password: str
+    replica_host: Optional[str] = None
+    replica_port: Optional[int] = None
+    pool_size: int = 4
+    retry_timeout: float = 10.0
 
     # Class Configuration
     FLAVOR: ClassVar[str] = "mysql"
@@ -32,3 +92,75 @@ class MySQLMetadataStore(BaseMetadataStore):
             username=self.username,
             password=self.password,
         )
+
+    def get_replica_tfx_metadata_config(
+        self,
+    ) -> Optional[metadata_store_pb2.ConnectionConfig]:
+        """Return tfx metadata config for the read replica of the mysql
+        metadata store."""
+        if not self.replica_host:
+            return None
+
+        return metadata.mysql_metadata_connection_config(
+            host=self.replica_host,
+            port=self.replica_port or self.port,
+            database=self.database,
+            username=self.username,
+            password=self.password,
+        )
+
+    def get_database_url(self) -> Optional[str]:
+        """Return the SQLAlchemy URL of the primary mysql database."""
+        # Select PyMySQL explicitly, SQLAlchemy would default to mysqlclient
+        url = URL.create(
+            "mysql+pymysql",
+            username=self.username,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            database=self.database,
+        )
+        return url.render_as_string(hide_password=False)
+
+    def _connect(self) -> metadata_store.MetadataStore:
+        """Opens a pool of connections to the primary server."""
+        return self._create_pool(super()._connect)
+
+    def _connect_replica(self) -> Optional[metadata_store.MetadataStore]:
+        """Opens a pool of connections to the read replica."""
+        if self.get_replica_tfx_metadata_config() is None:
+            return None
+
+        def _factory() -> metadata_store.MetadataStore:
+            store = super(MySQLMetadataStore, self)._connect_replica()
+            assert store is not None
+            return store
+
+        return self._create_pool(_factory)
+
+    def _create_pool(
+        self, factory: Callable[[], metadata_store.MetadataStore]
+    ) -> metadata_store.MetadataStore:
+        """Creates a connection pool with retries on transient errors."""
+        pool = ConnectionPool(
+            factory, size=self.pool_size, is_broken=is_connection_error
+        )
+        if self.retry_timeout <= 0:
+            return cast(metadata_store.MetadataStore, pool)
+
+        return cast(
+            metadata_store.MetadataStore,
+            RetryingConnection(
+                cast(metadata_store.MetadataStore, pool),
+                is_retryable=is_transient_error,
+                timeout=self.retry_timeout,
+                is_retryable_read=is_connection_error,
+            ),
+        )
+
+    @validator("pool_size")
+    def ensure_pool_size_is_positive(cls, pool_size: int) -> int:
+        """Ensures that the pool allows at least one connection."""
+        if pool_size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {pool_size}.")
+        return pool_size
@@ -0,0 +1,564 @@
+from __future__ import annotations
+
+import os
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from ml_metadata.proto import metadata_store_pb2
+from pydantic import BaseModel
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.engine import Connection
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.artifacts.constants import TAGS_PROPERTY_KEY
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.constants import PINNED_RUN_PROPERTY_KEY
+from coalescenceml.metadata_store.export import MetadataExporter
+from coalescenceml.metadata_store.metadata_cache import (
+    TERMINAL_EXECUTION_STATES,
+)
+from coalescenceml.post_execution import PipelineView
+
+
+if TYPE_CHECKING:
+    from coalescenceml.metadata_store import BaseMetadataStore
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
+
+def _batched(items: List[T], batch_size: int) -> Iterator[List[T]]:
+    """Splits a list into consecutive batches of at most `batch_size`."""
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+def _execute(connection: Connection, statement: str, **parameters: Any) -> Any:
+    """Executes a SQL statement, expanding list parameters for `IN`
+    clauses."""
+    query = text(statement).bindparams(
+        *(
+            bindparam(name, expanding=True)
+            for name, value in parameters.items()
+            if isinstance(value, list)
+        )
+    )
+    return connection.execute(query, parameters)
+
+
+def measure_query_latency(
+    metadata_store: BaseMetadataStore, repetitions: int = 3
+) -> Dict[str, float]:
+    """Measures queries whose cost grows with the size of the store.
+
+    The queries bypass the metadata cache.
+
+    Args:
+        metadata_store: The metadata store to query.
+        repetitions: Number of times each query is run.
+
+    Returns:
+        The median latency of each query in seconds.
+    """
+    store = metadata_store.mlmd_store
+    queries: Dict[str, Callable[[], Any]] = {
+        "get_pipeline_run_contexts": lambda: store.get_contexts_by_type(
+            PIPELINE_RUN_CONTEXT_TYPE_NAME
+        ),
+        "get_contexts": store.get_contexts,
+        "get_executions": store.get_executions,
+        "get_artifacts": store.get_artifacts,
+    }
+    latencies = {}
+    for name, query in queries.items():
+        durations = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            query()
+            durations.append(time.perf_counter() - start)
+        latencies[name] = statistics.median(durations)
+    return latencies
+
+
+class PruningReport(BaseModel):
+    """Summary of a metadata pruning pass.
+
+    Attributes:
+        dry_run: If `True`, nothing was deleted and the report only shows what
+            would have been removed.
+        run_names: Names of the expired runs whose metadata gets deleted.
+        retained_run_names: Names of expired runs which are kept because
+            they produced artifacts that are still used by retained runs or
+            are tagged.
+        execution_ids: IDs of the executions that get deleted.
+        deleted_context_count: Number of deleted contexts, which includes
+            the contexts of the expired runs and contexts (e.g. of stacks or
+            requirements) that are no longer used by any execution.
+        deleted_artifact_count: Number of deleted artifacts. Only artifacts
+            whose data was already removed by the artifact garbage collector
+            are deleted.
+        archive_dir: Directory to which the expired runs were exported.
+        latency_before: Latency of representative queries before pruning.
+        latency_after: Latency of representative queries after pruning.
+    """
+
+    dry_run: bool
+    run_names: List[str] = []
+    retained_run_names: List[str] = []
+    execution_ids: List[int] = []
+    deleted_context_count: int = 0
+    deleted_artifact_count: int = 0
+    archive_dir: Optional[str] = None
+    latency_before: Dict[str, float] = {}
+    latency_after: Dict[str, float] = {}
+
+
+class MetadataPruner:
+    """Deletes the metadata of old pipeline runs.
+
+    A run expires if it is not among the last `keep_last_runs` runs of its
+    pipeline and was created more than `max_age` ago (criteria that are not
+    set don't retain any runs). Pinned runs (see
+    `BaseMetadataStore.pin_pipeline_run`) and runs with steps that are
+    still running never expire.
+
+    Runs that produced an artifact which is tagged or used by a retained
+    run are kept as well, including the runs they depend on, so the
+    lineage of all retained artifacts stays complete.
+
+    The executions, events and contexts of the expired runs are optionally
+    exported to parquet files and then deleted with direct SQL statements,
+    as MLMD has no API to delete metadata. The deletion happens in batches
+    with one transaction per batch.
+    """
+
+    def __init__(
+        self,
+        metadata_store: BaseMetadataStore,
+        keep_last_runs: Optional[int] = None,
+        max_age: Optional[timedelta] = None,
+        pinned_runs: Optional[Iterable[str]] = None,
+        archive_dir: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        """Initializes the pruner.
+
+        Args:
+            metadata_store: The metadata store to prune.
+            keep_last_runs: Number of most recent runs to retain for each
+                pipeline.
+            max_age: Runs created within this time span are retained.
+            pinned_runs: Names of additional runs to retain.
+            archive_dir: Directory to export the expired runs to before
+                deleting them.
+            batch_size: Maximum number of IDs sent to the database in a
+                single statement.
+
+        Raises:
+            ValueError: If neither `keep_last_runs` nor `max_age` is set,
+                `keep_last_runs` is negative or `batch_size` is not
+                positive.
+        """
+        if keep_last_runs is None and max_age is None:
+            raise ValueError(
+                "Either `keep_last_runs` or `max_age` must be set."
+            )
+        if keep_last_runs is not None and keep_last_runs < 0:
+            raise ValueError("`keep_last_runs` must not be negative.")
+        if batch_size <= 0:
+            raise ValueError("`batch_size` must be positive.")
+
+        self._metadata_store = metadata_store
+        self._keep_last_runs = keep_last_runs
+        self._max_age = max_age
+        self._pinned_runs = set(pinned_runs or [])
+        self._archive_dir = archive_dir
+        self._batch_size = batch_size
+
+    def _is_pinned(self, run: metadata_store_pb2.Context) -> bool:
+        """Returns whether a pipeline run context is pinned."""
+        if run.name in self._pinned_runs:
+            return True
+        pinned = run.custom_properties.get(PINNED_RUN_PROPERTY_KEY, None)
+        return bool(pinned and pinned.int_value)
+
+    def find_expired_runs(self) -> List[metadata_store_pb2.Context]:
+        """Returns the contexts of all runs that expired according to the
+        retention criteria, without considering their lineage."""
+        store = self._metadata_store.store
+        horizon = None
+        if self._max_age is not None:
+            horizon = (datetime.now() - self._max_age).timestamp() * 1000
+
+        expired = []
+        for pipeline_context in store.get_contexts_by_type(
+            PIPELINE_CONTEXT_TYPE_NAME
+        ):
+            pipeline = PipelineView(
+                id_=pipeline_context.id,
+                name=pipeline_context.name,
+                metadata_store=self._metadata_store,
+            )
+            runs = self._metadata_store._get_pipeline_run_contexts(  # noqa
+                pipeline
+            )
+            if self._keep_last_runs is not None:
+                runs = runs[: max(len(runs) - self._keep_last_runs, 0)]
+            expired.extend(
+                run
+                for run in runs
+                if not self._is_pinned(run)
+                and (horizon is None or run.create_time_since_epoch < horizon)
+            )
+        return expired
+
+    def plan(
+        self,
+    ) -> Tuple[
+        List[metadata_store_pb2.Context],
+        List[metadata_store_pb2.Context],
+        List[int],
+    ]:
+        """Determines the runs and executions to delete.
+
+        Returns:
+            The contexts of the runs to delete, the contexts of the expired
+            runs that are kept because of their lineage and the IDs of the
+            executions to delete.
+        """
+        store = self._metadata_store.store
+        runs: Dict[int, metadata_store_pb2.Context] = {}
+        run_executions: Dict[int, List[int]] = {}
+        for run in self.find_expired_runs():
+            executions = store.get_executions_by_context(run.id)
+            # never touch the metadata of runs that are still running
+            if all(
+                execution.last_known_state in TERMINAL_EXECUTION_STATES
+                for execution in executions
+            ):
+                runs[run.id] = run
+                run_executions[run.id] = [e.id for e in executions]
+
+        execution_runs = {
+            execution_id: run_id
+            for run_id, execution_ids in run_executions.items()
+            for execution_id in execution_ids
+        }
+        execution_artifacts: DefaultDict[int, Set[int]] = defaultdict(set)
+        producers: DefaultDict[int, Set[int]] = defaultdict(set)
+        for batch in _batched(sorted(execution_runs), self._batch_size):
+            for event in store.get_events_by_execution_ids(batch):
+                execution_artifacts[event.execution_id].add(event.artifact_id)
+                if event.type == event.OUTPUT:
+                    producers[event.artifact_id].add(event.execution_id)
+
+        # artifacts which are tagged or used outside of the expired runs
+        protected: Set[int] = set()
+        artifact_ids = sorted(set().union(*execution_artifacts.values()))
+        for batch in _batched(artifact_ids, self._batch_size):
+            protected.update(
+                event.artifact_id
+                for event in store.get_events_by_artifact_ids(batch)
+                if event.execution_id not in execution_runs
+            )
+            protected.update(
+                artifact.id
+                for artifact in store.get_artifacts_by_id(batch)
+                if TAGS_PROPERTY_KEY in artifact.custom_properties
+            )
+
+        # keep the runs which produced protected artifacts, which in turn
+        # protects all artifacts these runs used
+        retained_run_ids: Set[int] = set()
+        pending = list(protected)
+        while pending:
+            artifact_id = pending.pop()
+            for execution_id in producers.get(artifact_id, ()):
+                run_id = execution_runs[execution_id]
+                if run_id in retained_run_ids:
+                    continue
+                retained_run_ids.add(run_id)
+                for run_execution_id in run_executions[run_id]:
+                    for used_id in execution_artifacts[run_execution_id]:
+                        if used_id not in protected:
+                            protected.add(used_id)
+                            pending.append(used_id)
+
+        expired_runs = [
+            run
+            for run_id, run in runs.items()
+            if run_id not in retained_run_ids
+        ]
+        retained_runs = [runs[run_id] for run_id in sorted(retained_run_ids)]
+        execution_ids = sorted(
+            execution_id
+            for run in expired_runs
+            for execution_id in run_executions[run.id]
+        )
+        return expired_runs, retained_runs, execution_ids
+
+    def prune(
+        self, dry_run: bool = True, measure_latency: bool = False
+    ) -> PruningReport:
+        """Archives and deletes the metadata of all expired runs.
+
+        Args:
+            dry_run: If `True`, only report what would be deleted.
+            measure_latency: If `True`, measure the latency of representative
+                queries before and after pruning.
+
+        Returns:
+            A report of the deleted metadata.
+
+        Raises:
+            RuntimeError: If the metadata store doesn't allow direct access
+                to its database.
+        """
+        expired_runs, retained_runs, execution_ids = self.plan()
+        report = PruningReport(
+            dry_run=dry_run,
+            run_names=[run.name for run in expired_runs],
+            retained_run_names=[run.name for run in retained_runs],
+            execution_ids=execution_ids,
+        )
+        if measure_latency:
+            report.latency_before = measure_query_latency(self._metadata_store)
+        if not expired_runs:
+            logger.info("No expired pipeline runs found.")
+            return report
+        if dry_run:
+            logger.info(
+                "Dry run: %d expired runs with %d executions could be "
+                "deleted.",
+                len(expired_runs),
+                len(execution_ids),
+            )
+            return report
+
+        database_url = self._metadata_store.get_database_url()
+        if database_url is None:
+            raise RuntimeError(
+                f"Unable to prune metadata store "
+                f"'{self._metadata_store.name}', as its database can't be "
+                f"accessed directly."
+            )
+
+        if self._archive_dir:
+            report.archive_dir = os.path.join(
+                self._archive_dir, datetime.now().strftime("%Y%m%d-%H%M%S")
+            )
+            MetadataExporter(
+                self._metadata_store,
+                report.archive_dir,
+                run_ids=[run.id for run in expired_runs],
+            ).export()
+
+        engine = create_engine(database_url)
+        try:
+            context_ids = {run.id for run in expired_runs}
+            artifact_ids: Set[int] = set()
+            for batch in _batched(execution_ids, self._batch_size):
+                with engine.begin() as connection:
+                    (
+                        batch_context_ids,
+                        batch_artifact_ids,
+                    ) = self._delete_executions(connection, batch)
+                context_ids.update(batch_context_ids)
+                artifact_ids.update(batch_artifact_ids)
+
+            # the contexts of the expired runs aren't shared with other
+            # runs, so all of their attributions can be removed
+            for batch in _batched(
+                sorted(run.id for run in expired_runs), self._batch_size
+            ):
+                with engine.begin() as connection:
+                    _execute(
+                        connection,
+                        "DELETE FROM Attribution "
+                        "WHERE context_id IN :context_ids",
+                        context_ids=batch,
+                    )
+            for batch in _batched(sorted(context_ids), self._batch_size):
+                with engine.begin() as connection:
+                    report.deleted_context_count += (
+                        self._delete_unused_contexts(connection, batch)
+                    )
+            for batch in _batched(sorted(artifact_ids), self._batch_size):
+                with engine.begin() as connection:
+                    report.deleted_artifact_count += (
+                        self._delete_collected_artifacts(connection, batch)
+                    )
+        finally:
+            engine.dispose()
+
+        self._metadata_store.clear_cache()
+        lineage_index = self._metadata_store.lineage_index
+        if lineage_index is not None:
+            lineage_index.remove_executions(execution_ids)
+
+        if measure_latency:
+            report.latency_after = measure_query_latency(self._metadata_store)
+        logger.info(
+            "Deleted %d expired runs with %d executions.",
+            len(expired_runs),
+            len(execution_ids),
+        )
+        return report
+
+    def _delete_executions(
+        self, connection: Connection, execution_ids: List[int]
+    ) -> Tuple[Set[int], Set[int]]:
+        """Deletes executions with their properties, events and
+        associations.
+
+        Returns:
+            The IDs of the contexts the executions were associated with and
+            the IDs of the artifacts they consumed or produced.
+        """
+        context_ids = {
+            row[0]
+            for row in _execute(
+                connection,
+                "SELECT DISTINCT context_id FROM Association "
+                "WHERE execution_id IN :execution_ids",
+                execution_ids=execution_ids,
+            )
+        }
+        artifact_ids: Set[int] = set()
+        output_artifact_ids: Set[int] = set()
+        for artifact_id, event_type in _execute(
+            connection,
+            "SELECT artifact_id, type FROM Event "
+            "WHERE execution_id IN :execution_ids",
+            execution_ids=execution_ids,
+        ):
+            artifact_ids.add(artifact_id)
+            if event_type == metadata_store_pb2.Event.OUTPUT:
+                output_artifact_ids.add(artifact_id)
+
+        _execute(
+            connection,
+            "DELETE FROM EventPath WHERE event_id IN "
+            "(SELECT id FROM Event WHERE execution_id IN :execution_ids)",
+            execution_ids=execution_ids,
+        )
+        _execute(
+            connection,
+            "DELETE FROM Event WHERE execution_id IN :execution_ids",
+            execution_ids=execution_ids,
+        )
+        # attributions of the outputs to the contexts of the executions
+        # were created together with the executions
+        if context_ids:
+            for batch in _batched(
+                sorted(output_artifact_ids), self._batch_size
+            ):
+                _execute(
+                    connection,
+                    "DELETE FROM Attribution WHERE artifact_id IN "
+                    ":artifact_ids AND context_id IN :context_ids",
+                    artifact_ids=batch,
+                    context_ids=sorted(context_ids),
+                )
+        for statement in (
+            "DELETE FROM Association WHERE execution_id IN :execution_ids",
+            "DELETE FROM ExecutionProperty "
+            "WHERE execution_id IN :execution_ids",
+            "DELETE FROM Execution WHERE id IN :execution_ids",
+        ):
+            _execute(connection, statement, execution_ids=execution_ids)
+        return context_ids, artifact_ids
+
+    @staticmethod
+    def _delete_unused_contexts(
+        connection: Connection, context_ids: List[int]
+    ) -> int:
+        """Deletes the contexts which are neither associated with
+        executions or artifacts nor the parent of other contexts.
+
+        Pipeline contexts are never deleted.
+
+        Returns:
+            The number of deleted contexts.
+        """
+        unused_ids = [
+            row[0]
+            for row in _execute(
+                connection,
+                "SELECT c.id FROM Context c JOIN Type t ON c.type_id = t.id "
+                "WHERE c.id IN :context_ids AND t.name != :pipeline_type "
+                "AND NOT EXISTS "
+                "(SELECT 1 FROM Association a WHERE a.context_id = c.id) "
+                "AND NOT EXISTS "
+                "(SELECT 1 FROM Attribution a WHERE a.context_id = c.id) "
+                "AND NOT EXISTS "
+                "(SELECT 1 FROM ParentContext p "
+                "WHERE p.parent_context_id = c.id)",
+                context_ids=context_ids,
+                pipeline_type=PIPELINE_CONTEXT_TYPE_NAME,
+            )
+        ]
+        if not unused_ids:
+            return 0
+
+        for statement in (
+            "DELETE FROM ParentContext WHERE context_id IN :context_ids",
+            "DELETE FROM ContextProperty WHERE context_id IN :context_ids",
+            "DELETE FROM Context WHERE id IN :context_ids",
+        ):
+            _execute(connection, statement, context_ids=unused_ids)
+        return len(unused_ids)
+
+    @staticmethod
+    def _delete_collected_artifacts(
+        connection: Connection, artifact_ids: List[int]
+    ) -> int:
+        """Deletes artifacts which were removed by the artifact garbage
+        collector and are no longer used by any execution.
+
+        Returns:
+            The number of deleted artifacts.
+        """
+        collected_ids = [
+            row[0]
+            for row in _execute(
+                connection,
+                "SELECT a.id FROM Artifact a WHERE a.id IN :artifact_ids "
+                "AND a.state = :deleted AND NOT EXISTS "
+                "(SELECT 1 FROM Event e WHERE e.artifact_id = a.id)",
+                artifact_ids=artifact_ids,
+                deleted=metadata_store_pb2.Artifact.DELETED,
+            )
+        ]
+        if not collected_ids:
+            return 0
+
+        for statement in (
+            "DELETE FROM Attribution WHERE artifact_id IN :artifact_ids",
+            "DELETE FROM ArtifactProperty WHERE artifact_id IN :artifact_ids",
+            "DELETE FROM Artifact WHERE id IN :artifact_ids",
+        ):
+            _execute(connection, statement, artifact_ids=collected_ids)
+        return len(collected_ids)
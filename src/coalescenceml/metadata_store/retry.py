@@ -0,0 +1,107 @@
+import functools
+import random
+import time
+from typing import Any, Callable, Optional
+
+from ml_metadata.metadata_store import metadata_store
+
+from coalescenceml.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class RetryingConnection:
+    """Wrapper around an MLMD `MetadataStore` which retries failed calls.
+
+    Calls which fail with an error that `is_retryable` accepts are retried
+    with exponential backoff and jitter until they succeed or `timeout`
+    seconds have passed since the first attempt. All other errors are raised
+    immediately. Only errors which guarantee that the failed call had no
+    effect (e.g. a locked database or a transaction that was aborted) should
+    be retryable, as writes get retried as well. Errors after which it's
+    unknown whether the call had an effect (e.g. a lost connection) can be
+    accepted by `is_retryable_read`, which only applies to read methods.
+    """
+
+    def __init__(
+        self,
+        store: metadata_store.MetadataStore,
+        is_retryable: Callable[[Exception], bool],
+        timeout: float,
+        initial_backoff: float = 0.01,
+        max_backoff: float = 1.0,
+        is_retryable_read: Optional[Callable[[Exception], bool]] = None,
+    ):
+        """Initializes the wrapper.
+
+        Args:
+            store: The MLMD store to wrap.
+            is_retryable: Returns whether a call which failed with the given
+                error should be retried.
+            timeout: Seconds after the first attempt after which no more
+                retries are attempted.
+            initial_backoff: Seconds to wait before the first retry.
+            max_backoff: Maximum number of seconds to wait between retries.
+            is_retryable_read: Returns whether a call of a read method
+                (`get_*`) which failed with the given error should be
+                retried, in addition to the errors accepted by
+                `is_retryable`.
+        """
+        self._store = store
+        self._is_retryable = is_retryable
+        self._timeout = timeout
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._is_retryable_read = is_retryable_read
+
+    @property
+    def store(self) -> metadata_store.MetadataStore:
+        """The wrapped MLMD store."""
+        return self._store
+
+    def __getattr__(self, name: str) -> Any:
+        """Returns the attribute of the wrapped store, with retries if it's
+        a method."""
+        attribute = getattr(self._store, name)
+        if not callable(attribute):
+            return attribute
+
+        is_read = name.startswith("get_")
+
+        def _should_retry(error: Exception) -> bool:
+            if self._is_retryable(error):
+                return True
+            return (
+                is_read
+                and self._is_retryable_read is not None
+                and self._is_retryable_read(error)
+            )
+
+        @functools.wraps(attribute)
+        def _with_retries(*args: Any, **kwargs: Any) -> Any:
+            deadline = time.monotonic() + self._timeout
+            backoff = self._initial_backoff
+            attempt = 1
+            while True:
+                try:
+                    return attribute(*args, **kwargs)
+                except Exception as e:
+                    if (
+                        not _should_retry(e)
+                        or time.monotonic() + backoff > deadline
+                    ):
+                        raise
+                    logger.debug(
+                        "Attempt %d of metadata store call `%s` failed, "
+                        "retrying in %.2fs: %s",
+                        attempt,
+                        name,
+                        backoff,
+                        e,
+                    )
+                time.sleep(backoff * random.uniform(0.5, 1.0))
+                backoff = min(2 * backoff, self._max_backoff)
+                attempt += 1
+
+        return _with_retries
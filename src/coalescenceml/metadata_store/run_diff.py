@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from coalescenceml.enums import ExecutionStatus
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.base_metadata_store import (
+    get_execution_status_from_proto,
+)
+from coalescenceml.post_execution import (
+    ArtifactView,
+    PipelineRunView,
+    StepView,
+)
+
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class ArtifactDiff(BaseModel):
+    """Comparison of an output artifact of a step in two runs.
+
+    Attributes:
+        name: Name of the output.
+        uri_a: URI of the artifact in the first run.
+        uri_b: URI of the artifact in the second run.
+        checksum_a: Checksum of the artifact in the first run.
+        checksum_b: Checksum of the artifact in the second run.
+        size_a: Size of the artifact in the first run in bytes.
+        size_b: Size of the artifact in the second run in bytes.
+        changed: Whether the data of the artifact changed, `None` if this is
+            unknown because no checksum was recorded for one of them and
+            their sizes don't differ.
+    """
+
+    name: str
+    uri_a: Optional[str] = None
+    uri_b: Optional[str] = None
+    checksum_a: Optional[str] = None
+    checksum_b: Optional[str] = None
+    size_a: Optional[int] = None
+    size_b: Optional[int] = None
+    changed: Optional[bool] = None
+
+
+class StepDiff(BaseModel):
+    """Comparison of a step in two runs.
+
+    Attributes:
+        name: Name of the step.
+        status_a: Status of the step in the first run, `None` if the step
+            is not part of the first run.
+        status_b: Status of the step in the second run, `None` if the step
+            is not part of the second run.
+        duration_a: Duration of the step in the first run in seconds.
+        duration_b: Duration of the step in the second run in seconds.
+        parameters: Maps the names of all parameters whose values differ to
+            a tuple of the value in the first and second run. Parameters
+            that are missing in one of the runs have the value `None`.
+        outputs: Comparisons of all outputs of the step.
+    """
+
+    name: str
+    status_a: Optional[ExecutionStatus] = None
+    status_b: Optional[ExecutionStatus] = None
+    duration_a: Optional[float] = None
+    duration_b: Optional[float] = None
+    parameters: Dict[str, Tuple[Any, Any]] = {}
+    outputs: List[ArtifactDiff] = []
+
+    @property
+    def duration_change(self) -> Optional[float]:
+        """Seconds by which the step got slower in the second run."""
+        if self.duration_a is None or self.duration_b is None:
+            return None
+        return self.duration_b - self.duration_a
+
+    @property
+    def changed_outputs(self) -> List[ArtifactDiff]:
+        """Outputs whose data changed, or might have changed."""
+        return [
+            output for output in self.outputs if output.changed is not False
+        ]
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether the status, parameters or outputs of the step differ."""
+        return bool(
+            self.status_a != self.status_b
+            or self.parameters
+            or self.changed_outputs
+        )
+
+
+class RunDiff(BaseModel):
+    """Comparison of two pipeline runs.
+
+    Attributes:
+        run_a: Name of the first run.
+        run_b: Name of the second run.
+        steps: Comparisons of all steps that are part of one of the runs, in
+            the order in which they were executed.
+    """
+
+    run_a: str
+    run_b: str
+    steps: List[StepDiff] = []
+
+    def get_step(self, name: str) -> StepDiff:
+        """Returns the comparison of the step with the given name.
+
+        Raises:
+            KeyError: If the step is not part of either run.
+        """
+        for step in self.steps:
+            if step.name == name:
+                return step
+        raise KeyError(f"No step found for name `{name}`.")
+
+    def get_slower_steps(
+        self, min_seconds: float = 0.0, min_ratio: float = 0.0
+    ) -> List[StepDiff]:
+        """Returns the steps that got slower in the second run, the largest
+        slowdown first.
+
+        Args:
+            min_seconds: Minimum slowdown in seconds.
+            min_ratio: Minimum slowdown relative to the duration in the first
+                run, e.g. `0.1` for 10%.
+        """
+        slower_steps = [
+            step
+            for step in self.steps
+            if step.duration_change is not None
+            and step.duration_a is not None
+            and step.duration_change > min_seconds
+            and step.duration_change >= min_ratio * step.duration_a
+        ]
+        return sorted(
+            slower_steps,
+            key=lambda step: step.duration_change,  # type: ignore
+            reverse=True,
+        )
+
+
+def _diff_parameters(
+    parameters_a: Dict[str, Any], parameters_b: Dict[str, Any]
+) -> Dict[str, Tuple[Any, Any]]:
+    """Returns the parameters whose values differ."""
+    changes = {}
+    for key in sorted(set(parameters_a) | set(parameters_b)):
+        value_a = parameters_a.get(key, _MISSING)
+        value_b = parameters_b.get(key, _MISSING)
+        if value_a != value_b:
+            changes[key] = (
+                None if value_a is _MISSING else value_a,
+                None if value_b is _MISSING else value_b,
+            )
+    return changes
+
+
+def _diff_artifacts(
+    name: str,
+    artifact_a: Optional[ArtifactView],
+    artifact_b: Optional[ArtifactView],
+) -> ArtifactDiff:
+    """Compares two artifacts by their checksums, or by their sizes if no
+    checksums were recorded, without reading them."""
+    diff = ArtifactDiff(
+        name=name,
+        uri_a=artifact_a.uri if artifact_a else None,
+        uri_b=artifact_b.uri if artifact_b else None,
+        checksum_a=artifact_a.checksum if artifact_a else None,
+        checksum_b=artifact_b.checksum if artifact_b else None,
+        size_a=artifact_a.size if artifact_a else None,
+        size_b=artifact_b.size if artifact_b else None,
+    )
+    if artifact_a is None or artifact_b is None:
+        diff.changed = True
+    elif artifact_a.id == artifact_b.id:
+        # a cached step reuses the artifact of the previous run
+        diff.changed = False
+    elif diff.checksum_a and diff.checksum_b:
+        diff.changed = diff.checksum_a != diff.checksum_b
+    elif diff.size_a is not None and diff.size_b is not None:
+        # artifacts of equal size might still differ
+        if diff.size_a != diff.size_b:
+            diff.changed = True
+    return diff
+
+
+def _load_steps(
+    run: PipelineRunView,
+) -> Dict[str, Tuple[StepView, ExecutionStatus, float]]:
+    """Loads the steps of a run with their status and duration.
+
+    The duration is the recorded wall time of the step or, for steps
+    without recorded metrics, estimated from the execution timestamps.
+    """
+    executions = {execution.id: execution for execution in run.executions}
+    steps = {}
+    for step in run.steps:
+        execution = executions[step.id]
+        duration = step.duration
+        if duration is None:
+            duration = (
+                execution.last_update_time_since_epoch
+                - execution.create_time_since_epoch
+            ) / 1000
+        steps[step.name] = (
+            step,
+            get_execution_status_from_proto(execution),
+            duration,
+        )
+    return steps
+
+
+def diff_pipeline_runs(
+    run_a: PipelineRunView, run_b: PipelineRunView
+) -> RunDiff:
+    """Compares the steps of two pipeline runs.
+
+    Each run is loaded with one query for its executions and bulk queries
+    for the events and artifacts of its steps. Artifacts are compared by the
+    checksums and sizes recorded when they were written, so no artifact data
+    is read.
+
+    Args:
+        run_a: The first run, e.g. the last good run.
+        run_b: The second run, e.g. a run that regressed.
+
+    Returns:
+        The comparison of the runs.
+    """
+    steps_a = _load_steps(run_a)
+    steps_b = _load_steps(run_b)
+    names = list(steps_a) + [name for name in steps_b if name not in steps_a]
+
+    diff = RunDiff(run_a=run_a.name, run_b=run_b.name)
+    for name in names:
+        step_diff = StepDiff(name=name)
+        step_a = step_b = None
+        if name in steps_a:
+            step_a, step_diff.status_a, step_diff.duration_a = steps_a[name]
+        if name in steps_b:
+            step_b, step_diff.status_b, step_diff.duration_b = steps_b[name]
+
+        step_diff.parameters = _diff_parameters(
+            step_a.parameters if step_a else {},
+            step_b.parameters if step_b else {},
+        )
+        outputs_a = step_a.outputs if step_a else {}
+        outputs_b = step_b.outputs if step_b else {}
+        step_diff.outputs = [
+            _diff_artifacts(
+                output_name,
+                outputs_a.get(output_name),
+                outputs_b.get(output_name),
+            )
+            for output_name in sorted(set(outputs_a) | set(outputs_b))
+        ]
+        diff.steps.append(step_diff)
+
+    logger.debug(
+        "Compared %d steps of pipeline runs '%s' and '%s'.",
+        len(diff.steps),
+        run_a.name,
+        run_b.name,
+    )
+    return diff
@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from ml_metadata import errors, proto
+from ml_metadata.metadata_store import metadata_store
+from pydantic import BaseModel
+from tfx.dsl.compiler.constants import PIPELINE_RUN_CONTEXT_TYPE_NAME
+
+from coalescenceml.enums import ExecutionStatus
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.base_metadata_store import (
+    BaseMetadataStore,
+    get_execution_status_from_proto,
+)
+from coalescenceml.metadata_store.constants import FINISHED_RUN_PROPERTY_KEY
+from coalescenceml.post_execution import PipelineRunView, PipelineView
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+logger = get_logger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_FINISH_GRACE_PERIOD = 60.0
+
+_STEP_NAME_PROPERTY = (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
+)
+_FINAL_STATUSES = frozenset(
+    {
+        ExecutionStatus.COMPLETED,
+        ExecutionStatus.CACHED,
+        ExecutionStatus.FAILED,
+    }
+)
+
+
+class StepTransition(BaseModel):
+    """Change of the status of a step.
+
+    Attributes:
+        pipeline_name: Name of the pipeline.
+        run_name: Name of the pipeline run.
+        step_name: Name of the step.
+        old_status: Status of the step before the change, `None` if the
+            step wasn't seen before.
+        new_status: Status of the step after the change.
+        execution_id: MLMD execution ID of the step, if it's known yet.
+        time: Time of the change.
+    """
+
+    pipeline_name: str
+    run_name: str
+    step_name: str
+    old_status: Optional[ExecutionStatus] = None
+    new_status: ExecutionStatus
+    execution_id: Optional[int] = None
+    time: datetime
+
+
+class StepEventBus:
+    """In-process channel for the step transitions of runs which are
+    executed by the local orchestrator.
+
+    Watchers in the same process receive the transitions as they happen
+    instead of querying the metadata store.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a bus without any runs or subscribers."""
+        self._lock = threading.Lock()
+        self._active_runs: Set[str] = set()
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+
+    def start_run(self, run_name: str) -> None:
+        """Marks a run as executed in this process."""
+        with self._lock:
+            self._active_runs.add(run_name)
+
+    def finish_run(self, run_name: str) -> None:
+        """Marks a run as finished and ends the streams of its watchers."""
+        with self._lock:
+            self._active_runs.discard(run_name)
+            for subscriber in self._subscribers.pop(run_name, []):
+                subscriber.put(None)
+
+    def publish(self, transition: StepTransition) -> None:
+        """Sends a step transition to all watchers of its run."""
+        with self._lock:
+            for subscriber in self._subscribers.get(transition.run_name, []):
+                subscriber.put(transition)
+
+    def subscribe(self, run_name: str) -> Optional[queue.Queue]:
+        """Subscribes to the transitions of a run.
+
+        Returns:
+            A queue which receives the transitions of the run followed by
+            `None` once the run finished, or `None` if the run isn't
+            executed in this process.
+        """
+        with self._lock:
+            if run_name not in self._active_runs:
+                return None
+            subscriber: queue.Queue = queue.Queue()
+            self._subscribers.setdefault(run_name, []).append(subscriber)
+            return subscriber
+
+    def unsubscribe(self, run_name: str, subscriber: queue.Queue) -> None:
+        """Removes a subscriber of a run."""
+        with self._lock:
+            subscribers = self._subscribers.get(run_name, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+
+step_event_bus = StepEventBus()
+
+
+def _get_step_name(execution: proto.Execution) -> Optional[str]:
+    """Returns the step name of an execution."""
+    if _STEP_NAME_PROPERTY not in execution.custom_properties:
+        return None
+    return json.loads(  # type: ignore[no-any-return]
+        execution.custom_properties[_STEP_NAME_PROPERTY].string_value
+    )
+
+
+class _StepStates:
+    """Last known status of the steps of pipeline runs, which turns status
+    updates into transitions."""
+
+    def __init__(self, pipeline_name: str):
+        """Initializes the states without any steps."""
+        self._pipeline_name = pipeline_name
+        self._statuses: Dict[Tuple[str, str], ExecutionStatus] = {}
+
+    def update(
+        self,
+        run_name: str,
+        step_name: str,
+        status: ExecutionStatus,
+        execution_id: Optional[int] = None,
+        update_time: Optional[datetime] = None,
+    ) -> Optional[StepTransition]:
+        """Updates the status of a step.
+
+        Returns:
+            The transition or `None` if the status didn't change.
+        """
+        key = (run_name, step_name)
+        old_status = self._statuses.get(key)
+        if old_status == status or old_status in _FINAL_STATUSES:
+            # steps never leave a final status, so this is a stale event
+            # published before the final status was read
+            return None
+        self._statuses[key] = status
+        return StepTransition(
+            pipeline_name=self._pipeline_name,
+            run_name=run_name,
+            step_name=step_name,
+            old_status=old_status,
+            new_status=status,
+            execution_id=execution_id,
+            time=update_time or datetime.now(),
+        )
+
+    def update_from_execution(
+        self, run_name: str, execution: proto.Execution
+    ) -> Optional[StepTransition]:
+        """Updates the status of a step from its execution."""
+        step_name = _get_step_name(execution)
+        if step_name is None:
+            return None
+        return self.update(
+            run_name,
+            step_name,
+            get_execution_status_from_proto(execution),
+            execution_id=execution.id,
+            update_time=datetime.fromtimestamp(
+                execution.last_update_time_since_epoch / 1000
+            ),
+        )
+
+    def all_final(self, run_name: str) -> bool:
+        """Returns whether all known steps of a run reached a final
+        status."""
+        return all(
+            status in _FINAL_STATUSES
+            for (run, _), status in self._statuses.items()
+            if run == run_name
+        )
+
+
+class _Deadline:
+    """Raises a `TimeoutError` once a timeout expired."""
+
+    def __init__(self, timeout: Optional[float]):
+        """Starts the timeout, `None` to never expire."""
+        self._end = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self, poll_interval: float) -> float:
+        """Returns the time to wait until the next poll.
+
+        Raises:
+            TimeoutError: If the timeout expired.
+        """
+        if self._end is None:
+            return poll_interval
+        remaining = self._end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Timed out while watching for step changes.")
+        return min(poll_interval, remaining)
+
+
+def _query_changed_executions(
+    store: metadata_store.MetadataStore,
+    conditions: List[str],
+    since: int,
+    fetch_all: Callable[[], List[proto.Execution]],
+) -> List[proto.Execution]:
+    """Returns the executions which match the conditions and were updated
+    at or after `since`.
+
+    Metadata stores which can't filter executions fall back to `fetch_all`,
+    whose result is filtered in memory.
+    """
+    filter_query = " AND ".join(
+        conditions + [f"last_update_time_since_epoch >= {since}"]
+    )
+    try:
+        return store.get_executions(
+            list_options=metadata_store.ListOptions(filter_query=filter_query)
+        )
+    except (errors.InvalidArgumentError, errors.UnimplementedError):
+        logger.debug(
+            "Metadata store can't filter executions, filtering them in "
+            "memory."
+        )
+    return [
+        execution
+        for execution in fetch_all()
+        if execution.last_update_time_since_epoch >= since
+    ]
+
+
+def _is_finished_run(store: metadata_store.MetadataStore, run_id: int) -> bool:
+    """Returns whether a pipeline run was marked as finished."""
+    runs = store.get_contexts_by_id([run_id])
+    return bool(runs) and (
+        FINISHED_RUN_PROPERTY_KEY in runs[0].custom_properties
+    )
+
+
+def _get_pipeline_name(
+    metadata_store_: BaseMetadataStore, run: PipelineRunView
+) -> str:
+    """Returns the name of the pipeline a run belongs to."""
+    parents = metadata_store_.store.get_parent_contexts_by_context(
+        run._id  # noqa
+    )
+    return parents[0].name if parents else ""
+
+
+def _watch_local_run(
+    states: _StepStates,
+    subscriber: queue.Queue,
+    deadline: _Deadline,
+    poll_interval: float,
+) -> Iterator[StepTransition]:
+    """Yields the transitions of a run which is executed in this process
+    from the step event bus."""
+    while True:
+        try:
+            transition = subscriber.get(
+                timeout=deadline.remaining(poll_interval)
+            )
+        except queue.Empty:
+            continue
+        if transition is None:
+            return
+        update = states.update(
+            transition.run_name,
+            transition.step_name,
+            transition.new_status,
+            execution_id=transition.execution_id,
+            update_time=transition.time,
+        )
+        if update:
+            yield update
+
+
+def watch_run(
+    run: PipelineRunView,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: Optional[float] = None,
+    finish_grace_period: float = DEFAULT_FINISH_GRACE_PERIOD,
+) -> Iterator[StepTransition]:
+    """Yields the status transitions of the steps of a pipeline run until
+    the run is finished.
+
+    The current status of every step is yielded first. Runs which are
+    executed by the local orchestrator in this process are watched through
+    the in-process step event bus. All other runs are polled with a single
+    query per poll which only returns the executions that changed since the
+    previous poll.
+
+    A polled run is finished once all of its steps reached a final status
+    and the run was either marked as finished by its orchestrator or none
+    of its executions was updated for `finish_grace_period` seconds. The
+    latter covers runs of orchestrators which don't mark their runs and runs
+    whose orchestrator died. The grace period is measured against the
+    update times recorded in the metadata store, so it should be longer
+    than the time an orchestrator takes to launch the next step.
+
+    Example:
+        for transition in watch_run(run, timeout=3600):
+            print(transition.step_name, transition.new_status)
+
+    Args:
+        run: The pipeline run to watch.
+        poll_interval: Seconds between two polls of the metadata store.
+        timeout: Seconds after which to stop watching, `None` to watch
+            until the run is finished.
+        finish_grace_period: Seconds without any execution updates after
+            which a run whose steps all reached a final status is considered
+            finished, even if it wasn't marked as finished.
+
+    Raises:
+        TimeoutError: If the run didn't finish within the timeout.
+    """
+    metadata_store_ = run._metadata_store  # noqa
+    # the metadata cache and read replica might return stale executions
+    store = metadata_store_.mlmd_store
+    run_id = run._id  # noqa
+    deadline = _Deadline(timeout)
+    states = _StepStates(_get_pipeline_name(metadata_store_, run))
+    # subscribe before reading the current states, so no transition is lost
+    subscriber = step_event_bus.subscribe(run.name)
+
+    try:
+        watermark = 0
+        while True:
+            executions = _query_changed_executions(
+                store,
+                [f"contexts_a.id = {run_id}"],
+                since=watermark,
+                fetch_all=lambda: store.get_executions_by_context(run_id),
+            )
+            for execution in sorted(executions, key=lambda e: e.id):
+                watermark = max(
+                    watermark, execution.last_update_time_since_epoch
+                )
+                transition = states.update_from_execution(run.name, execution)
+                if transition:
+                    yield transition
+
+            if subscriber is not None:
+                yield from _watch_local_run(
+                    states, subscriber, deadline, poll_interval
+                )
+                return
+            if states.all_final(run.name) and (
+                time.time() - watermark / 1000 >= finish_grace_period
+                or _is_finished_run(store, run_id)
+            ):
+                return
+            time.sleep(deadline.remaining(poll_interval))
+    finally:
+        if subscriber is not None:
+            step_event_bus.unsubscribe(run.name, subscriber)
+
+
+def watch_pipeline(
+    pipeline: PipelineView,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: Optional[float] = None,
+) -> Iterator[StepTransition]:
+    """Yields the status transitions of the steps of all runs of a
+    pipeline, including runs which start while watching.
+
+    Each poll is a single query which only returns the executions of the
+    pipeline that changed since the previous poll, so watching many
+    concurrent runs costs time proportional to the number of changes. The
+    run of an execution is looked up once, when the execution is first
+    seen.
+
+    Args:
+        pipeline: The pipeline to watch.
+        poll_interval: Seconds between two polls of the metadata store.
+        timeout: Seconds after which to stop watching, `None` to watch until
+            the generator is closed.
+
+    Raises:
+        TimeoutError: If the timeout expired.
+    """
+    # the metadata cache and read replica might return stale executions
+    store = pipeline._metadata_store.mlmd_store  # noqa
+    pipeline_id = pipeline._id  # noqa
+    run_context_type_id = store.get_context_type(
+        PIPELINE_RUN_CONTEXT_TYPE_NAME
+    ).id
+    deadline = _Deadline(timeout)
+    states = _StepStates(pipeline.name)
+    run_names: Dict[int, str] = {}
+
+    watermark = 0
+    while True:
+        executions = _query_changed_executions(
+            store,
+            [f"contexts_a.id = {pipeline_id}"],
+            since=watermark,
+            fetch_all=lambda: store.get_executions_by_context(pipeline_id),
+        )
+        for execution in sorted(executions, key=lambda e: e.id):
+            watermark = max(watermark, execution.last_update_time_since_epoch)
+            if execution.id not in run_names:
+                run_names[execution.id] = next(
+                    (
+                        context.name
+                        for context in store.get_contexts_by_execution(
+                            execution.id
+                        )
+                        if context.type_id == run_context_type_id
+                    ),
+                    "",
+                )
+            transition = states.update_from_execution(
+                run_names[execution.id], execution
+            )
+            if transition:
+                yield transition
+        time.sleep(deadline.remaining(poll_interval))
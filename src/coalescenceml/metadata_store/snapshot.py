@@ -0,0 +1,440 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from ml_metadata import proto
+from ml_metadata.metadata_store import metadata_store
+
+from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.metadata_cache import (
+    FINAL_ARTIFACT_STATES,
+    TERMINAL_EXECUTION_STATES,
+)
+
+
+logger = get_logger(__name__)
+
+SNAPSHOT_BATCH_SIZE = 500
+# Changes are synchronized with an overlap, so updates written by clients
+# whose clocks lag slightly behind are not missed
+SNAPSHOT_SYNC_OVERLAP_MS = 60 * 1000
+
+_TYPE_CLASSES: Dict[str, Type[Any]] = {
+    "execution": proto.ExecutionType,
+    "artifact": proto.ArtifactType,
+    "context": proto.ContextType,
+}
+
+
+def _batched(values: Sequence[int], size: int) -> Iterable[List[int]]:
+    """Splits a sequence of IDs into batches of at most `size` IDs."""
+    for start in range(0, len(values), size):
+        yield list(values[start : start + size])
+
+
+class MetadataSnapshot:
+    """Persistent on-disk cache of metadata which doesn't change anymore.
+
+    The snapshot stores types, executions in a terminal state, their events,
+    deleted artifacts and the executions of finished pipeline runs in a
+    local SQLite database. A `MetadataCache` which is backed by a snapshot
+    answers these lookups from disk, so exploring runs in a new process
+    doesn't need to query the metadata store again.
+
+    A new snapshot is filled lazily by the lookups. Afterwards, `sync`
+    fetches all executions and artifacts which were written or updated since
+    the previous synchronization.
+    """
+
+    def __init__(self, path: str, fingerprint: str = ""):
+        """Opens (or creates) the snapshot.
+
+        Args:
+            path: Path of the SQLite file in which the snapshot is stored.
+            fingerprint: Identifies the metadata store the snapshot belongs
+                to. An existing snapshot with a different fingerprint is
+                cleared.
+        """
+        self._path = path
+        self._lock = threading.RLock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS types (
+                kind TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (kind, id)
+            );
+            CREATE TABLE IF NOT EXISTS executions (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                has_events INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                execution_id INTEGER NOT NULL,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_by_execution
+                ON events (execution_id);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS context_executions (
+                context_id INTEGER PRIMARY KEY,
+                execution_ids TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        if self._get_state("fingerprint", fingerprint) != fingerprint:
+            logger.info(
+                "Metadata snapshot '%s' belongs to a different metadata "
+                "store, clearing it.",
+                path,
+            )
+            self.clear()
+        with self._lock, self._connection:
+            self._set_state("fingerprint", fingerprint)
+
+    @property
+    def path(self) -> str:
+        """Path of the SQLite file in which the snapshot is stored."""
+        return self._path
+
+    def _get_state(self, key: str, default: Any) -> Any:
+        """Reads a value from the state table."""
+        row = self._connection.execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_state(self, key: str, value: Any) -> None:
+        """Writes a value to the state table."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def _select(self, query: str, ids: Sequence[int]) -> List[Tuple[Any, ...]]:
+        """Runs a query with an `IN ({})` clause for all IDs in batches."""
+        rows: List[Tuple[Any, ...]] = []
+        with self._lock:
+            for batch in _batched(sorted(set(ids)), SNAPSHOT_BATCH_SIZE):
+                placeholders = ", ".join("?" * len(batch))
+                rows.extend(
+                    self._connection.execute(query.format(placeholders), batch)
+                )
+        return rows
+
+    def _delete(self, table: str, column: str, ids: Sequence[int]) -> None:
+        """Deletes all rows whose column has one of the IDs."""
+        for batch in _batched(sorted(set(ids)), SNAPSHOT_BATCH_SIZE):
+            placeholders = ", ".join("?" * len(batch))
+            self._connection.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({placeholders})",
+                batch,
+            )
+
+    # Types
+
+    def get_types(self, kind: str, type_ids: Sequence[int]) -> List[Any]:
+        """Returns the stored types of a kind with the given IDs."""
+        type_class = _TYPE_CLASSES[kind]
+        return [
+            type_class.FromString(data)
+            for (data,) in self._select(
+                f"SELECT data FROM types WHERE kind = '{kind}' "
+                "AND id IN ({})",
+                type_ids,
+            )
+        ]
+
+    def put_types(self, kind: str, types: Iterable[Any]) -> None:
+        """Stores types of a kind."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO types (kind, id, data) "
+                "VALUES (?, ?, ?)",
+                [
+                    (kind, type_.id, type_.SerializeToString())
+                    for type_ in types
+                ],
+            )
+
+    # Executions
+
+    def get_executions(
+        self, execution_ids: Sequence[int]
+    ) -> List[proto.Execution]:
+        """Returns the stored executions with the given IDs."""
+        return [
+            proto.Execution.FromString(data)
+            for (data,) in self._select(
+                "SELECT data FROM executions WHERE id IN ({})", execution_ids
+            )
+        ]
+
+    def put_executions(self, executions: Iterable[proto.Execution]) -> None:
+        """Stores executions, which must be in a terminal state."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO executions (id, data) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data",
+                [
+                    (execution.id, execution.SerializeToString())
+                    for execution in executions
+                ],
+            )
+
+    def remove_executions(self, execution_ids: Sequence[int]) -> None:
+        """Removes executions with their events from the snapshot."""
+        with self._lock, self._connection:
+            self._delete("executions", "id", execution_ids)
+            self._delete("events", "execution_id", execution_ids)
+
+    # Events
+
+    def get_events(
+        self, execution_ids: Sequence[int]
+    ) -> Dict[int, List[proto.Event]]:
+        """Returns the stored events of the given executions.
+
+        Returns:
+            Dictionary mapping the ID of every execution whose events are
+            stored to its events. Executions without stored events are left
+            out.
+        """
+        events: Dict[int, List[proto.Event]] = {
+            id_: []
+            for (id_,) in self._select(
+                "SELECT id FROM executions WHERE has_events = 1 "
+                "AND id IN ({})",
+                execution_ids,
+            )
+        }
+        for execution_id, data in self._select(
+            "SELECT execution_id, data FROM events "
+            "WHERE execution_id IN ({}) ORDER BY rowid",
+            list(events),
+        ):
+            events[execution_id].append(proto.Event.FromString(data))
+        return events
+
+    def put_events(self, events: Dict[int, List[proto.Event]]) -> None:
+        """Stores the events of executions which are stored already.
+
+        Args:
+            events: Dictionary mapping execution IDs to all their events.
+        """
+        with self._lock, self._connection:
+            stored_ids = [
+                id_
+                for (id_,) in self._select(
+                    "SELECT id FROM executions WHERE id IN ({})", list(events)
+                )
+            ]
+            self._delete("events", "execution_id", stored_ids)
+            self._connection.executemany(
+                "INSERT INTO events (execution_id, data) VALUES (?, ?)",
+                [
+                    (id_, event.SerializeToString())
+                    for id_ in stored_ids
+                    for event in events[id_]
+                ],
+            )
+            self._connection.executemany(
+                "UPDATE executions SET has_events = 1 WHERE id = ?",
+                [(id_,) for id_ in stored_ids],
+            )
+
+    # Artifacts
+
+    def get_artifacts(
+        self, artifact_ids: Sequence[int]
+    ) -> List[proto.Artifact]:
+        """Returns the stored artifacts with the given IDs."""
+        return [
+            proto.Artifact.FromString(data)
+            for (data,) in self._select(
+                "SELECT data FROM artifacts WHERE id IN ({})", artifact_ids
+            )
+        ]
+
+    def put_artifacts(self, artifacts: Iterable[proto.Artifact]) -> None:
+        """Stores artifacts."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO artifacts (id, data) VALUES (?, ?)",
+                [
+                    (artifact.id, artifact.SerializeToString())
+                    for artifact in artifacts
+                ],
+            )
+
+    def remove_artifacts(self, artifact_ids: Sequence[int]) -> None:
+        """Removes artifacts from the snapshot."""
+        with self._lock, self._connection:
+            self._delete("artifacts", "id", artifact_ids)
+
+    # Listings
+
+    def get_context_executions(self, context_id: int) -> Optional[List[int]]:
+        """Returns the stored execution IDs of a context, `None` if they're
+        not stored."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT execution_ids FROM context_executions "
+                "WHERE context_id = ?",
+                (context_id,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_context_executions(
+        self, context_id: int, execution_ids: List[int]
+    ) -> None:
+        """Stores the execution IDs of a context which won't get any new
+        executions, e.g. a finished pipeline run."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO context_executions "
+                "(context_id, execution_ids) VALUES (?, ?)",
+                (context_id, json.dumps(execution_ids)),
+            )
+
+    # Synchronization
+
+    def sync(self, store: metadata_store.MetadataStore) -> int:
+        """Fetches all executions and artifacts that were written or
+        updated since the last synchronization.
+
+        A new snapshot only records the current time of the metadata store,
+        all earlier metadata is added lazily when it's looked up.
+
+        Args:
+            store: The MLMD store to synchronize with. This should not be
+                wrapped in a `MetadataCache`.
+
+        Returns:
+            The number of fetched executions and artifacts.
+        """
+        with self._lock:
+            watermark = self._get_state("watermark", None)
+        if watermark is None:
+            latest = metadata_store.ListOptions(
+                limit=1,
+                order_by=metadata_store.OrderByField.UPDATE_TIME,
+                is_asc=False,
+            )
+            nodes = store.get_executions(list_options=latest)
+            nodes += store.get_artifacts(list_options=latest)
+            with self._lock, self._connection:
+                self._set_state(
+                    "watermark",
+                    max(
+                        [0]
+                        + [node.last_update_time_since_epoch for node in nodes]
+                    ),
+                )
+            return 0
+
+        changed = metadata_store.ListOptions(
+            filter_query=(
+                "last_update_time_since_epoch >= "
+                f"{watermark - SNAPSHOT_SYNC_OVERLAP_MS}"
+            )
+        )
+        executions = store.get_executions(list_options=changed)
+        artifacts = store.get_artifacts(list_options=changed)
+        finished = [
+            execution
+            for execution in executions
+            if execution.last_known_state in TERMINAL_EXECUTION_STATES
+        ]
+
+        # Events of finished executions never change, only fetch the ones
+        # which aren't stored yet
+        stored_ids = set(self.get_events([e.id for e in finished]))
+        missing_ids = [e.id for e in finished if e.id not in stored_ids]
+        events: Dict[int, List[proto.Event]] = defaultdict(list)
+        for batch in _batched(missing_ids, SNAPSHOT_BATCH_SIZE):
+            for event in store.get_events_by_execution_ids(batch):
+                events[event.execution_id].append(event)
+
+        self.put_executions(finished)
+        self.put_events({id_: events[id_] for id_ in missing_ids})
+        final_artifacts = [
+            artifact
+            for artifact in artifacts
+            if artifact.state in FINAL_ARTIFACT_STATES
+        ]
+        self.put_artifacts(final_artifacts)
+        # live artifacts might have been stored by an older version
+        self.remove_artifacts(
+            [
+                artifact.id
+                for artifact in artifacts
+                if artifact.state not in FINAL_ARTIFACT_STATES
+            ]
+        )
+        with self._lock, self._connection:
+            self._set_state(
+                "watermark",
+                max(
+                    [watermark]
+                    + [
+                        node.last_update_time_since_epoch
+                        for node in [*executions, *artifacts]
+                    ]
+                ),
+            )
+
+        logger.debug(
+            "Synchronized %d executions and %d artifacts into the metadata "
+            "snapshot '%s'.",
+            len(finished),
+            len(artifacts),
+            self._path,
+        )
+        return len(finished) + len(artifacts)
+
+    def clear(self) -> None:
+        """Removes all entries from the snapshot.
+
+        The next synchronization starts a new snapshot.
+        """
+        with self._lock, self._connection:
+            for table in (
+                "types",
+                "executions",
+                "events",
+                "artifacts",
+                "context_executions",
+            ):
+                self._connection.execute(f"DELETE FROM {table}")
+            self._connection.execute(
+                "DELETE FROM state WHERE key != 'fingerprint'"
+            )
+
+    def close(self) -> None:
+        """Closes the connection to the snapshot database."""
+        self._connection.close()
@@ -1,17 +1,55 @@
-from typing import ClassVar, Union
+import os
+import sqlite3
+from typing import ClassVar, Optional, Union, cast
 
+from ml_metadata import errors
+from ml_metadata.metadata_store import metadata_store
 from ml_metadata.proto import metadata_store_pb2
 from pydantic import validator
 from tfx.orchestration import metadata
 
 from coalescenceml.io import utils
+from coalescenceml.logger import get_logger
 from coalescenceml.metadata_store import BaseMetadataStore
+from coalescenceml.metadata_store.retry import RetryingConnection
+
+
+logger = get_logger(__name__)
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+
+
+def is_locked_error(error: Exception) -> bool:
+    """Returns whether an MLMD call failed because the SQLite database was
+    locked by another connection."""
+    if isinstance(error, errors.AbortedError):
+        return True
+    return isinstance(error, errors.StatusError) and (
+        "database is locked" in str(error)
+        or "database table is locked" in str(error)
+    )
 
 
 class SQLiteMetadataStore(BaseMetadataStore):
-    """SQLite backend for CoalescenceML metadata store."""
+    """SQLite backend for CoalescenceML metadata store.
+
+    Attributes:
+        uri: Path of the SQLite database file.
+        journal_mode: SQLite journal mode of the database, `None` to keep
+            the journal mode of an existing database. The default
+            write-ahead log allows reads while another connection writes.
+            It's stored in the database file, so it only needs to be set
+            once and applies to all connections, including the ones of
+            other processes. WAL requires all connections to be on the same
+            host, so don't use it for databases on network filesystems.
+        busy_timeout: Milliseconds for which calls that fail because another
+            connection holds a lock on the database get retried. Set to `0`
+            to disable retries.
+    """
 
     uri: str
+    journal_mode: Optional[str] = "WAL"
+    busy_timeout: int = 5000
 
     # Class Configuration
     FLAVOR: ClassVar[str] = "sqlite"
@@ -25,6 +63,85 @@ class SQLiteMetadataStore(BaseMetadataStore):
         """Return tfx metadata config for sqlite metadata store."""
         return metadata.sqlite_metadata_connection_config(self.uri)
 
+    def get_database_url(self) -> Optional[str]:
+        """Return the SQLAlchemy URL of the sqlite database."""
+        return f"sqlite:///{self.uri}"
+
+    def _connect(self) -> metadata_store.MetadataStore:
+        """Configures the database and opens a connection that retries
+        calls while the database is locked."""
+        self._configure_database()
+        mlmd_store = super()._connect()
+        if self.busy_timeout <= 0:
+            return mlmd_store
+
+        return cast(
+            metadata_store.MetadataStore,
+            RetryingConnection(
+                mlmd_store,
+                is_retryable=is_locked_error,
+                timeout=self.busy_timeout / 1000,
+            ),
+        )
+
+    def _configure_database(self) -> None:
+        """Sets the journal mode of the database.
+
+        MLMD doesn't allow passing pragmas to its connections, which is why
+        the (persistent) journal mode is set with a separate connection
+        before MLMD opens the database. That connection creates the database
+        file, so its directory is created first.
+        """
+        if not self.journal_mode:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.uri))
+        try:
+            utils.create_dir_recursive_if_not_exists(directory)
+        except OSError as e:
+            logger.warning(
+                "Unable to create the directory of metadata store '%s': %s",
+                self.uri,
+                e,
+            )
+            return
+
+        try:
+            connection = sqlite3.connect(
+                self.uri, timeout=self.busy_timeout / 1000
+            )
+        except sqlite3.Error as e:
+            logger.warning(
+                "Unable to open metadata store '%s' to set its journal mode: "
+                "%s",
+                self.uri,
+                e,
+            )
+            return
+
+        try:
+            (journal_mode,) = connection.execute(
+                f"PRAGMA journal_mode={self.journal_mode}"
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(
+                "Unable to set journal mode of metadata store '%s' to %s: %s",
+                self.uri,
+                self.journal_mode,
+                e,
+            )
+        else:
+            if journal_mode.upper() != self.journal_mode:
+                logger.warning(
+                    "SQLite kept journal mode %s instead of %s for metadata "
+                    "store '%s'.",
+                    journal_mode,
+                    self.journal_mode,
+                    self.uri,
+                )
+        finally:
+            connection.close()
+
     @validator("uri")
     def ensure_uri_is_local(cls, uri: str) -> str:
         """Ensures that the metadata store uri is local."""
@@ -35,3 +152,19 @@ class SQLiteMetadataStore(BaseMetadataStore):
             )
 
         return uri
+
+    @validator("journal_mode")
+    def ensure_journal_mode_is_valid(
+        cls, journal_mode: Optional[str]
+    ) -> Optional[str]:
+        """Ensures that the journal mode is supported by SQLite."""
+        if journal_mode is None:
+            return None
+
+        journal_mode = journal_mode.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(
+                f"Invalid journal mode '{journal_mode}', supported journal "
+                f"modes are: {', '.join(sorted(JOURNAL_MODES))}."
+            )
+        return journal_mode
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Mapping, Optional
+
+from ml_metadata.proto import metadata_store_pb2
+from pydantic import BaseModel
+
+from coalescenceml.metadata_store.constants import STEP_METRICS_PROPERTY_PREFIX
+
+
+class StepMetrics(BaseModel):
+    """Timing and resource usage of a step execution.
+
+    Attributes:
+        start_time: Time at which the step was launched.
+        end_time: Time at which the step finished.
+        wall_time: Wall-clock duration of the step in seconds.
+        cpu_time: CPU time the process spent during the step in seconds.
+        peak_memory: Peak resident set size of the process during the step
+            in bytes, `None` if it couldn't be measured.
+        bytes_read: Number of bytes read through `fileio` during the step.
+        bytes_written: Number of bytes written through `fileio` during the
+            step.
+    """
+
+    start_time: datetime
+    end_time: datetime
+    wall_time: float
+    cpu_time: float
+    peak_memory: Optional[int] = None
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def to_custom_properties(self) -> Mapping[str, metadata_store_pb2.Value]:
+        """Converts the metrics to MLMD execution custom properties."""
+        properties = {}
+        for key, value in self.dict(exclude_none=True).items():
+            property_value = metadata_store_pb2.Value()
+            if isinstance(value, datetime):
+                property_value.int_value = int(value.timestamp() * 1000)
+            elif isinstance(value, float):
+                property_value.double_value = value
+            else:
+                property_value.int_value = value
+            properties[STEP_METRICS_PROPERTY_PREFIX + key] = property_value
+        return properties
+
+    @classmethod
+    def from_custom_properties(
+        cls, custom_properties: Mapping[str, metadata_store_pb2.Value]
+    ) -> Optional["StepMetrics"]:
+        """Reads the metrics from MLMD execution custom properties.
+
+        Returns:
+            The metrics or `None` if no metrics were recorded for the
+            execution, e.g. because it was run by an older version.
+        """
+        values = {}
+        for key, field in cls.__fields__.items():
+            property_key = STEP_METRICS_PROPERTY_PREFIX + key
+            if property_key not in custom_properties:
+                continue
+            property_value = custom_properties[property_key]
+            if field.type_ is datetime:
+                values[key] = datetime.fromtimestamp(
+                    property_value.int_value / 1000
+                )
+            elif field.type_ is float:
+                values[key] = property_value.double_value
+            else:
+                values[key] = property_value.int_value
+        if "wall_time" not in values:
+            return None
+        return cls(**values)
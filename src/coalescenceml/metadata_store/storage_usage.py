@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, Iterator, List, Optional, TypeVar
+
+from ml_metadata.metadata_store import metadata_store
+from ml_metadata.proto import metadata_store_pb2
+from pydantic import BaseModel
+from sqlalchemy import bindparam, create_engine, text
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.artifacts.constants import SIZE_PROPERTY_KEY
+from coalescenceml.logger import get_logger
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 1000
+
+GROUP_BY_PIPELINE = "pipeline"
+GROUP_BY_RUN = "run"
+GROUP_BY_STEP = "step"
+GROUP_BY_TYPE = "type"
+GROUPINGS = (GROUP_BY_PIPELINE, GROUP_BY_RUN, GROUP_BY_STEP, GROUP_BY_TYPE)
+
+# Group of artifacts which weren't produced by any step, e.g. imported ones
+UNKNOWN_GROUP = "<unknown>"
+
+T = TypeVar("T")
+
+
+def _batched(items: List[T], batch_size: int) -> Iterator[List[T]]:
+    """Splits a list into consecutive batches of at most `batch_size`."""
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+def get_artifact_size(artifact: metadata_store_pb2.Artifact) -> Optional[int]:
+    """Returns the size of an artifact in bytes recorded when writing it, or
+    `None` if no size was recorded."""
+    if SIZE_PROPERTY_KEY not in artifact.properties:
+        return None
+    return artifact.properties[SIZE_PROPERTY_KEY].int_value
+
+
+class StorageUsage(BaseModel):
+    """Storage used by the artifacts of a pipeline, run, step or artifact
+    type.
+
+    Attributes:
+        name: Name of the pipeline, run, step or artifact type.
+        artifact_count: Number of artifacts in the group.
+        total_bytes: Total size of all artifacts with a recorded size.
+        unsized_artifact_count: Number of artifacts without a recorded size,
+            e.g. because they were written by an older version.
+    """
+
+    name: str
+    artifact_count: int = 0
+    total_bytes: int = 0
+    unsized_artifact_count: int = 0
+
+
+def _get_producers(
+    store: metadata_store.MetadataStore, artifact_ids: List[int]
+) -> Dict[int, int]:
+    """Maps the artifact IDs to the ID of the execution that produced them.
+
+    Cached steps only consume the artifacts of the step they reuse, so every
+    artifact is attributed to a single execution.
+    """
+    producers: Dict[int, int] = {}
+    for batch in _batched(artifact_ids, BATCH_SIZE):
+        for event in store.get_events_by_artifact_ids(batch):
+            if event.type == event.OUTPUT:
+                producers[event.artifact_id] = min(
+                    producers.get(event.artifact_id, event.execution_id),
+                    event.execution_id,
+                )
+    return producers
+
+
+def _get_step_names(
+    store: metadata_store.MetadataStore, execution_ids: List[int]
+) -> Dict[int, str]:
+    """Maps the execution IDs to the names of their steps."""
+    step_name_property = (
+        INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
+    )
+    step_names = {}
+    for batch in _batched(execution_ids, BATCH_SIZE):
+        for execution in store.get_executions_by_id(batch):
+            if step_name_property in execution.custom_properties:
+                step_names[execution.id] = json.loads(
+                    execution.custom_properties[step_name_property].string_value
+                )
+    return step_names
+
+
+def _iter_artifact_pages(
+    store: metadata_store.MetadataStore,
+) -> Iterator[List[metadata_store_pb2.Artifact]]:
+    """Lists all artifacts in pages of at most `BATCH_SIZE` artifacts,
+    ordered by their ID."""
+    last_artifact_id = 0
+    while True:
+        page = store.get_artifacts(
+            list_options=metadata_store.ListOptions(
+                limit=BATCH_SIZE,
+                order_by=metadata_store.OrderByField.ID,
+                is_asc=True,
+                filter_query=f"id > {last_artifact_id}",
+            )
+        )
+        if page:
+            yield page
+        if len(page) < BATCH_SIZE:
+            return
+        last_artifact_id = page[-1].id
+
+
+def _get_context_names(
+    store: metadata_store.MetadataStore,
+    context_type_name: str,
+    execution_ids: List[int],
+    database_url: Optional[str],
+) -> Dict[int, str]:
+    """Maps the execution IDs to the name of their context of the given
+    type.
+
+    MLMD can't look up the contexts of multiple executions at once, so the
+    associations of each batch of executions are read from the database
+    directly. Without access to the database, the executions of every
+    context are listed instead.
+    """
+    if not execution_ids:
+        return {}
+    if database_url is None:
+        context_names = {}
+        for context in store.get_contexts_by_type(context_type_name):
+            for execution in store.get_executions_by_context(context.id):
+                context_names[execution.id] = context.name
+        return context_names
+
+    context_type_id = store.get_context_type(context_type_name).id
+    query = text(
+        "SELECT a.execution_id, c.name FROM Association a "
+        "JOIN Context c ON c.id = a.context_id "
+        "WHERE c.type_id = :type_id AND a.execution_id IN :execution_ids"
+    ).bindparams(bindparam("execution_ids", expanding=True))
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            return {
+                execution_id: name
+                for batch in _batched(execution_ids, BATCH_SIZE)
+                for execution_id, name in connection.execute(
+                    query, {"type_id": context_type_id, "execution_ids": batch}
+                )
+            }
+    finally:
+        engine.dispose()
+
+
+def get_storage_usage(
+    store: metadata_store.MetadataStore,
+    by: str = GROUP_BY_PIPELINE,
+    database_url: Optional[str] = None,
+) -> List[StorageUsage]:
+    """Aggregates the storage used by artifacts.
+
+    The usage is computed from the artifact sizes recorded in the metadata
+    store, so the artifact store is never listed. Each artifact is counted
+    once, for the step that produced it. Deleted artifacts are ignored.
+
+    Args:
+        store: The MLMD store to read the artifacts from.
+        by: How to group the artifacts, one of `pipeline`, `run`, `step` or
+            `type`.
+        database_url: SQLAlchemy URL of the database which backs the store.
+            If set, the pipelines and runs of the artifacts are looked up
+            in batches instead of listing the executions of every pipeline
+            or run.
+
+    Returns:
+        The usage of each group, the largest group first.
+
+    Raises:
+        ValueError: If `by` is not a valid grouping.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(
+            f"Invalid grouping '{by}', expected one of {list(GROUPINGS)}."
+        )
+
+    artifacts = [
+        artifact
+        for page in _iter_artifact_pages(store)
+        for artifact in page
+        if artifact.state != metadata_store_pb2.Artifact.DELETED
+    ]
+
+    if by == GROUP_BY_TYPE:
+        type_names = {
+            artifact_type.id: artifact_type.name
+            for artifact_type in store.get_artifact_types()
+        }
+        groups = {
+            artifact.id: type_names.get(artifact.type_id, UNKNOWN_GROUP)
+            for artifact in artifacts
+        }
+    else:
+        producers = _get_producers(
+            store, sorted(artifact.id for artifact in artifacts)
+        )
+        execution_ids = sorted(set(producers.values()))
+        if by == GROUP_BY_STEP:
+            execution_groups = _get_step_names(store, execution_ids)
+        else:
+            execution_groups = _get_context_names(
+                store,
+                PIPELINE_CONTEXT_TYPE_NAME
+                if by == GROUP_BY_PIPELINE
+                else PIPELINE_RUN_CONTEXT_TYPE_NAME,
+                execution_ids,
+                database_url,
+            )
+        groups = {
+            artifact_id: execution_groups.get(execution_id, UNKNOWN_GROUP)
+            for artifact_id, execution_id in producers.items()
+        }
+
+    usage: Dict[str, StorageUsage] = {}
+    for artifact in artifacts:
+        name = groups.get(artifact.id, UNKNOWN_GROUP)
+        if name not in usage:
+            usage[name] = StorageUsage(name=name)
+        group = usage[name]
+        group.artifact_count += 1
+        size = get_artifact_size(artifact)
+        if size is None:
+            group.unsized_artifact_count += 1
+        else:
+            group.total_bytes += size
+
+    logger.debug(
+        "Aggregated the storage usage of %d artifacts by %s.",
+        len(artifacts),
+        by,
+    )
+    return sorted(
+        usage.values(), key=lambda group: (-group.total_bytes, group.name)
+    )
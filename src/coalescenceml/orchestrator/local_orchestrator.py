@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 import json
-from typing import TYPE_CHECKING, Any, ClassVar
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, ClassVar, Optional
 
 from tfx.dsl.compiler.compiler import Compiler
 from tfx.dsl.compiler.constants import PIPELINE_RUN_ID_PARAMETER_NAME
 from tfx.dsl.components.base import base_component
-from tfx.orchestration import metadata
 from tfx.orchestration.local import runner_utils
 from tfx.orchestration.pipeline import Pipeline as TfxPipeline
 from tfx.orchestration.portable import launcher, runtime_parameter_utils
@@ -16,9 +16,12 @@ from tfx.proto.orchestration.pipeline_pb2 import (
     PipelineNode,
 )
 
-from coalescenceml.directory import Directory
-from coalescenceml.enums import MetadataContextFlavor
+from coalescenceml.enums import ExecutionStatus, MetadataContextFlavor
 from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.run_watcher import (
+    StepTransition,
+    step_event_bus,
+)
 from coalescenceml.orchestrator import BaseOrchestrator, utils
 
 
@@ -33,6 +36,26 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+def _publish_step_transition(
+    pipeline_name: str,
+    run_name: str,
+    step_name: str,
+    status: ExecutionStatus,
+    execution_id: Optional[int] = None,
+) -> None:
+    """Publishes a step transition to the watchers of the run."""
+    step_event_bus.publish(
+        StepTransition(
+            pipeline_name=pipeline_name,
+            run_name=run_name,
+            step_name=step_name,
+            new_status=status,
+            execution_id=execution_id,
+            time=datetime.now(),
+        )
+    )
+
+
 class LocalOrchestrator(BaseOrchestrator):
     """Orchestrator responsible for running pipelines locally."""
 
@@ -85,69 +108,119 @@ class LocalOrchestrator(BaseOrchestrator):
         deployment_config = runner_utils.extract_local_deployment_config(
             pb2_pipeline
         )
-        connection_config = (
-            Directory().active_stack.metadata_store.get_tfx_metadata_config()
-        )
+        metadata_store = stack.metadata_store
+        connection_config = metadata_store.get_tfx_metadata_config()
+        # One connection for all launched nodes instead of a new one each
+        # time a launcher accesses the metadata store
+        mlmd_connection = utils.SharedMetadataConnection(metadata_store)
+        run_linked = False
 
         logger.debug(f"Using deployment config:\n {deployment_config}")
         logger.debug(f"Using connection config:\n {connection_config}")
 
-        # Run each component. Note that the pipeline.components list is in
-        # topological order.
-        for node in pb2_pipeline.nodes:
-            pipeline_node: PipelineNode = node.pipeline_node
-
-            # fill out that context
-            utils.add_context_to_node(
-                pipeline_node,
-                type_=MetadataContextFlavor.STACK.value,
-                name=str(hash(json.dumps(stack.dict(), sort_keys=True))),
-                properties=stack.dict(),
-            )
-
-            # Add all pydantic objects from runtime_configuration to the context
-            utils.add_runtime_configuration_to_node(
-                pipeline_node, runtime_configuration
-            )
-
-            # Add pipeline requirements as a context
-            requirements = " ".join(sorted(pipeline.requirements))
-            utils.add_context_to_node(
-                pipeline_node,
-                type_=MetadataContextFlavor.PIPELINE_REQUIREMENTS.value,
-                name=str(hash(requirements)),
-                properties={"pipeline_requirements": requirements},
-            )
-
-            node_id = pipeline_node.node_info.id
-            executor_spec = runner_utils.extract_executor_spec(
-                deployment_config, node_id
-            )
-            custom_driver_spec = runner_utils.extract_custom_driver_spec(
-                deployment_config, node_id
-            )
-
-            p_info = pb2_pipeline.pipeline_info
-            r_spec = pb2_pipeline.runtime_spec
+        # The contexts of the stack, runtime configuration and requirements
+        # are the same for all nodes of this run, so they only get built once,
+        # and are named after their content, so identical stacks and
+        # requirements share one context across runs
+        run_contexts = PipelineNode()
+        stack_properties = stack.dict()
+        utils.add_context_to_node(
+            run_contexts,
+            type_=MetadataContextFlavor.STACK.value,
+            name=utils.get_context_name(
+                json.dumps(stack_properties, sort_keys=True)
+            ),
+            properties=stack_properties,
+        )
+        # Add all pydantic objects from runtime_configuration to the context
+        utils.add_runtime_configuration_to_node(
+            run_contexts, runtime_configuration
+        )
+        # Add pipeline requirements as a context
+        requirements = " ".join(sorted(pipeline.requirements))
+        utils.add_context_to_node(
+            run_contexts,
+            type_=MetadataContextFlavor.PIPELINE_REQUIREMENTS.value,
+            name=utils.get_context_name(requirements),
+            properties={"pipeline_requirements": requirements},
+        )
 
-            # set custom executor operator to allow custom execution logic for
-            # each step
-            step = utils.get_step_for_node(
-                pipeline_node, steps=list(pipeline.steps.values())
-            )
-            custom_executor_operators = {
-                executable_spec_pb2.PythonClassExecutableSpec: step.executor_operator
-            }
-
-            component_launcher = launcher.Launcher(
-                pipeline_node=pipeline_node,
-                mlmd_connection=metadata.Metadata(connection_config),
-                pipeline_info=p_info,
-                pipeline_runtime_spec=r_spec,
-                executor_spec=executor_spec,
-                custom_driver_spec=custom_driver_spec,
-                custom_executor_operators=custom_executor_operators,
-            )
-            stack.prepare_step_run()
-            utils.execute_step(component_launcher)
-            stack.cleanup_step_run()
+        p_info = pb2_pipeline.pipeline_info
+        r_spec = pb2_pipeline.runtime_spec
+        steps = list(pipeline.steps.values())
+
+        run_name = runtime_configuration.run_name
+        step_event_bus.start_run(run_name)
+        try:
+            # Run each component. Note that the pipeline.components list is in
+            # topological order.
+            for node in pb2_pipeline.nodes:
+                pipeline_node: PipelineNode = node.pipeline_node
+
+                # fill out the contexts of this run
+                pipeline_node.contexts.contexts.extend(
+                    run_contexts.contexts.contexts
+                )
+
+                node_id = pipeline_node.node_info.id
+                executor_spec = runner_utils.extract_executor_spec(
+                    deployment_config, node_id
+                )
+                custom_driver_spec = runner_utils.extract_custom_driver_spec(
+                    deployment_config, node_id
+                )
+
+                # set custom executor operator to allow custom execution logic
+                # for each step
+                step = utils.get_step_for_node(pipeline_node, steps=steps)
+                executable_spec = executable_spec_pb2.PythonClassExecutableSpec
+                custom_executor_operators = {
+                    executable_spec: step.executor_operator
+                }
+
+                component_launcher = launcher.Launcher(
+                    pipeline_node=pipeline_node,
+                    mlmd_connection=mlmd_connection,
+                    pipeline_info=p_info,
+                    pipeline_runtime_spec=r_spec,
+                    executor_spec=executor_spec,
+                    custom_driver_spec=custom_driver_spec,
+                    custom_executor_operators=custom_executor_operators,
+                )
+                stack.prepare_step_run()
+                step_name = step.pipeline_parameter_name or node_id
+                _publish_step_transition(
+                    p_info.id, run_name, step_name, ExecutionStatus.RUNNING
+                )
+                try:
+                    execution_info = utils.execute_step(
+                        component_launcher, metadata_store=metadata_store
+                    )
+                except Exception:
+                    _publish_step_transition(
+                        p_info.id, run_name, step_name, ExecutionStatus.FAILED
+                    )
+                    raise
+                else:
+                    if execution_info and execution_info.execution_id:
+                        _publish_step_transition(
+                            p_info.id,
+                            run_name,
+                            step_name,
+                            metadata_store.get_execution_status(
+                                execution_info.execution_id
+                            ),
+                            execution_id=execution_info.execution_id,
+                        )
+                finally:
+                    if not run_linked:
+                        # The launcher created the run context, add it to the
+                        # run index of the pipeline
+                        metadata_store.link_pipeline_run(p_info.id, run_name)
+                        run_linked = True
+                stack.cleanup_step_run()
+        finally:
+            step_event_bus.finish_run(run_name)
+            # No executions get added to the run anymore, so they can be kept
+            # in the metadata snapshot
+            metadata_store.mark_pipeline_run_finished(run_name)
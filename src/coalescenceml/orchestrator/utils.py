@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import sys
 import time
 import uuid
+from datetime import datetime
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -18,11 +21,15 @@ from typing import (
 
 import tfx.orchestration.pipeline as tfx_pipeline
 from pydantic import BaseModel
+from tfx.orchestration import metadata
 from tfx.orchestration.portable import data_types, launcher
 from tfx.proto.orchestration.pipeline_pb2 import ContextSpec, PipelineNode
 
 from coalescenceml.directory import Directory
+from coalescenceml.enums import ExecutionStatus
+from coalescenceml.io.counters import get_io_counters
 from coalescenceml.logger import get_logger
+from coalescenceml.metadata_store.step_metrics import StepMetrics
 from coalescenceml.step import BaseStep
 from coalescenceml.step.utils import (
     INTERNAL_EXECUTION_PARAMETER_PREFIX,
@@ -32,6 +39,7 @@ from coalescenceml.utils import readability_utils
 
 
 if TYPE_CHECKING:
+    from coalescenceml.metadata_store import BaseMetadataStore
     from coalescenceml.pipeline.base_pipeline import BasePipeline
     from coalescenceml.pipeline.runtime_configuration import (
         RuntimeConfiguration,
@@ -40,6 +48,41 @@ if TYPE_CHECKING:
 
 logger = get_logger(__name__)
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+class SharedMetadataConnection(metadata.Metadata):
+    """TFX metadata connection which reuses an open MLMD store.
+
+    TFX launchers open a new connection to the metadata store every time
+    they enter their `metadata.Metadata` context, which happens multiple
+    times per launched node. For SQLite this means repeated file opens and
+    schema checks, for MySQL new TCP and authentication handshakes. This
+    connection instead hands out the same store to all launchers of a
+    pipeline run and is never closed by them.
+    """
+
+    def __init__(self, metadata_store: BaseMetadataStore):
+        """Initializes the connection.
+
+        Args:
+            metadata_store: The metadata store whose MLMD connection should
+                be reused.
+        """
+        super().__init__(metadata_store.get_tfx_metadata_config())
+        self._shared_store = metadata_store.mlmd_store
+
+    def __enter__(self) -> SharedMetadataConnection:
+        """Uses the shared store instead of opening a new connection."""
+        self._store = self._shared_store
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Keeps the shared store open for subsequent launches."""
+
 
 def create_tfx_pipeline(
     coalescenceml_pipeline: BasePipeline, stack: Stack
@@ -64,13 +107,129 @@ def create_tfx_pipeline(
     )
 
 
+def _get_active_metadata_store() -> BaseMetadataStore:
+    """Returns the metadata store of the active stack."""
+    # TODO: Get the current running stack instead of just the active
+    # stack. It's possible to deploy a pipeline and switch stacks in which
+    # case we'll run into issues....
+    # However, the hope is most people will have similar stacks across
+    # profiles. So it'll inadvertently work LOL.
+    active_stack = Directory().active_stack
+    if not active_stack:
+        raise RuntimeError(
+            "No active stack is configured for the directory. Run "
+            "`coml stack set STACK_NAME` to update the active stack."
+        )
+    return active_stack.metadata_store
+
+
+def _reset_peak_memory() -> bool:
+    """Resets the peak resident set size of the process.
+
+    This is only supported on Linux, where writing `5` to `clear_refs`
+    resets the `VmHWM` value of the process status.
+
+    Returns:
+        Whether the peak was reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _get_peak_memory() -> Optional[int]:
+    """Returns the peak resident set size of the process in bytes.
+
+    This is the peak since the last call to `_reset_peak_memory` on Linux
+    and the peak since the process started on all other platforms.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, all other platforms kilobytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class StepMetricsRecorder:
+    """Measures the timing and resource usage of a step execution.
+
+    CPU time, peak memory and I/O are measured for the whole process, so
+    they only describe the step if no other steps run in the same process
+    at the same time.
+
+    Example:
+        with StepMetricsRecorder() as recorder:
+            tfx_launcher.launch()
+        metadata_store.put_step_metrics(execution_id, recorder.metrics)
+    """
+
+    def __init__(self) -> None:
+        """Initializes a recorder without any measurements."""
+        self.metrics: Optional[StepMetrics] = None
+
+    def __enter__(self) -> StepMetricsRecorder:
+        """Starts the measurements."""
+        self._peak_memory_reset = _reset_peak_memory()
+        self._peak_memory_before = _get_peak_memory()
+        self._io_before = get_io_counters()
+        self._start_time = datetime.now()
+        self._start_wall_time = time.perf_counter()
+        self._start_cpu_time = time.process_time()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Stops the measurements and stores them in `self.metrics`."""
+        cpu_time = time.process_time() - self._start_cpu_time
+        wall_time = time.perf_counter() - self._start_wall_time
+        io_after = get_io_counters()
+        peak_memory = _get_peak_memory()
+        if not self._peak_memory_reset and (
+            peak_memory is None
+            or self._peak_memory_before is None
+            or peak_memory <= self._peak_memory_before
+        ):
+            # the peak of the process was reached before the step started,
+            # so the peak during the step is unknown
+            peak_memory = None
+
+        self.metrics = StepMetrics(
+            start_time=self._start_time,
+            end_time=datetime.now(),
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            peak_memory=peak_memory,
+            bytes_read=io_after.bytes_read - self._io_before.bytes_read,
+            bytes_written=(
+                io_after.bytes_written - self._io_before.bytes_written
+            ),
+        )
+
+
 def get_cache_status(
     execution_info: data_types.ExecutionInfo,
+    metadata_store: Optional[BaseMetadataStore] = None,
 ) -> bool:
     """Returns the caching status of a step.
 
+    If the execution info contains the execution ID of the step, its status
+    is read with a single metadata store lookup. Otherwise the step is
+    looked up by the names of its pipeline, run and step.
+
     Args:
         execution_info: The execution info of a `tfx` step.
+        metadata_store: The metadata store the step was tracked in. Defaults
+            to the metadata store of the active stack.
     Raises:
         AttributeError: If the execution info is `None`.
         KeyError: If no pipeline info is found in the `execution_info`.
@@ -81,22 +240,16 @@ def get_cache_status(
         logger.warning("No execution info found when checking cache status.")
         return False
 
-    status = False
-    directory = Directory()
-    # TODO: Get the current running stack instead of just the active stack
-    # It's possible to deploy a pipeline and switch stacks in which case we'll
-    # run into issues....
-    # However, the hope is most people will have similar stacks across profiles
-    # So it'll inadvertently work LOL.
-    active_stack = directory.active_stack
-    if not active_stack:
-        raise RuntimeError(
-            "No active stack is configured for the directory. Run "
-            "`coml stack set STACK_NAME` to update the active stack."
-        )
+    if metadata_store is None:
+        metadata_store = _get_active_metadata_store()
 
-    metadata_store = active_stack.metadata_store
+    if execution_info.execution_id is not None:
+        return (
+            metadata_store.get_execution_status(execution_info.execution_id)
+            == ExecutionStatus.CACHED
+        )
 
+    status = False
     step_name_param = (
         INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
     )
@@ -118,10 +271,14 @@ def get_cache_status(
 
 def execute_step(
     tfx_launcher: launcher.Launcher,
+    metadata_store: Optional[BaseMetadataStore] = None,
 ) -> Optional[data_types.ExecutionInfo]:
     """Executes a tfx component.
     Args:
         tfx_launcher: A tfx launcher to execute the component.
+        metadata_store: The metadata store the component is tracked in and
+            its timing and resource metrics are recorded to. Defaults to the
+            metadata store of the active stack.
     Returns:
         Optional execution info returned by the launcher.
     """
@@ -129,11 +286,14 @@ def execute_step(
         INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
     )
     pipeline_step_name = tfx_launcher._pipeline_node.node_info.id
-    start_time = time.time()
     logger.info(f"Step `{pipeline_step_name}` has started.")
+    recorder = StepMetricsRecorder()
     try:
-        execution_info = tfx_launcher.launch()
-        if execution_info and get_cache_status(execution_info):
+        with recorder:
+            execution_info = tfx_launcher.launch()
+        if execution_info and get_cache_status(
+            execution_info, metadata_store=metadata_store
+        ):
             if execution_info.exec_properties:
                 step_name = json.loads(
                     execution_info.exec_properties[step_name_param]
@@ -159,10 +319,15 @@ def execute_step(
         else:
             raise e
 
-    run_duration = time.time() - start_time
+    metrics = cast(StepMetrics, recorder.metrics)
+    if execution_info and execution_info.execution_id is not None:
+        if metadata_store is None:
+            metadata_store = _get_active_metadata_store()
+        metadata_store.put_step_metrics(execution_info.execution_id, metrics)
+
     logger.info(
         f"Step `{pipeline_step_name}` has finished in "
-        f"{readability_utils.get_human_readable_time(run_duration)}."
+        f"{readability_utils.get_human_readable_time(metrics.wall_time)}."
     )
     return execution_info
 
@@ -203,6 +368,23 @@ def add_context_to_node(
         c_property.field_value.string_value = value
 
 
+def get_context_name(content: str) -> str:
+    """Returns a context name which is derived from the content of the
+    context.
+
+    Unlike the builtin `hash()`, which is salted per process, the name is the
+    same in every process, so contexts with identical content map to a single
+    MLMD context across pipeline runs.
+
+    Args:
+        content: Serialized content of the context.
+
+    Returns:
+        The hex digest of the SHA-256 hash of the content.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
 def serialize_pydantic_object(
     obj: BaseModel, *, skip_errors: bool = False
 ) -> Dict[str, str]:
@@ -253,30 +435,29 @@ def add_runtime_configuration_to_node(
         "ignore_unserializable_fields", False
     )
 
-    # Determine the name of the context
-    def _name(obj: "BaseModel") -> str:
-        """Compute a unique context name for a pydantic BaseModel."""
-        try:
-            return str(hash(obj.json(sort_keys=True)))
-        except TypeError as e:
-            class_name = obj.__class__.__name__
-            logging.info(
-                "Cannot convert %s to json, generating uuid instead. Error: %s",
-                class_name,
-                e,
-            )
-            return f"{class_name}_{uuid.uuid1()}"
-
     # iterate over all attributes of runtime context, serializing all pydantic
     # objects to node context.
     for key, obj in runtime_config.items():
         if isinstance(obj, BaseModel):
             logger.debug("Adding %s to context", key)
+            properties = serialize_pydantic_object(obj, skip_errors=skip_errors)
+            if len(properties) < len(obj.__fields__):
+                # the skipped fields are not part of the properties, so they
+                # can't identify the context either
+                class_name = obj.__class__.__name__
+                logging.info(
+                    "Cannot serialize all fields of %s, generating uuid "
+                    "instead.",
+                    class_name,
+                )
+                name = f"{class_name}_{uuid.uuid1()}"
+            else:
+                # the properties are serialized anyway, so the name is
+                # derived from them instead of serializing the object again
+                name = get_context_name(json.dumps(properties, sort_keys=True))
             add_context_to_node(
                 pipeline_node,
                 type_=obj.__repr_name__().lower(),
-                name=_name(obj),
-                properties=serialize_pydantic_object(
-                    obj, skip_errors=skip_errors
-                ),
+                name=name,
+                properties=properties,
             )
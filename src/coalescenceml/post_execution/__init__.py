@@ -5,10 +5,16 @@ interfaces with which the user can interact with artifacts, the pipeline, steps,
 and the post-run pipeline object.
 """
 
-from coalescenceml.post_execution.artifact import ArtifactView
+from coalescenceml.post_execution.artifact import ArtifactView, read_many
 from coalescenceml.post_execution.pipeline import PipelineView
 from coalescenceml.post_execution.pipeline_run import PipelineRunView
 from coalescenceml.post_execution.step import StepView
 
 
-__all__ = ["PipelineView", "PipelineRunView", "StepView", "ArtifactView"]
+__all__ = [
+    "PipelineView",
+    "PipelineRunView",
+    "StepView",
+    "ArtifactView",
+    "read_many",
+]
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Optional, Type
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
+from coalescenceml.exceptions import ArtifactChecksumError
+from coalescenceml.io.checksum import verify_artifact_checksum
 from coalescenceml.logger import get_logger
 from coalescenceml.utils import source_utils
 
 
 if TYPE_CHECKING:
     from coalescenceml.metadata_store import BaseMetadataStore
+    from coalescenceml.metadata_store.lineage import LineageGraph
     from coalescenceml.post_execution.step import StepView
     from coalescenceml.producers.base_producer import BaseProducer
 
 logger = get_logger(__name__)
 
+DEFAULT_READ_WORKERS = 8
+
 
 class ArtifactView:
     """Post-execution artifact class which can be used to read
@@ -28,6 +44,9 @@ class ArtifactView:
         data_type: str,
         metadata_store: BaseMetadataStore,
         parent_step_id: int,
+        checksum: Optional[str] = None,
+        producer_step_id: Optional[int] = None,
+        size: Optional[int] = None,
     ):
         """Initializes a post-execution artifact object.
         In most cases `ArtifactView` objects should not be created manually but
@@ -44,6 +63,12 @@ class ArtifactView:
             metadata_store: The metadata store which should be used to fetch
                 additional information related to this pipeline.
             parent_step_id: The ID of the parent step.
+            checksum: Checksum of the artifact data recorded when writing
+                the artifact, if available.
+            producer_step_id: The ID of the step that originally produced
+                the artifact, if already known.
+            size: Size of the artifact data in bytes recorded when writing
+                the artifact, if available.
         """
         self._id = id_
         self._type = type_
@@ -52,6 +77,9 @@ class ArtifactView:
         self._data_type = data_type
         self._metadata_store = metadata_store
         self._parent_step_id = parent_step_id
+        self._checksum = checksum
+        self._producer_step_id = producer_step_id
+        self._size = size
 
     @property
     def id(self) -> int:
@@ -73,12 +101,46 @@ class ArtifactView:
         """Returns the URI where the artifact data is stored."""
         return self._uri
 
+    @property
+    def checksum(self) -> Optional[str]:
+        """Returns the checksum of the artifact data or `None` if no checksum
+        was recorded when writing the artifact."""
+        return self._checksum
+
+    @property
+    def size(self) -> Optional[int]:
+        """Returns the size of the artifact data in bytes or `None` if no
+        size was recorded when writing the artifact."""
+        return self._size
+
+    def verify_checksum(self) -> bool:
+        """Verifies that the stored data matches the recorded checksum.
+
+        Returns:
+            `True` if the data matches or no checksum was recorded, `False`
+            otherwise.
+        """
+        if not self._checksum:
+            logger.warning(
+                "No checksum was recorded for artifact '%s', skipping "
+                "verification.",
+                self._uri,
+            )
+            return True
+        return verify_artifact_checksum(self._uri, self._checksum)
+
     @property
     def parent_step_id(self) -> int:
         """Returns the ID of the parent step. This need not be equivalent to
         the ID of the producer step."""
         return self._parent_step_id
 
+    @property
+    def producer_step_id(self) -> Optional[int]:
+        """Returns the ID of the step that originally produced the artifact,
+        if it is known without querying the metadata store."""
+        return self._producer_step_id
+
     @property
     def producer_step(self) -> StepView:
         """Returns the original StepView that produced the artifact."""
@@ -89,13 +151,65 @@ class ArtifactView:
     @property
     def is_cached(self) -> bool:
         """Returns True if artifact was cached in a previous run, else False."""
-        # self._metadata_store.
+        if self._producer_step_id is not None:
+            return self._producer_step_id != self.parent_step_id
         return self.producer_step.id != self.parent_step_id
 
+    def get_lineage(
+        self,
+        direction: str = "both",
+        max_depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+    ) -> LineageGraph:
+        """Returns the lineage of this artifact.
+
+        Use `direction="upstream"` to find the artifacts and steps that were
+        used to produce this artifact and `direction="downstream"` to find
+        the steps that consumed it.
+
+        Args:
+            direction: `"upstream"`, `"downstream"` or `"both"`.
+            max_depth: Maximum number of hops from this artifact.
+            max_nodes: Approximate maximum number of nodes in the graph.
+        """
+        return self._metadata_store.get_lineage(
+            artifacts=[self],
+            direction=direction,
+            max_depth=max_depth,
+            max_nodes=max_nodes,
+        )
+
+    def _load_producer_class(self) -> Type[BaseProducer]:
+        """Imports the producer that was used to write this artifact."""
+        try:
+            return source_utils.load_source_path_class(self._producer)
+        except (ModuleNotFoundError, AttributeError) as e:
+            logger.error(
+                f"CoalescenceML can not locate and import the producer module "
+                f"{self._producer} which was used to write this "
+                f"artifact. If you want to read from it, please provide "
+                f"a 'producer_class'."
+            )
+            raise ModuleNotFoundError(e) from e
+
+    def _load_data_type(self) -> Type[Any]:
+        """Imports the data type that was passed to the producer when
+        writing this artifact."""
+        try:
+            return source_utils.load_source_path_class(self._data_type)
+        except (ModuleNotFoundError, AttributeError) as e:
+            logger.error(
+                f"CoalescenceML can not locate and import the data type of "
+                f"this artifact {self._data_type}. If you want to read "
+                f"from it, please provide a 'output_data_type'."
+            )
+            raise ModuleNotFoundError(e) from e
+
     def read(
         self,
         output_data_type: Optional[Type[Any]] = None,
         producer_class: Optional[Type[BaseProducer]] = None,
+        verify_checksum: bool = False,
     ) -> Any:
         """Produces the data stored in this artifact.
         Args:
@@ -105,36 +219,24 @@ class ArtifactView:
                 used to read the artifact data. If no producer class is
                 given, we use the producer that was used to write the
                 artifact during execution of the pipeline.
+            verify_checksum: If `True`, verify that the artifact data matches
+                the checksum recorded when writing it before reading.
         Returns:
               The produced data.
+        Raises:
+            ArtifactChecksumError: If `verify_checksum` is set and the
+                artifact data does not match its recorded checksum.
         """
+        if verify_checksum and not self.verify_checksum():
+            raise ArtifactChecksumError(
+                f"Data of artifact '{self._uri}' does not match its recorded "
+                f"checksum '{self._checksum}'."
+            )
 
         if not producer_class:
-            try:
-                producer_class = source_utils.load_source_path_class(
-                    self._producer
-                )
-            except (ModuleNotFoundError, AttributeError) as e:
-                logger.error(
-                    f"CoalescenceML can not locate and import the producer module "
-                    f"{self._producer} which was used to write this "
-                    f"artifact. If you want to read from it, please provide "
-                    f"a 'producer_class'."
-                )
-                raise ModuleNotFoundError(e) from e
-
+            producer_class = self._load_producer_class()
         if not output_data_type:
-            try:
-                output_data_type = source_utils.load_source_path_class(
-                    self._data_type
-                )
-            except (ModuleNotFoundError, AttributeError) as e:
-                logger.error(
-                    f"CoalescenceML can not locate and import the data type of this "
-                    f"artifact {self._data_type}. If you want to read "
-                    f"from it, please provide a 'output_data_type'."
-                )
-                raise ModuleNotFoundError(e) from e
+            output_data_type = self._load_data_type()
 
         logger.debug(
             "Using '%s' to read '%s' (uri: %s).",
@@ -163,3 +265,109 @@ class ArtifactView:
         if isinstance(other, ArtifactView):
             return self._id == other._id and self._uri == other._uri
         return False
+
+
+def read_many(
+    artifacts: Iterable[ArtifactView],
+    output_data_type: Optional[Type[Any]] = None,
+    producer_class: Optional[Type[BaseProducer]] = None,
+    max_workers: int = DEFAULT_READ_WORKERS,
+    verify_checksum: bool = False,
+) -> Iterator[Tuple[ArtifactView, Any]]:
+    """Reads the data of many artifacts concurrently.
+
+    The producer classes and data types of the artifacts are imported once
+    per distinct source instead of once per artifact, and the data is
+    fetched from the artifact store by `max_workers` threads. Reads go
+    through the filesystem of the active artifact store, so artifacts that
+    are available in the local tier of a tiered artifact store are read
+    from there.
+
+    Example:
+        ```python
+        accuracies = {
+            artifact.parent_step_id: value
+            for artifact, value in read_many(
+                run.get_step("evaluator").output for run in pipeline.runs
+            )
+        }
+        ```
+
+    Args:
+        artifacts: The artifacts to read.
+        output_data_type: The datatype to which the producers should read,
+            defaults to the data type each artifact was written with.
+        producer_class: The class of the producer used to read all
+            artifacts, defaults to the producer each artifact was written
+            with.
+        max_workers: Maximum number of artifacts that are read at once.
+        verify_checksum: If `True`, verify that the data of each artifact
+            matches its recorded checksum before reading it.
+
+    Yields:
+        Tuples of an artifact and its data, in the order in which the reads
+        complete.
+
+    Raises:
+        ValueError: If `max_workers` is not positive.
+    """
+    if max_workers < 1:
+        raise ValueError("`max_workers` must be positive.")
+
+    producer_classes: Dict[str, Type[BaseProducer]] = {}
+    data_types: Dict[str, Type[Any]] = {}
+
+    def _read(artifact: ArtifactView) -> Any:
+        return artifact.read(
+            output_data_type=output_data_type
+            or data_types[artifact._data_type],  # noqa
+            producer_class=producer_class
+            or producer_classes[artifact._producer],  # noqa
+            verify_checksum=verify_checksum,
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="coml-read"
+    ) as executor:
+        pending: Dict[Future, ArtifactView] = {}  # type: ignore[type-arg]
+        try:
+            for artifact in artifacts:
+                # imports are resolved in the calling thread, once per source
+                if (
+                    producer_class is None
+                    and artifact._producer not in producer_classes  # noqa
+                ):
+                    producer_classes[
+                        artifact._producer  # noqa
+                    ] = artifact._load_producer_class()  # noqa
+                if (
+                    output_data_type is None
+                    and artifact._data_type not in data_types  # noqa
+                ):
+                    data_types[
+                        artifact._data_type  # noqa
+                    ] = artifact._load_data_type()  # noqa
+
+                pending[executor.submit(_read, artifact)] = artifact
+                # yield finished reads early and don't queue more reads than
+                # can be consumed
+                if len(pending) >= 2 * max_workers:
+                    yield from _pop_completed(pending)
+
+            while pending:
+                yield from _pop_completed(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _pop_completed(
+    pending: Dict[Future, ArtifactView]  # type: ignore[type-arg]
+) -> Iterator[Tuple[ArtifactView, Any]]:
+    """Waits for at least one of the pending reads to complete and yields
+    the results of all completed reads."""
+    done: Set[Future]  # type: ignore[type-arg]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        artifact = pending.pop(future)
+        yield artifact, future.result()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, List
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, List, Optional
 
+from coalescenceml.enums import ExecutionStatus
 from coalescenceml.logger import get_logger
 
 
@@ -55,6 +57,46 @@ class PipelineView:
         runs = self._metadata_store.get_pipeline_runs(self)
         return list(runs.keys())
 
+    def query_runs(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        status: Optional[ExecutionStatus] = None,
+        limit: Optional[int] = None,
+        order: str = "desc",
+        start_after: Optional[PipelineRunView] = None,
+    ) -> List[PipelineRunView]:
+        """Queries runs of this pipeline.
+
+        Runs are queried page by page, so only as many runs as needed are
+        read from the metadata store. For example, the latest successful run
+        can be fetched with
+        `pipeline.query_runs(status=ExecutionStatus.COMPLETED, limit=1)`.
+
+        Args:
+            since: Only return runs created at or after this time.
+            until: Only return runs created before this time.
+            status: Only return runs with this status.
+            limit: Maximum number of runs to return.
+            order: `"desc"` to return the latest runs first, `"asc"` to
+                return the oldest runs first.
+            start_after: Only return runs after this run in the requested
+                order. Pass the last run of a query to get the next page.
+        Returns:
+            The matching runs in the requested order.
+        Raises:
+            ValueError: If the order is neither `"asc"` nor `"desc"`.
+        """
+        return self._metadata_store.query_pipeline_runs(
+            self,
+            since=since,
+            until=until,
+            status=status,
+            limit=limit,
+            order=order,
+            start_after=start_after,
+        )
+
     def get_run(self, name: str) -> "PipelineRunView":
         """Returns a run for the given name.
         Args:
@@ -82,7 +124,9 @@ class PipelineView:
         """
         orig_pipeline_run = None
 
-        for run in reversed(self.runs):
+        # Walk the runs from the latest to the oldest, only querying older
+        # runs while no matching step was found
+        for run in self._metadata_store.iter_pipeline_runs(self, order="desc"):
             try:
                 step = run.get_step(step_name)
                 if step.is_completed:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import OrderedDict
-from typing import TYPE_CHECKING, Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ml_metadata import proto
 
@@ -25,8 +25,8 @@ class PipelineRunView:
         self,
         id_: int,
         name: str,
-        executions: List[proto.Execution],
         metadata_store: BaseMetadataStore,
+        executions: Optional[List[proto.Execution]] = None,
     ):
         """Initializes a post-execution pipeline run object.
         In most cases `PipelineRunView` objects should not be created manually
@@ -34,9 +34,11 @@ class PipelineRunView:
         Args:
             id_: The context id of this pipeline run.
             name: The name of this pipeline run.
-            executions: All executions associated with this pipeline run.
             metadata_store: The metadata store which should be used to fetch
                 additional information related to this pipeline run.
+            executions: All executions associated with this pipeline run. If
+                not given, they are fetched from the metadata store when
+                needed.
         """
         self._id = id_
         self._name = name
@@ -50,21 +52,24 @@ class PipelineRunView:
         """Returns the name of the pipeline run."""
         return self._name
 
+    @property
+    def executions(self) -> List[proto.Execution]:
+        """Returns all executions associated with this pipeline run."""
+        if self._executions is None:
+            self._executions = self._metadata_store.get_pipeline_run_executions(
+                self
+            )
+        return self._executions
+
     @property
     def status(self) -> ExecutionStatus:
-        """Returns the current status of the pipeline run."""
-        step_statuses = (step.status for step in self.steps)
-
-        if any(status == ExecutionStatus.FAILED for status in step_statuses):
-            return ExecutionStatus.FAILED
-        elif all(
-            status == ExecutionStatus.COMPLETED
-            or status == ExecutionStatus.CACHED
-            for status in step_statuses
-        ):
-            return ExecutionStatus.COMPLETED
-        else:
-            return ExecutionStatus.RUNNING
+        """Returns the current status of the pipeline run.
+
+        The executions of the run are refreshed with a single query, so
+        polling the status doesn't look up every step separately.
+        """
+        self._executions = None
+        return self._metadata_store.get_pipeline_run_status(self)
 
     @property
     def steps(self) -> List[StepView]:
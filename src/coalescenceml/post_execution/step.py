@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from coalescenceml.enums import ExecutionStatus
 from coalescenceml.post_execution.artifact import ArtifactView
@@ -8,6 +8,9 @@ from coalescenceml.post_execution.artifact import ArtifactView
 
 if TYPE_CHECKING:
     from coalescenceml.metadata_store import BaseMetadataStore
+    from coalescenceml.metadata_store.artifact_graph import ArtifactGraph
+    from coalescenceml.metadata_store.lineage import LineageGraph
+    from coalescenceml.metadata_store.step_metrics import StepMetrics
 
 
 class StepView:
@@ -23,6 +26,8 @@ class StepView:
         name: str,
         parameters: Dict[str, Any],
         metadata_store: BaseMetadataStore,
+        artifact_graph: Optional[ArtifactGraph] = None,
+        metrics: Optional[StepMetrics] = None,
     ):
         """Initializes a post-execution step object.
         In most cases `StepView` objects should not be created manually
@@ -35,6 +40,11 @@ class StepView:
             parameters: Parameters that were used to run this step.
             metadata_store: The metadata store which should be used to fetch
                 additional information related to this step.
+            artifact_graph: Artifact lineage of the pipeline run this step
+                belongs to. If given, inputs and outputs are resolved from
+                it instead of querying the metadata store for this step.
+            metrics: Timing and resource usage recorded when the step was
+                executed.
         """
         self._id = id_
         self._parents_step_ids = parents_step_ids
@@ -42,6 +52,8 @@ class StepView:
         self._name = name
         self._parameters = parameters
         self._metadata_store = metadata_store
+        self._artifact_graph = artifact_graph
+        self._metrics = metrics
 
         self._inputs: Dict[str, ArtifactView] = {}
         self._outputs: Dict[str, ArtifactView] = {}
@@ -59,11 +71,7 @@ class StepView:
     @property
     def parent_steps(self) -> List["StepView"]:
         """Returns a list of all parent steps of this step."""
-        steps = [
-            self._metadata_store.get_step_by_id(s)
-            for s in self.parents_step_ids
-        ]
-        return steps
+        return self._metadata_store.get_steps_by_ids(self.parents_step_ids)
 
     @property
     def entrypoint_name(self) -> str:
@@ -102,6 +110,25 @@ class StepView:
         """The parameters used to run this step."""
         return self._parameters
 
+    @property
+    def metrics(self) -> Optional[StepMetrics]:
+        """Returns the timing and resource usage of this step.
+
+        This is `None` if no metrics were recorded, e.g. for steps executed
+        by an older version.
+        """
+        return self._metrics
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Returns the wall-clock duration of this step in seconds."""
+        return self._metrics.wall_time if self._metrics else None
+
+    @property
+    def peak_memory(self) -> Optional[int]:
+        """Returns the peak resident set size during this step in bytes."""
+        return self._metrics.peak_memory if self._metrics else None
+
     @property
     def status(self) -> ExecutionStatus:
         """Returns the current status of the step."""
@@ -155,6 +182,26 @@ class StepView:
             )
         return next(iter(self.outputs.values()))
 
+    def get_lineage(
+        self,
+        direction: str = "both",
+        max_depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+    ) -> LineageGraph:
+        """Returns the lineage of this step.
+
+        Args:
+            direction: `"upstream"`, `"downstream"` or `"both"`.
+            max_depth: Maximum number of hops from this step.
+            max_nodes: Approximate maximum number of nodes in the graph.
+        """
+        return self._metadata_store.get_lineage(
+            steps=[self],
+            direction=direction,
+            max_depth=max_depth,
+            max_nodes=max_nodes,
+        )
+
     def _ensure_inputs_outputs_fetched(self) -> None:
         """Fetches all step inputs and outputs from the metadata store."""
         if self._inputs or self._outputs:
@@ -1,7 +1,10 @@
 from collections import defaultdict
 from typing import ClassVar, DefaultDict, Dict, Type, TypeVar
 
-from coalescenceml.artifact_store import LocalArtifactStore
+from coalescenceml.artifact_store import (
+    LocalArtifactStore,
+    TieredArtifactStore,
+)
 from coalescenceml.container_registry import BaseContainerRegistry
 from coalescenceml.enums import StackComponentFlavor
 from coalescenceml.logger import get_logger
@@ -100,4 +103,5 @@ StackComponentClassRegistry.register_class(LocalOrchestrator)
 StackComponentClassRegistry.register_class(SQLiteMetadataStore)
 StackComponentClassRegistry.register_class(MySQLMetadataStore)
 StackComponentClassRegistry.register_class(LocalArtifactStore)
+StackComponentClassRegistry.register_class(TieredArtifactStore)
 StackComponentClassRegistry.register_class(BaseContainerRegistry)
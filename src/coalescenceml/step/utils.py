@@ -39,7 +39,10 @@ from tfx.types.channel import Channel
 from tfx.utils import json_utils
 
 from coalescenceml.artifacts.base_artifact import BaseArtifact
+from coalescenceml.constants import SHOULD_VERIFY_ARTIFACT_CHECKSUMS
+from coalescenceml.exceptions import ArtifactChecksumError
 from coalescenceml.io import fileio
+from coalescenceml.io.checksum import ChecksumRecorder, verify_artifact_checksum
 from coalescenceml.logger import get_logger
 from coalescenceml.producers.base_producer import BaseProducer
 from coalescenceml.step.base_step_config import BaseStepConfig
@@ -202,6 +205,10 @@ class _FunctionExecutor(BaseExecutor):
 
         Returns:
             Return the output of `handle_input()` of selected producer.
+
+        Raises:
+            ArtifactChecksumError: If checksum verification is enabled and
+                the artifact data does not match its recorded checksum.
         """
         # Skip materialization for BaseArtifact and its subtypes.
         if issubclass(data_type, BaseArtifact):
@@ -214,6 +221,16 @@ class _FunctionExecutor(BaseExecutor):
                 )
             return artifact
 
+        if (
+            SHOULD_VERIFY_ARTIFACT_CHECKSUMS
+            and artifact.checksum
+            and not verify_artifact_checksum(artifact.uri, artifact.checksum)
+        ):
+            raise ArtifactChecksumError(
+                f"Data of artifact '{artifact.uri}' does not match its "
+                f"recorded checksum '{artifact.checksum}'."
+            )
+
         producer = source_utils.load_source_path_class(artifact.producer)(
             artifact
         )
@@ -240,7 +257,20 @@ class _FunctionExecutor(BaseExecutor):
         )
         artifact.producer = source_utils.resolve_class(producer_class)
         artifact.datatype = source_utils.resolve_class(type(data))
-        producer_class(artifact).handle_return(data)
+
+        # Hash the data while the producer streams it to the artifact store
+        with ChecksumRecorder() as recorder:
+            producer_class(artifact).handle_return(data)
+        # A single listing of the artifact gives its size and confirms that
+        # all of its files were hashed
+        file_sizes = fileio.list_prefix(artifact.uri)
+        artifact.size = sum(file_sizes.values())
+        checksum = recorder.get_artifact_checksum(
+            artifact.uri, stored_files=file_sizes
+        )
+        if checksum:
+            artifact.checksum = checksum
+        fileio.finalize_artifact(artifact.uri, artifact.type_name)
 
     def check_output_types_match(
         self, output_value: Any, specified_type: Type[Any]
@@ -23,3 +23,24 @@ def get_human_readable_time(seconds: float) -> str:
         time_string = f"{seconds:.3f}s"
 
     return prefix + time_string
+
+
+def get_human_readable_filesize(num_bytes: int) -> str:
+    """Convert a number of bytes into a human-readable string.
+
+    Args:
+        num_bytes: number of bytes
+
+    Returns:
+        String that displays the size using binary units, e.g. `1.5 KiB`
+    """
+    prefix = "-" if num_bytes < 0 else ""
+    size = float(abs(num_bytes))
+    for unit in ["B", "KiB", "MiB", "GiB", "TiB"]:
+        if size < 1024 or unit == "TiB":
+            break
+        size /= 1024
+
+    if unit == "B":
+        return f"{prefix}{int(size)} B"
+    return f"{prefix}{size:.1f} {unit}"
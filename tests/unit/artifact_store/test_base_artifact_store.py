@@ -0,0 +1,84 @@
+from coalescenceml.artifact_store.base_artifact_store import (
+    STAT_LISTING_THRESHOLD,
+    _qualify_path,
+    _stat_object_files,
+    _walk_from_listing,
+)
+
+
+class _FakeObjectFilesystem:
+    """Object store filesystem recording its listing and info requests."""
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.calls = []
+
+    def info(self, path):
+        self.calls.append(("info", path))
+        key = path[len("s3://") :]
+        if key not in self.keys:
+            raise FileNotFoundError(path)
+        return {"name": key, "size": 1}
+
+    def ls(self, path, detail=True):
+        self.calls.append(("ls", path))
+        prefix = path[len("s3://") :] + "/"
+        return [
+            {"name": key, "size": 1}
+            for key in self.keys
+            if key.startswith(prefix) and "/" not in key[len(prefix) :]
+        ]
+
+
+def test_walk_from_listing_topdown_and_bottom_up():
+    """Tests that walking a flat listing yields the same entries as a
+    directory walk in both orders."""
+    files = [
+        "s3://bucket/root/a.txt",
+        "s3://bucket/root/x/b.txt",
+        "s3://bucket/root/x/y/c.txt",
+    ]
+    topdown = list(_walk_from_listing("s3://bucket/root", files))
+    assert topdown == [
+        ("s3://bucket/root", ["x"], ["a.txt"]),
+        ("s3://bucket/root/x", ["y"], ["b.txt"]),
+        ("s3://bucket/root/x/y", [], ["c.txt"]),
+    ]
+
+    bottom_up = list(
+        _walk_from_listing("s3://bucket/root/", files, topdown=False)
+    )
+    assert bottom_up == list(reversed(topdown))
+
+
+def test_walk_from_listing_of_missing_prefix_is_empty():
+    """Tests that walking a prefix without any files yields nothing."""
+    assert list(_walk_from_listing("s3://bucket/root", [])) == []
+
+
+def test_qualify_path_adds_scheme_of_prefix():
+    """Tests that scheme-less keys get the scheme of the listed prefix."""
+    assert _qualify_path("s3://bucket", "bucket/key") == "s3://bucket/key"
+    assert _qualify_path("s3://bucket", "s3://bucket/key") == "s3://bucket/key"
+    assert _qualify_path("/local/dir", "/local/dir/key") == "/local/dir/key"
+
+
+def test_stat_object_files_uses_info_for_few_files():
+    """Tests that a few files are stat-ed without listing their prefix."""
+    filesystem = _FakeObjectFilesystem(["bucket/big/a", "bucket/big/b"])
+    stats = _stat_object_files(
+        filesystem, "s3://", ["s3://bucket/big/a", "s3://bucket/big/missing"]
+    )
+
+    assert set(stats) == {"s3://bucket/big/a"}
+    assert all(call[0] == "info" for call in filesystem.calls)
+
+
+def test_stat_object_files_lists_prefix_of_many_files():
+    """Tests that many files below one prefix are stat-ed by one listing."""
+    keys = [f"bucket/dir/{i}" for i in range(STAT_LISTING_THRESHOLD)]
+    filesystem = _FakeObjectFilesystem(keys)
+    stats = _stat_object_files(filesystem, "s3://", [f"s3://{k}" for k in keys])
+
+    assert set(stats) == {f"s3://{k}" for k in keys}
+    assert filesystem.calls == [("ls", "s3://bucket/dir")]
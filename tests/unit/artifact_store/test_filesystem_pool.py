@@ -0,0 +1,29 @@
+from coalescenceml.artifact_store.filesystem_pool import FilesystemPool
+
+
+def test_filesystem_pool_is_shared_across_instances():
+    """Tests that the pool is a process-wide singleton."""
+    assert FilesystemPool() is FilesystemPool()
+
+
+def test_filesystem_pool_creates_each_client_only_once():
+    """Tests that the factory is only called for unknown keys."""
+    pool = FilesystemPool()
+    pool.clear()
+    created = []
+
+    def _factory():
+        created.append(object())
+        return created[-1]
+
+    first = pool.get(("s3", "eu-west-1"), _factory)
+    second = pool.get(("s3", "eu-west-1"), _factory)
+    other = pool.get(("s3", "us-east-1"), _factory)
+
+    assert first is second
+    assert first is not other
+    assert len(created) == 2
+    assert len(pool) == 2
+
+    pool.clear()
+    assert len(pool) == 0
@@ -0,0 +1,183 @@
+import json
+import os
+
+import pytest
+from ml_metadata import errors
+from ml_metadata.proto import metadata_store_pb2
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.artifact_store import LocalArtifactStore
+from coalescenceml.artifact_store.garbage_collector import (
+    ArtifactGarbageCollector,
+    _files_below,
+)
+from coalescenceml.artifacts.constants import TAGS_PROPERTY_KEY
+from coalescenceml.metadata_store import SQLiteMetadataStore
+
+
+def _put_context(store, type_name, name):
+    """Creates a context of the given type and returns it."""
+    try:
+        type_id = store.get_context_type(type_name).id
+    except errors.NotFoundError:
+        type_id = store.put_context_type(
+            metadata_store_pb2.ContextType(name=type_name)
+        )
+    context = metadata_store_pb2.Context(type_id=type_id, name=name)
+    context.id = store.put_contexts([context])[0]
+    return context
+
+
+def _put_run(
+    store,
+    pipeline_context,
+    run_name,
+    uri,
+    file_sizes,
+    state=metadata_store_pb2.Execution.COMPLETE,
+    tags=None,
+):
+    """Creates a pipeline run with a single step whose output artifact is
+    stored at `uri`, writes the files of the artifact and returns its ID."""
+    execution_type_id = store.put_execution_type(
+        metadata_store_pb2.ExecutionType(name="coalescenceml.step")
+    )
+    artifact_type_id = store.put_artifact_type(
+        metadata_store_pb2.ArtifactType(name="DataArtifact")
+    )
+    run_context = _put_context(store, PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name)
+    artifact = metadata_store_pb2.Artifact(type_id=artifact_type_id, uri=uri)
+    if tags:
+        artifact.custom_properties[TAGS_PROPERTY_KEY].string_value = json.dumps(
+            tags
+        )
+    event = metadata_store_pb2.Event(type=metadata_store_pb2.Event.OUTPUT)
+    event.path.steps.add().key = "output"
+    _, artifact_ids, _ = store.put_execution(
+        metadata_store_pb2.Execution(
+            type_id=execution_type_id, last_known_state=state
+        ),
+        [(artifact, event)],
+        [pipeline_context, run_context],
+    )
+
+    for file_name, size in file_sizes.items():
+        path = os.path.join(uri, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"0" * size)
+    return artifact_ids[0]
+
+
+def test_files_below_only_returns_nested_files():
+    """Tests that only files inside the artifact URI are matched and
+    similarly named siblings are ignored."""
+    paths = sorted(
+        [
+            "s3://bucket/step/output/1/data.json",
+            "s3://bucket/step/output/1/nested/data.json",
+            "s3://bucket/step/output/10/data.json",
+            "s3://bucket/step/output/2",
+        ]
+    )
+    assert _files_below(paths, "s3://bucket/step/output/1") == [
+        "s3://bucket/step/output/1/data.json",
+        "s3://bucket/step/output/1/nested/data.json",
+    ]
+    assert _files_below(paths, "s3://bucket/step/output/2") == [
+        "s3://bucket/step/output/2"
+    ]
+    assert _files_below(paths, "s3://bucket/step/output/3") == []
+
+
+def test_garbage_collector_rejects_invalid_arguments():
+    """Tests that negative retention counts and batch sizes are rejected."""
+    with pytest.raises(ValueError):
+        ArtifactGarbageCollector(None, None, keep_last_runs=-1)
+
+    with pytest.raises(ValueError):
+        ArtifactGarbageCollector(None, None, batch_size=0)
+
+
+def test_garbage_collector_deletes_unreachable_artifacts(tmp_path):
+    """Tests that only the artifacts of runs which are neither pinned, nor
+    among the last runs, nor still running, and which aren't tagged, get
+    deleted."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db")
+    )
+    root = str(tmp_path / "artifacts")
+    artifact_store = LocalArtifactStore(name="", path=root)
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+
+    def _uri(run_name):
+        return os.path.join(root, run_name, "output")
+
+    pinned = _put_run(
+        store, pipeline_context, "pinned", _uri("pinned"), {"data": 1}
+    )
+    tagged = _put_run(
+        store,
+        pipeline_context,
+        "tagged",
+        _uri("tagged"),
+        {"data": 2},
+        tags=["release"],
+    )
+    running = _put_run(
+        store,
+        pipeline_context,
+        "running",
+        _uri("running"),
+        {"data": 4},
+        state=metadata_store_pb2.Execution.RUNNING,
+    )
+    expired = _put_run(
+        store,
+        pipeline_context,
+        "expired",
+        _uri("expired"),
+        {"data": 8, os.path.join("nested", "data"): 16},
+    )
+    latest = _put_run(
+        store, pipeline_context, "latest", _uri("latest"), {"data": 32}
+    )
+    metadata_store.pin_pipeline_run("pinned")
+    retained = [pinned, tagged, running, latest]
+
+    collector = ArtifactGarbageCollector(
+        metadata_store, artifact_store, keep_last_runs=1, batch_size=2
+    )
+    report = collector.collect(dry_run=True)
+    assert report.dry_run
+    assert report.artifact_ids == [expired]
+    assert report.artifact_uris == [_uri("expired")]
+    assert report.file_count == 2
+    assert report.reclaimed_bytes == 24
+    assert os.path.exists(os.path.join(_uri("expired"), "data"))
+
+    report = collector.collect(dry_run=False)
+    assert not report.dry_run
+    assert report.artifact_ids == [expired]
+    assert not os.path.exists(_uri("expired"))
+    for run_name in ("pinned", "tagged", "running", "latest"):
+        assert os.path.exists(os.path.join(_uri(run_name), "data"))
+
+    artifacts = {
+        artifact.id: artifact
+        for artifact in metadata_store.mlmd_store.get_artifacts()
+    }
+    assert artifacts[expired].state == metadata_store_pb2.Artifact.DELETED
+    assert all(
+        artifacts[artifact_id].state != metadata_store_pb2.Artifact.DELETED
+        for artifact_id in retained
+    )
+
+    # deleted artifacts aren't collected again
+    assert collector.collect(dry_run=True).artifact_ids == []
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from coalescenceml.artifact_store import TieredArtifactStore
+from coalescenceml.artifact_store.exceptions import ArtifactStoreInterfaceError
+from coalescenceml.enums import StackComponentFlavor
+
+
+REMOTE_PATH = "gs://coml-tiered-test/artifacts"
+
+
+@pytest.fixture(autouse=True)
+def restore_filesystem_registry():
+    """Restores the TFX filesystem registry after each test, as creating a
+    tiered artifact store registers its filesystem for the remote scheme
+    with a preferred priority."""
+    from tfx.dsl.io.filesystem_registry import DEFAULT_FILESYSTEM_REGISTRY
+
+    saved_state = {
+        name: dict(value)
+        for name, value in vars(DEFAULT_FILESYSTEM_REGISTRY).items()
+        if isinstance(value, dict)
+    }
+    yield
+    for name, value in saved_state.items():
+        setattr(DEFAULT_FILESYSTEM_REGISTRY, name, value)
+
+
+def test_tiered_artifact_store_attributes(tmp_path):
+    """Tests that the basic attributes of the tiered artifact store are set
+    correctly."""
+    artifact_store = TieredArtifactStore(
+        name="", path=REMOTE_PATH, local_path=str(tmp_path), remote_flavor="gcp"
+    )
+    assert artifact_store.TYPE == StackComponentFlavor.ARTIFACT_STORE
+    assert artifact_store.FLAVOR == "tiered"
+
+
+def test_tiered_artifact_store_requires_local_hot_tier():
+    """Checks that the local tier can't live on a remote filesystem."""
+    with pytest.raises(ArtifactStoreInterfaceError):
+        TieredArtifactStore(
+            name="",
+            path=REMOTE_PATH,
+            local_path="s3://remote/path",
+            remote_flavor="s3",
+        )
+
+
+def test_tiered_artifact_store_maps_paths_between_tiers(tmp_path):
+    """Tests that remote paths are mapped into the local tier and back."""
+    artifact_store = TieredArtifactStore(
+        name="", path=REMOTE_PATH, local_path=str(tmp_path), remote_flavor="gcp"
+    )
+    remote_file = f"{REMOTE_PATH}/trainer/model/1/saved_model.pb"
+    local_file = artifact_store._local(remote_file)
+
+    assert local_file == os.path.join(
+        str(tmp_path), "trainer", "model", "1", "saved_model.pb"
+    )
+    assert artifact_store._remote(local_file) == remote_file
+    assert artifact_store._local("gs://other-bucket/file") is None
+
+
+def test_tiered_artifact_store_writes_to_local_tier(tmp_path):
+    """Tests that files are written to and read from the local tier."""
+    artifact_store = TieredArtifactStore(
+        name="", path=REMOTE_PATH, local_path=str(tmp_path), remote_flavor="gcp"
+    )
+    remote_file = f"{REMOTE_PATH}/step/output/1/data.json"
+    with artifact_store.open(remote_file, "w") as f:
+        f.write("{}")
+
+    assert (tmp_path / "step" / "output" / "1" / "data.json").exists()
+    with artifact_store.open(remote_file, "r") as f:
+        assert f.read() == "{}"
+
+
+def test_tiered_artifact_store_persist_policy(tmp_path):
+    """Tests which artifact types get promoted to the remote tier."""
+    persist_all = TieredArtifactStore(
+        name="", path=REMOTE_PATH, local_path=str(tmp_path), remote_flavor="gcp"
+    )
+    assert persist_all.should_persist("DataArtifact")
+
+    persist_models = TieredArtifactStore(
+        name="",
+        path=REMOTE_PATH,
+        local_path=str(tmp_path),
+        remote_flavor="gcp",
+        persist_artifact_types=["ModelArtifact"],
+    )
+    assert persist_models.should_persist("ModelArtifact")
+    assert not persist_models.should_persist("DataArtifact")
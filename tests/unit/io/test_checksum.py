@@ -0,0 +1,75 @@
+import os
+
+from coalescenceml.io import fileio
+from coalescenceml.io.checksum import (
+    ChecksumRecorder,
+    calculate_artifact_checksum,
+    verify_artifact_checksum,
+)
+
+
+def _write_artifact(uri: str) -> None:
+    """Writes two files into an artifact directory using fileio."""
+    fileio.makedirs(uri)
+    with fileio.open(os.path.join(uri, "data.json"), "w") as f:
+        f.write('{"a": 1}')
+    with fileio.open(os.path.join(uri, "data.bin"), "wb") as f:
+        f.write(b"\x00\x01\x02")
+
+
+def test_recorded_checksum_matches_calculated_checksum(tmp_path):
+    """Check the streaming checksum equals the one computed from the files"""
+    uri = str(tmp_path / "artifact")
+    with ChecksumRecorder() as recorder:
+        _write_artifact(uri)
+
+    checksum = recorder.get_artifact_checksum(uri)
+    assert checksum is not None
+    assert checksum.startswith("sha256:")
+    assert checksum == calculate_artifact_checksum(uri)
+    assert verify_artifact_checksum(uri, checksum)
+
+
+def test_checksum_verification_fails_for_modified_data(tmp_path):
+    """Check that verification detects modified artifact data"""
+    uri = str(tmp_path / "artifact")
+    with ChecksumRecorder() as recorder:
+        _write_artifact(uri)
+    checksum = recorder.get_artifact_checksum(uri)
+
+    with open(os.path.join(uri, "data.json"), "w") as f:
+        f.write('{"a": 2}')
+    assert not verify_artifact_checksum(uri, checksum)
+
+
+def test_no_checksum_for_files_written_outside_fileio(tmp_path):
+    """Check that no checksum is recorded if the producer bypassed fileio"""
+    uri = str(tmp_path / "artifact")
+    with ChecksumRecorder() as recorder:
+        _write_artifact(uri)
+        with open(os.path.join(uri, "other.txt"), "w") as f:
+            f.write("unknown")
+
+    assert recorder.get_artifact_checksum(uri) is None
+
+
+def test_files_are_not_wrapped_without_active_recorder(tmp_path):
+    """Check that fileio.open returns the plain file outside a recorder"""
+    assert ChecksumRecorder.get_active() is None
+    with fileio.open(str(tmp_path / "file.txt"), "w") as f:
+        assert type(f._file).__name__ != "_HashingFile"
+
+
+def test_checksum_reuses_listing_of_artifact(tmp_path):
+    """Check that a listing passed to the recorder replaces its own"""
+    uri = str(tmp_path / "artifact")
+    with ChecksumRecorder() as recorder:
+        _write_artifact(uri)
+
+    file_sizes = fileio.list_prefix(uri)
+    assert sum(file_sizes.values()) == 11
+    checksum = recorder.get_artifact_checksum(uri, stored_files=file_sizes)
+    assert checksum == calculate_artifact_checksum(uri)
+
+    stored_files = list(file_sizes) + [os.path.join(uri, "other.txt")]
+    assert recorder.get_artifact_checksum(uri, stored_files) is None
@@ -0,0 +1,62 @@
+import os
+
+from coalescenceml.io import fileio
+from coalescenceml.io.counters import get_io_counters
+
+
+def test_io_counters_count_bytes_read_and_written(tmp_path):
+    """Check that bytes transferred through fileio are counted"""
+    path = os.path.join(str(tmp_path), "data.bin")
+    before = get_io_counters()
+    with fileio.open(path, "wb") as f:
+        f.write(b"\x00" * 100)
+    after_write = get_io_counters()
+    assert after_write.bytes_written - before.bytes_written == 100
+    assert after_write.bytes_read == before.bytes_read
+
+    with fileio.open(path, "rb") as f:
+        assert len(f.read(60)) == 60
+        assert len(f.read()) == 40
+    after_read = get_io_counters()
+    assert after_read.bytes_read - after_write.bytes_read == 100
+    assert after_read.bytes_written == after_write.bytes_written
+
+
+def test_io_counters_count_lines(tmp_path):
+    """Check that iterating over a text file counts the lines read"""
+    path = os.path.join(str(tmp_path), "data.txt")
+    with fileio.open(path, "w") as f:
+        f.write("first\nsecond\n")
+
+    before = get_io_counters()
+    with fileio.open(path, "r") as f:
+        assert list(f) == ["first\n", "second\n"]
+    assert get_io_counters().bytes_read - before.bytes_read == 13
+
+
+def test_counting_file_only_exposes_methods_of_wrapped_file():
+    """Check that optional read methods are only available if the wrapped
+    file has them, e.g. for pickle which checks for readinto"""
+    import io
+    import pickle
+
+    from coalescenceml.io.counters import CountingFile
+
+    class ReadOnlyFile:
+        """File without readinto, like the files of some filesystems."""
+
+        def __init__(self, data):
+            self._buffer = io.BytesIO(data)
+            self.read = self._buffer.read
+            self.readline = self._buffer.readline
+
+    data = pickle.dumps({"a": [1, 2, 3]})
+    file = CountingFile(ReadOnlyFile(data))
+    assert not hasattr(file, "readinto")
+
+    before = get_io_counters()
+    assert pickle.load(file) == {"a": [1, 2, 3]}
+    assert get_io_counters().bytes_read - before.bytes_read == len(data)
+
+    buffer = bytearray(4)
+    assert CountingFile(io.BytesIO(data)).readinto(buffer) == 4
@@ -377,6 +377,43 @@ def test_convert_to_str_converts_to_string(tmp_path) -> None:
     assert isinstance(
         coalescenceml.io.utils.convert_to_str(bytes(str(tmp_path), "ascii")), str
     )
-    assert coalescenceml.io.utils.convert_to_str(bytes(str(tmp_path), "ascii")) == str(
-        tmp_path
-    )
\ No newline at end of file
+    assert coalescenceml.io.utils.convert_to_str(
+        bytes(str(tmp_path), "ascii")
+    ) == str(tmp_path)
+
+
+def test_list_prefix_returns_all_nested_files_with_sizes(tmp_path) -> None:
+    """Test that list_prefix lists nested files together with their sizes"""
+    with open(os.path.join(tmp_path, "a.txt"), "w") as f:
+        f.write("abc")
+    coalescenceml.io.utils.create_file_if_not_exists(
+        os.path.join(tmp_path, "nested/b.txt"), file_contents="abcdef"
+    )
+    assert fileio.list_prefix(str(tmp_path)) == {
+        os.path.join(tmp_path, "a.txt"): 3,
+        os.path.join(tmp_path, "nested", "b.txt"): 6,
+    }
+
+
+def test_list_prefix_returns_empty_dict_for_missing_dir(tmp_path) -> None:
+    """Test that list_prefix returns nothing if the directory doesn't exist"""
+    assert fileio.list_prefix(os.path.join(tmp_path, "not_a_dir")) == {}
+
+
+def test_stat_many_skips_missing_files(tmp_path) -> None:
+    """Test that stat_many only returns stats for existing files"""
+    existing_file = os.path.join(tmp_path, "a.txt")
+    coalescenceml.io.utils.create_file_if_not_exists(existing_file)
+    stats = fileio.stat_many(
+        [existing_file, os.path.join(tmp_path, "not_a_file.txt")]
+    )
+    assert list(stats) == [existing_file]
+
+
+def test_remove_many_removes_all_files(tmp_path) -> None:
+    """Test that remove_many removes all given files"""
+    paths = [os.path.join(tmp_path, f"file_{i}.txt") for i in range(3)]
+    for path in paths:
+        coalescenceml.io.utils.create_file_if_not_exists(path)
+    fileio.remove_many(paths)
+    assert not any(os.path.exists(path) for path in paths)
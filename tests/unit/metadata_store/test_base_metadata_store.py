@@ -0,0 +1,845 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from ml_metadata import errors
+from ml_metadata.proto import metadata_store_pb2
+from tfx.dsl.compiler.constants import (
+    PIPELINE_CONTEXT_TYPE_NAME,
+    PIPELINE_RUN_CONTEXT_TYPE_NAME,
+)
+
+from coalescenceml.enums import ExecutionStatus
+from coalescenceml.metadata_store import SQLiteMetadataStore
+from coalescenceml.metadata_store.constants import RUN_INDEX_PROPERTY_KEY
+from coalescenceml.step.utils import (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX,
+    PARAM_PIPELINE_PARAMETER_NAME,
+)
+
+
+STEP_NAME_PROPERTY = (
+    INTERNAL_EXECUTION_PARAMETER_PREFIX + PARAM_PIPELINE_PARAMETER_NAME
+)
+
+
+@pytest.fixture
+def metadata_store(tmp_path):
+    """Returns a metadata store backed by a fresh sqlite database."""
+    return SQLiteMetadataStore(name="", uri=str(tmp_path / "metadata.db"))
+
+
+def _put_context(store, type_name, name):
+    """Creates a context of the given type and returns it."""
+    try:
+        type_id = store.get_context_type(type_name).id
+    except errors.NotFoundError:
+        type_id = store.put_context_type(
+            metadata_store_pb2.ContextType(name=type_name)
+        )
+    context = metadata_store_pb2.Context(type_id=type_id, name=name)
+    context.id = store.put_contexts([context])[0]
+    return context
+
+
+def _put_run(
+    store,
+    pipeline_context,
+    run_name,
+    step_names=("a", "b"),
+    state=metadata_store_pb2.Execution.COMPLETE,
+):
+    """Creates a pipeline run with one execution in the given state per
+    step."""
+    execution_type_id = store.put_execution_type(
+        metadata_store_pb2.ExecutionType(name="coalescenceml.step")
+    )
+    run_context = _put_context(store, PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name)
+    executions = []
+    for step_name in step_names:
+        execution = metadata_store_pb2.Execution(
+            type_id=execution_type_id, last_known_state=state
+        )
+        execution.custom_properties[
+            STEP_NAME_PROPERTY
+        ].string_value = json.dumps(step_name)
+        executions.append(execution)
+    execution_ids = store.put_executions(executions)
+    store.put_attributions_and_associations(
+        [],
+        [
+            metadata_store_pb2.Association(
+                context_id=context.id, execution_id=execution_id
+            )
+            for execution_id in execution_ids
+            for context in (pipeline_context, run_context)
+        ],
+    )
+    return run_context
+
+
+def test_get_pipeline_runs_only_returns_runs_of_pipeline(metadata_store):
+    """Tests that runs of other pipelines are not returned and that runs
+    created before the run index existed get indexed."""
+    store = metadata_store.store
+    pipeline_a = _put_context(store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline_a")
+    pipeline_b = _put_context(store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline_b")
+    _put_run(store, pipeline_a, "run_1")
+    _put_run(store, pipeline_b, "run_2")
+    _put_run(store, pipeline_a, "run_3")
+
+    pipeline = metadata_store.get_pipeline("pipeline_a")
+    assert pipeline.get_run_names() == ["run_1", "run_3"]
+
+    pipeline_context = store.get_contexts_by_id([pipeline_a.id])[0]
+    assert RUN_INDEX_PROPERTY_KEY in pipeline_context.custom_properties
+    assert {
+        context.name
+        for context in store.get_children_contexts_by_context(pipeline_a.id)
+    } == {"run_1", "run_3"}
+
+    # runs linked by the orchestrator show up without rebuilding the index
+    _put_run(store, pipeline_a, "run_4")
+    metadata_store.link_pipeline_run("pipeline_a", "run_4")
+    assert pipeline.get_run_names() == ["run_1", "run_3", "run_4"]
+
+    # runs which weren't linked after the index was built get indexed too
+    _put_run(store, pipeline_a, "run_5")
+    assert pipeline.get_run_names() == ["run_1", "run_3", "run_4", "run_5"]
+
+
+class _CallRecorder:
+    """Records the names of the methods called on an MLMD store."""
+
+    def __init__(self, store):
+        self._store = store
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+
+        def _record(*args, **kwargs):
+            self.calls.append(name)
+            return method(*args, **kwargs)
+
+        return _record
+
+
+def test_unchanged_run_index_is_checked_with_one_query(tmp_path):
+    """Tests that listing runs again only queries for new executions of the
+    pipeline and doesn't write the run index."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=False
+    )
+    recorder = _CallRecorder(metadata_store.mlmd_store)
+    metadata_store._mlmd_store = recorder
+    pipeline_context = _put_context(
+        recorder, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_run(recorder, pipeline_context, "run_1")
+    _put_run(recorder, pipeline_context, "run_2")
+    pipeline = metadata_store.get_pipeline("pipeline")
+    assert pipeline.get_run_names() == ["run_1", "run_2"]
+
+    recorder.calls.clear()
+    assert pipeline.get_run_names() == ["run_1", "run_2"]
+    assert recorder.calls.count("get_executions") == 1
+    assert not [call for call in recorder.calls if call.startswith("put_")]
+
+    pipeline_context = recorder.get_contexts_by_id([pipeline_context.id])[0]
+    recorder.calls.clear()
+    metadata_store._update_pipeline_run_index(pipeline_context)
+    assert recorder.calls == ["get_executions"]
+
+
+def test_get_pipeline_run_checks_pipeline(metadata_store):
+    """Tests that a run can only be fetched for the pipeline it belongs
+    to."""
+    store = metadata_store.store
+    pipeline_a = _put_context(store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline_a")
+    pipeline_b = _put_context(store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline_b")
+    _put_run(store, pipeline_a, "run_1")
+    _put_run(store, pipeline_b, "run_2")
+    metadata_store.link_pipeline_run("pipeline_b", "run_2")
+
+    pipeline = metadata_store.get_pipeline("pipeline_a")
+    run = metadata_store.get_pipeline_run(pipeline, "run_1")
+    assert run is not None
+    assert len(run.executions) == 2
+    assert metadata_store.get_pipeline_run(pipeline, "run_2") is None
+    assert metadata_store.get_pipeline_run(pipeline, "missing") is None
+
+
+def _put_chained_run(store, pipeline_context, run_name, step_names):
+    """Creates a pipeline run in which every step consumes the output
+    artifact of the previous step."""
+    execution_type_id = store.put_execution_type(
+        metadata_store_pb2.ExecutionType(name="coalescenceml.step")
+    )
+    artifact_type_id = store.put_artifact_type(
+        metadata_store_pb2.ArtifactType(name="DataArtifact")
+    )
+    run_context = _put_context(store, PIPELINE_RUN_CONTEXT_TYPE_NAME, run_name)
+    execution_ids = []
+    previous_artifact = None
+    for index, step_name in enumerate(step_names):
+        execution = metadata_store_pb2.Execution(
+            type_id=execution_type_id,
+            last_known_state=metadata_store_pb2.Execution.COMPLETE,
+        )
+        execution.custom_properties[
+            STEP_NAME_PROPERTY
+        ].string_value = json.dumps(step_name)
+        artifact = metadata_store_pb2.Artifact(
+            type_id=artifact_type_id, uri=f"/artifacts/{run_name}/{index}"
+        )
+        artifacts_and_events = []
+        if previous_artifact is not None:
+            input_event = metadata_store_pb2.Event(
+                type=metadata_store_pb2.Event.INPUT,
+                milliseconds_since_epoch=2 * index,
+            )
+            input_event.path.steps.add().key = "input"
+            artifacts_and_events.append((previous_artifact, input_event))
+        output_event = metadata_store_pb2.Event(
+            type=metadata_store_pb2.Event.OUTPUT,
+            milliseconds_since_epoch=2 * index + 1,
+        )
+        output_event.path.steps.add().key = "output"
+        artifacts_and_events.append((artifact, output_event))
+
+        execution_id, artifact_ids, _ = store.put_execution(
+            execution, artifacts_and_events, [pipeline_context, run_context]
+        )
+        artifact.id = artifact_ids[-1]
+        previous_artifact = artifact
+        execution_ids.append(execution_id)
+    return execution_ids
+
+
+def test_get_pipeline_run_steps_resolves_parents(metadata_store):
+    """Tests that parent steps are resolved from the artifact lineage."""
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second, third = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second", "third"]
+    )
+
+    pipeline = metadata_store.get_pipeline("pipeline")
+    steps = pipeline.get_run("run").steps
+    assert [step.name for step in steps] == ["first", "second", "third"]
+    assert [step.parents_step_ids for step in steps] == [
+        [],
+        [first],
+        [second],
+    ]
+    assert [step.id for step in steps[2].parent_steps] == [second]
+    assert metadata_store.get_steps_by_ids([third, first]) == [
+        steps[2],
+        steps[0],
+    ]
+
+
+def test_step_artifacts_are_resolved_from_run_graph(metadata_store):
+    """Tests inputs, outputs and producers of steps in a chained run."""
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+
+    steps = metadata_store.get_pipeline("pipeline").get_run("run").steps
+    output = steps[0].output
+    input_ = steps[1].input
+
+    assert output == input_
+    assert output.parent_step_id == first
+    assert input_.parent_step_id == first
+    assert input_.producer_step_id == first
+    assert input_.producer_step == steps[0]
+    assert not input_.is_cached
+    assert steps[1].output.producer_step_id == second
+
+
+def test_query_pipeline_runs(metadata_store):
+    """Tests ordering, limits, paging and status filters of run queries."""
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_run(store, pipeline_context, "run_1")
+    _put_run(
+        store,
+        pipeline_context,
+        "run_2",
+        state=metadata_store_pb2.Execution.FAILED,
+    )
+    _put_run(store, pipeline_context, "run_3")
+    pipeline = metadata_store.get_pipeline("pipeline")
+
+    def _names(runs):
+        return [run.name for run in runs]
+
+    assert _names(pipeline.query_runs()) == ["run_3", "run_2", "run_1"]
+    assert _names(pipeline.query_runs(order="asc", limit=2)) == [
+        "run_1",
+        "run_2",
+    ]
+    first_page = pipeline.query_runs(limit=2)
+    assert _names(pipeline.query_runs(limit=2, start_after=first_page[-1])) == [
+        "run_1"
+    ]
+    assert _names(
+        pipeline.query_runs(status=ExecutionStatus.COMPLETED, limit=1)
+    ) == ["run_3"]
+    assert _names(pipeline.query_runs(status=ExecutionStatus.FAILED)) == [
+        "run_2"
+    ]
+    assert pipeline.query_runs(since=datetime.now() + timedelta(days=1)) == []
+    with pytest.raises(ValueError):
+        pipeline.query_runs(order="newest")
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_get_lineage(metadata_store, tmp_path, use_index):
+    """Tests upstream and downstream lineage of a chained run."""
+    if use_index:
+        metadata_store = SQLiteMetadataStore(
+            name="",
+            uri=str(tmp_path / "metadata.db"),
+            lineage_index_path=str(tmp_path / "lineage.db"),
+        )
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second, third = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second", "third"]
+    )
+    steps = metadata_store.get_pipeline("pipeline").get_run("run").steps
+    first_output = steps[0].output
+    last_output = steps[2].output
+
+    upstream = last_output.get_lineage(direction="upstream")
+    assert upstream.execution_ids() == [first, second, third]
+    assert upstream.artifact_ids() == sorted(
+        [first_output.id, steps[1].output.id, last_output.id]
+    )
+    assert upstream.predecessors(("artifact", last_output.id)) == [
+        ("execution", third)
+    ]
+    assert upstream.nodes[("execution", first)]["step_name"] == "first"
+    assert upstream.nodes[("execution", first)]["depth"] == 5
+    assert upstream.nodes[("artifact", first_output.id)]["uri"] == (
+        first_output.uri
+    )
+
+    downstream = first_output.get_lineage(direction="downstream", max_depth=1)
+    assert downstream.execution_ids() == [second]
+    assert downstream.edges == [
+        (("artifact", first_output.id), ("execution", second))
+    ]
+    assert downstream.get_pipeline_run_names(second) == ["run"]
+
+    both = steps[1].get_lineage()
+    assert both.execution_ids() == [first, second, third]
+    assert len(both.edges) == 5
+
+    with pytest.raises(ValueError):
+        steps[1].get_lineage(direction="sideways")
+
+
+def test_export_run_history(metadata_store, tmp_path):
+    """Tests that runs, steps, artifacts and edges are exported to parquet
+    tables."""
+    import pyarrow.parquet as pq
+
+    from coalescenceml.metadata_store.export import MetadataExporter
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second = _put_chained_run(
+        store, pipeline_context, "run_1", ["first", "second"]
+    )
+    _put_chained_run(store, pipeline_context, "run_2", ["first"])
+    metadata_store.pin_pipeline_run("run_1")
+
+    report = MetadataExporter(
+        metadata_store, str(tmp_path / "export"), page_size=1
+    ).export()
+    assert report.row_counts == {
+        "runs": 2,
+        "steps": 3,
+        "artifacts": 3,
+        "edges": 4,
+    }
+
+    runs = pq.read_table(report.files["runs"]).to_pylist()
+    assert [run["run_name"] for run in runs] == ["run_1", "run_2"]
+    assert [run["pinned"] for run in runs] == [True, False]
+    assert {run["status"] for run in runs} == {"completed"}
+    assert [run["num_steps"] for run in runs] == [2, 1]
+
+    steps = pq.read_table(report.files["steps"]).to_pylist()
+    assert [(step["run_name"], step["step_name"]) for step in steps] == [
+        ("run_1", "first"),
+        ("run_1", "second"),
+        ("run_2", "first"),
+    ]
+
+    edges = pq.read_table(report.files["edges"]).to_pylist()
+    assert sorted(
+        (edge["step_id"], edge["direction"])
+        for edge in edges
+        if edge["step_id"] in (first, second)
+    ) == [(first, "output"), (second, "input"), (second, "output")]
+
+
+def test_prune_deletes_expired_runs(metadata_store, tmp_path):
+    """Tests that expired runs are archived and deleted, while pinned runs
+    and runs which produced tagged artifacts are retained."""
+    from coalescenceml.metadata_store.pruning import MetadataPruner
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    for index in range(4):
+        _put_chained_run(
+            store, pipeline_context, f"run_{index}", ["first", "second"]
+        )
+    metadata_store.pin_pipeline_run("run_1")
+    pipeline = metadata_store.get_pipeline("pipeline")
+    metadata_store.tag_artifact(
+        pipeline.get_run("run_2").get_step("first").output, "release"
+    )
+
+    pruner = MetadataPruner(
+        metadata_store,
+        keep_last_runs=1,
+        archive_dir=str(tmp_path / "archive"),
+    )
+    report = pruner.prune(dry_run=True)
+    assert report.run_names == ["run_0"]
+    assert report.retained_run_names == ["run_2"]
+    assert len(report.execution_ids) == 2
+    assert len(pipeline.runs) == 4
+
+    report = pruner.prune(dry_run=False)
+    assert report.archive_dir is not None
+    assert report.deleted_context_count == 1
+    metadata_store.clear_cache()
+    assert [run.name for run in pipeline.runs] == ["run_1", "run_2", "run_3"]
+    assert not store.get_executions_by_id(report.execution_ids)
+
+    with pytest.raises(ValueError):
+        MetadataPruner(metadata_store)
+
+
+def test_garbage_collector_retains_executions(metadata_store):
+    """Tests that the executions of the last runs, of pinned runs and of
+    running steps are retained."""
+    from coalescenceml.artifact_store.garbage_collector import (
+        ArtifactGarbageCollector,
+    )
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    runs = [
+        _put_chained_run(
+            store, pipeline_context, f"run_{index}", ["first", "second"]
+        )
+        for index in range(4)
+    ]
+    metadata_store.pin_pipeline_run("run_0")
+    execution = store.get_executions_by_id([runs[1][0]])[0]
+    execution.last_known_state = metadata_store_pb2.Execution.RUNNING
+    store.put_executions([execution])
+
+    collector = ArtifactGarbageCollector(
+        metadata_store, None, keep_last_runs=1, batch_size=1
+    )
+    assert collector.get_retained_execution_ids() == {
+        *runs[0],
+        runs[1][0],
+        *runs[3],
+    }
+
+    collector = ArtifactGarbageCollector(metadata_store, None, keep_last_runs=0)
+    assert collector.get_retained_execution_ids() == {*runs[0], runs[1][0]}
+
+
+def test_pipeline_run_status_is_refreshed_from_executions(metadata_store):
+    """Tests that the run status reflects the current execution states."""
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+    run = metadata_store.get_pipeline("pipeline").get_run("run")
+    assert run.status == ExecutionStatus.COMPLETED
+
+    execution = store.get_executions_by_id([second])[0]
+    execution.last_known_state = metadata_store_pb2.Execution.RUNNING
+    store.put_executions([execution])
+    assert run.status == ExecutionStatus.RUNNING
+
+    execution.last_known_state = metadata_store_pb2.Execution.FAILED
+    store.put_executions([execution])
+    assert run.status == ExecutionStatus.FAILED
+
+
+def test_diff_pipeline_runs(metadata_store):
+    """Tests that runs are compared step by step."""
+    from coalescenceml.metadata_store.run_diff import diff_pipeline_runs
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_chained_run(store, pipeline_context, "run_a", ["first", "second"])
+    _, second, _ = _put_chained_run(
+        store, pipeline_context, "run_b", ["first", "second", "third"]
+    )
+    execution = store.get_executions_by_id([second])[0]
+    execution.custom_properties["epochs"].string_value = json.dumps(3)
+    store.put_executions([execution])
+
+    run_a = metadata_store.get_pipeline_run_by_name("run_a")
+    run_b = metadata_store.get_pipeline_run_by_name("run_b")
+    assert metadata_store.get_pipeline_run_by_name("missing") is None
+
+    diff = diff_pipeline_runs(run_a, run_b)
+    assert [step.name for step in diff.steps] == ["first", "second", "third"]
+    assert not diff.get_step("first").parameters
+    assert diff.get_step("second").parameters == {"epochs": (None, 3)}
+    assert diff.get_step("third").status_a is None
+    assert diff.get_step("third").status_b == ExecutionStatus.COMPLETED
+    # no checksums were recorded, so it's unknown whether the data changed
+    assert [output.changed for output in diff.get_step("first").outputs] == [
+        None
+    ]
+
+    # without checksums, artifacts of different sizes changed
+    from coalescenceml.artifacts.constants import SIZE_PROPERTY_KEY
+
+    artifact_type = store.get_artifact_type("DataArtifact")
+    artifact_type.properties[SIZE_PROPERTY_KEY] = metadata_store_pb2.INT
+    store.put_artifact_type(artifact_type, can_add_fields=True)
+    sizes = {"/artifacts/run_a/0": 10, "/artifacts/run_b/0": 20}
+    artifacts = [
+        artifact for artifact in store.get_artifacts() if artifact.uri in sizes
+    ]
+    for artifact in artifacts:
+        artifact.properties[SIZE_PROPERTY_KEY].int_value = sizes[artifact.uri]
+    store.put_artifacts(artifacts)
+
+    diff = diff_pipeline_runs(
+        metadata_store.get_pipeline_run_by_name("run_a"),
+        metadata_store.get_pipeline_run_by_name("run_b"),
+    )
+    (output,) = diff.get_step("first").outputs
+    assert (output.size_a, output.size_b, output.changed) == (10, 20, True)
+
+
+def test_step_metrics_are_exposed_on_step_view(metadata_store):
+    """Tests that recorded step metrics are read back into the step view."""
+    from coalescenceml.metadata_store.step_metrics import StepMetrics
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+    start_time = datetime(2022, 5, 1, 12, 0, 0)
+    metrics = StepMetrics(
+        start_time=start_time,
+        end_time=start_time + timedelta(seconds=2),
+        wall_time=2.0,
+        cpu_time=1.5,
+        peak_memory=1024,
+        bytes_read=10,
+        bytes_written=20,
+    )
+    metadata_store.put_step_metrics(first, metrics)
+
+    run = metadata_store.get_pipeline("pipeline").get_run("run")
+    step = run.get_step("first")
+    assert step.metrics == metrics
+    assert step.duration == 2.0
+    assert step.peak_memory == 1024
+    assert step.parameters == {}
+    assert run.get_step("second").metrics is None
+    assert run.get_step("second").duration is None
+
+
+def test_put_step_metrics_keeps_execution_state(tmp_path):
+    """Tests that recording metrics doesn't write back a stale cached state
+    of the execution."""
+    from coalescenceml.metadata_store.step_metrics import StepMetrics
+
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=True
+    )
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_run(
+        store,
+        pipeline_context,
+        "run",
+        step_names=["first"],
+        state=metadata_store_pb2.Execution.RUNNING,
+    )
+    # cache the running execution, then complete it through the uncached
+    # connection like the launcher does
+    execution = store.get_executions()[0]
+    store.get_executions_by_id([execution.id])
+    execution.last_known_state = metadata_store_pb2.Execution.COMPLETE
+    metadata_store.mlmd_store.put_executions([execution])
+
+    start_time = datetime(2022, 5, 1, 12, 0, 0)
+    metadata_store.put_step_metrics(
+        execution.id,
+        StepMetrics(
+            start_time=start_time,
+            end_time=start_time + timedelta(seconds=1),
+            wall_time=1.0,
+            cpu_time=1.0,
+        ),
+    )
+    assert metadata_store.get_execution_status(execution.id) == (
+        ExecutionStatus.COMPLETED
+    )
+
+
+def test_get_execution_status_bypasses_cache(tmp_path):
+    """Tests that the execution status isn't served from the cache."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=True
+    )
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_run(
+        store,
+        pipeline_context,
+        "run",
+        step_names=["first"],
+        state=metadata_store_pb2.Execution.RUNNING,
+    )
+    execution = store.get_executions()[0]
+    store.get_executions_by_id([execution.id])
+    execution.last_known_state = metadata_store_pb2.Execution.COMPLETE
+    metadata_store.mlmd_store.put_executions([execution])
+
+    assert metadata_store.get_execution_status(execution.id) == (
+        ExecutionStatus.COMPLETED
+    )
+
+
+def test_snapshot_keeps_executions_of_finished_runs(tmp_path):
+    """Tests that the executions of finished runs are kept in the snapshot
+    of the metadata store."""
+    snapshot_dir = str(tmp_path / "snapshots")
+    metadata_store = SQLiteMetadataStore(
+        name="",
+        uri=str(tmp_path / "metadata.db"),
+        cache_enabled=True,
+        snapshot_dir=snapshot_dir,
+    )
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    execution_ids = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+    snapshot = metadata_store.snapshot
+    assert snapshot.path == str(
+        tmp_path / "snapshots" / f"{metadata_store.uuid}.db"
+    )
+
+    run = metadata_store.get_pipeline_run_by_name("run")
+    assert len(run.executions) == 2
+    assert snapshot.get_context_executions(run._id) is None  # noqa
+
+    metadata_store.mark_pipeline_run_finished("run")
+    metadata_store.clear_cache()
+    run = metadata_store.get_pipeline_run_by_name("run")
+    assert len(run.executions) == 2
+    assert snapshot.get_context_executions(run._id) == execution_ids  # noqa
+
+
+def test_watch_run_yields_step_transitions(metadata_store):
+    """Tests that watching a run yields the status of each step once and
+    stops when the run is finished."""
+    from coalescenceml.metadata_store.run_watcher import (
+        watch_pipeline,
+        watch_run,
+    )
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    first, second = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+    metadata_store.link_pipeline_run("pipeline", "run")
+    execution = store.get_executions_by_id([second])[0]
+    execution.last_known_state = metadata_store_pb2.Execution.RUNNING
+    store.put_executions([execution])
+    run = metadata_store.get_pipeline_run_by_name("run")
+
+    transitions = []
+    with pytest.raises(TimeoutError):
+        for transition in watch_run(run, poll_interval=0.01, timeout=0.1):
+            transitions.append(transition)
+    assert [(t.step_name, t.old_status, t.new_status) for t in transitions] == [
+        ("first", None, ExecutionStatus.COMPLETED),
+        ("second", None, ExecutionStatus.RUNNING),
+    ]
+    assert transitions[0].pipeline_name == "pipeline"
+    assert transitions[0].execution_id == first
+
+    execution.last_known_state = metadata_store_pb2.Execution.COMPLETE
+    store.put_executions([execution])
+    # runs which were never marked as finished end after the grace period
+    transitions = list(
+        watch_run(run, poll_interval=0.01, timeout=1, finish_grace_period=0)
+    )
+    assert [t.new_status for t in transitions] == [
+        ExecutionStatus.COMPLETED,
+        ExecutionStatus.COMPLETED,
+    ]
+
+    metadata_store.mark_pipeline_run_finished("run")
+    transitions = list(watch_run(run, poll_interval=0.01, timeout=1))
+    assert [t.new_status for t in transitions] == [
+        ExecutionStatus.COMPLETED,
+        ExecutionStatus.COMPLETED,
+    ]
+
+    pipeline = metadata_store.get_pipeline("pipeline")
+    transitions = []
+    with pytest.raises(TimeoutError):
+        for transition in watch_pipeline(
+            pipeline, poll_interval=0.01, timeout=0.1
+        ):
+            transitions.append(transition)
+    assert {(t.run_name, t.step_name) for t in transitions} == {
+        ("run", "first"),
+        ("run", "second"),
+    }
+
+
+def test_watch_run_uses_step_event_bus_for_local_runs(metadata_store):
+    """Tests that runs executed in this process are watched through the
+    step event bus."""
+    from coalescenceml.metadata_store.run_watcher import (
+        StepTransition,
+        step_event_bus,
+        watch_run,
+    )
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _, second = _put_chained_run(
+        store, pipeline_context, "run", ["first", "second"]
+    )
+    execution = store.get_executions_by_id([second])[0]
+    execution.last_known_state = metadata_store_pb2.Execution.RUNNING
+    store.put_executions([execution])
+    run = metadata_store.get_pipeline_run_by_name("run")
+
+    step_event_bus.start_run("run")
+    try:
+        transitions = watch_run(run, timeout=5)
+        assert next(transitions).step_name == "first"
+        assert next(transitions).new_status == ExecutionStatus.RUNNING
+        for status in (ExecutionStatus.RUNNING, ExecutionStatus.COMPLETED):
+            step_event_bus.publish(
+                StepTransition(
+                    pipeline_name="pipeline",
+                    run_name="run",
+                    step_name="second",
+                    new_status=status,
+                    execution_id=second,
+                    time=datetime.now(),
+                )
+            )
+    finally:
+        step_event_bus.finish_run("run")
+
+    # the duplicate RUNNING status is skipped
+    remaining = list(transitions)
+    assert [(t.old_status, t.new_status) for t in remaining] == [
+        (ExecutionStatus.RUNNING, ExecutionStatus.COMPLETED)
+    ]
+
+
+def test_get_storage_usage(metadata_store):
+    """Tests that the recorded artifact sizes are aggregated per pipeline,
+    run, step and artifact type."""
+    from coalescenceml.artifacts.constants import SIZE_PROPERTY_KEY
+    from coalescenceml.metadata_store.storage_usage import get_storage_usage
+
+    store = metadata_store.store
+    pipeline_context = _put_context(
+        store, PIPELINE_CONTEXT_TYPE_NAME, "pipeline"
+    )
+    _put_chained_run(store, pipeline_context, "run_a", ["first", "second"])
+    _put_chained_run(store, pipeline_context, "run_b", ["first"])
+
+    artifact_type = store.get_artifact_type("DataArtifact")
+    artifact_type.properties[SIZE_PROPERTY_KEY] = metadata_store_pb2.INT
+    store.put_artifact_type(artifact_type, can_add_fields=True)
+    sizes = {"/artifacts/run_a/0": 100, "/artifacts/run_a/1": 200}
+    artifacts = [
+        artifact for artifact in store.get_artifacts() if artifact.uri in sizes
+    ]
+    for artifact in artifacts:
+        artifact.properties[SIZE_PROPERTY_KEY].int_value = sizes[artifact.uri]
+    store.put_artifacts(artifacts)
+
+    def _usage(by):
+        return [
+            (
+                group.name,
+                group.artifact_count,
+                group.total_bytes,
+                group.unsized_artifact_count,
+            )
+            for group in metadata_store.get_storage_usage(by=by)
+        ]
+
+    assert _usage("pipeline") == [("pipeline", 3, 300, 1)]
+    assert _usage("run") == [("run_a", 2, 300, 0), ("run_b", 1, 0, 1)]
+    # stores without database access list the executions of each run
+    assert get_storage_usage(store, by="run") == (
+        metadata_store.get_storage_usage(by="run")
+    )
+    assert _usage("step") == [("second", 1, 200, 0), ("first", 2, 100, 1)]
+    assert _usage("type") == [("DataArtifact", 3, 300, 1)]
+    with pytest.raises(ValueError):
+        metadata_store.get_storage_usage(by="bucket")
+
+    run = metadata_store.get_pipeline_run_by_name("run_a")
+    assert run.get_step("second").outputs["output"].size == 200
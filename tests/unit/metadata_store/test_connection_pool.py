@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+from ml_metadata.metadata_store import metadata_store
+from ml_metadata.proto import metadata_store_pb2
+from tfx.dsl.compiler.constants import PIPELINE_CONTEXT_TYPE_NAME
+from tfx.orchestration import metadata
+
+from coalescenceml.metadata_store import SQLiteMetadataStore
+from coalescenceml.metadata_store.connection_pool import ConnectionPool
+
+
+class ReplicatedSQLiteMetadataStore(SQLiteMetadataStore):
+    """SQLite stand-in for a metadata store with a read replica."""
+
+    replica_uri: str
+
+    def get_replica_tfx_metadata_config(self):
+        """Returns the config of the replica database."""
+        return metadata.sqlite_metadata_connection_config(self.replica_uri)
+
+
+def _open_factory(tmp_path, opened):
+    """Returns a factory which opens connections to a sqlite database."""
+    config = metadata.sqlite_metadata_connection_config(
+        str(tmp_path / "metadata.db")
+    )
+
+    def _factory():
+        opened.append(1)
+        return metadata_store.MetadataStore(config)
+
+    return _factory
+
+
+def test_connection_pool_reuses_connections(tmp_path):
+    """Tests that connections are opened lazily and reused."""
+    opened = []
+    pool = ConnectionPool(_open_factory(tmp_path, opened), size=2)
+    for _ in range(3):
+        assert pool.get_artifact_types() == []
+    assert len(opened) == 1
+
+    with pool.connection():
+        pool.get_artifact_types()
+    assert len(opened) == 2
+
+
+def test_connection_pool_limits_concurrent_connections(tmp_path):
+    """Tests that threads share at most `size` connections."""
+    opened = []
+    pool = ConnectionPool(_open_factory(tmp_path, opened), size=2)
+
+    def _query():
+        for _ in range(20):
+            pool.get_artifact_types()
+
+    threads = [threading.Thread(target=_query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= len(opened) <= 2
+
+
+def test_connection_pool_discards_broken_connections(tmp_path):
+    """Tests that connections are discarded after connection errors."""
+    opened = []
+    pool = ConnectionPool(
+        _open_factory(tmp_path, opened),
+        size=1,
+        is_broken=lambda e: isinstance(e, ConnectionError),
+    )
+    with pytest.raises(ConnectionError):
+        with pool.connection():
+            raise ConnectionError()
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError()
+    pool.get_artifact_types()
+    assert len(opened) == 2
+
+
+def test_read_paths_use_replica(tmp_path):
+    """Tests that the post-execution API reads from the replica while
+    writes go to the primary store."""
+    metadata_store_ = ReplicatedSQLiteMetadataStore(
+        name="",
+        uri=str(tmp_path / "primary.db"),
+        replica_uri=str(tmp_path / "replica.db"),
+    )
+
+    def _put_pipeline(store):
+        type_id = store.put_context_type(
+            metadata_store_pb2.ContextType(name=PIPELINE_CONTEXT_TYPE_NAME)
+        )
+        store.put_contexts(
+            [metadata_store_pb2.Context(type_id=type_id, name="pipeline")]
+        )
+
+    assert metadata_store_.read_store is not metadata_store_.store
+    _put_pipeline(metadata_store_.store)
+    assert metadata_store_.get_pipelines() == []
+
+    _put_pipeline(metadata_store_.read_store)
+    assert [p.name for p in metadata_store_.get_pipelines()] == ["pipeline"]
@@ -0,0 +1,183 @@
+from ml_metadata.proto import metadata_store_pb2
+
+from coalescenceml.metadata_store import SQLiteMetadataStore
+from coalescenceml.metadata_store.metadata_cache import MetadataCache
+
+
+def _create_cache(tmp_path, ttl=60.0):
+    """Returns a cache around a fresh sqlite metadata store."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=False
+    )
+    return MetadataCache(metadata_store.store, ttl=ttl)
+
+
+def _put_execution(cache, state):
+    """Creates an execution in the given state and returns its ID."""
+    type_id = cache.put_execution_type(
+        metadata_store_pb2.ExecutionType(name="step")
+    )
+    return cache.put_executions(
+        [metadata_store_pb2.Execution(type_id=type_id, last_known_state=state)]
+    )[0]
+
+
+def test_metadata_store_wraps_store_in_cache(tmp_path):
+    """Tests that the cache is only used if it's enabled in the metadata
+    store config."""
+    uri = str(tmp_path / "metadata.db")
+    assert isinstance(
+        SQLiteMetadataStore(name="", uri=uri, cache_enabled=True).store,
+        MetadataCache,
+    )
+    assert not isinstance(
+        SQLiteMetadataStore(name="", uri=uri).store, MetadataCache
+    )
+
+
+def test_types_are_cached_until_written(tmp_path):
+    """Tests that types are fetched once and refetched after a write."""
+    cache = _create_cache(tmp_path)
+    type_id = cache.put_artifact_type(metadata_store_pb2.ArtifactType(name="a"))
+
+    assert [t.name for t in cache.get_artifact_types()] == ["a"]
+    assert [t.name for t in cache.get_artifact_types_by_id([type_id])] == ["a"]
+    assert cache.get_artifact_type("a").id == type_id
+    assert cache.stats.as_dict()["get_artifact_types"] == {
+        "hits": 0,
+        "misses": 1,
+    }
+    assert cache.stats.hits["get_artifact_types_by_id"] == 1
+    assert cache.stats.hits["get_artifact_type"] == 1
+
+    cache.put_artifact_type(metadata_store_pb2.ArtifactType(name="b"))
+    assert [t.name for t in cache.get_artifact_types()] == ["a", "b"]
+    assert cache.stats.misses["get_artifact_types"] == 2
+
+
+def test_running_executions_expire(tmp_path):
+    """Tests that only executions in a terminal state are cached
+    permanently."""
+    cache = _create_cache(tmp_path, ttl=0.0)
+    running = _put_execution(cache, metadata_store_pb2.Execution.RUNNING)
+    complete = _put_execution(cache, metadata_store_pb2.Execution.COMPLETE)
+
+    for _ in range(2):
+        executions = cache.get_executions_by_id([complete, running])
+        assert [e.id for e in executions] == [complete, running]
+
+    assert cache.stats.hits["get_executions_by_id"] == 1
+    assert cache.stats.misses["get_executions_by_id"] == 3
+
+
+def test_live_artifacts_expire(tmp_path):
+    """Tests that only deleted artifacts are cached permanently, as live
+    artifacts can still be deleted or tagged by other clients."""
+    cache = _create_cache(tmp_path, ttl=0.0)
+    type_id = cache.put_artifact_type(metadata_store_pb2.ArtifactType(name="a"))
+    live, deleted = cache.put_artifacts(
+        [
+            metadata_store_pb2.Artifact(
+                type_id=type_id, state=metadata_store_pb2.Artifact.LIVE
+            ),
+            metadata_store_pb2.Artifact(
+                type_id=type_id, state=metadata_store_pb2.Artifact.DELETED
+            ),
+        ]
+    )
+
+    for _ in range(2):
+        artifacts = cache.get_artifacts_by_id([deleted, live])
+        assert [a.id for a in artifacts] == [deleted, live]
+    assert cache.stats.hits["get_artifacts_by_id"] == 1
+    assert cache.stats.misses["get_artifacts_by_id"] == 3
+
+    # a write by another client becomes visible once the entry expired
+    artifact = cache.store.get_artifacts_by_id([live])[0]
+    artifact.state = metadata_store_pb2.Artifact.DELETED
+    cache.store.put_artifacts([artifact])
+    assert (
+        cache.get_artifacts_by_id([live])[0].state
+        == metadata_store_pb2.Artifact.DELETED
+    )
+
+
+def test_cached_entries_can_not_be_modified(tmp_path):
+    """Tests that modifying returned protos doesn't modify the cache and
+    that writes invalidate cached entries."""
+    cache = _create_cache(tmp_path)
+    execution_id = _put_execution(cache, metadata_store_pb2.Execution.COMPLETE)
+
+    execution = cache.get_executions_by_id([execution_id])[0]
+    execution.last_known_state = metadata_store_pb2.Execution.FAILED
+    assert (
+        cache.get_executions_by_id([execution_id])[0].last_known_state
+        == metadata_store_pb2.Execution.COMPLETE
+    )
+
+    cache.put_executions([execution])
+    assert (
+        cache.get_executions_by_id([execution_id])[0].last_known_state
+        == metadata_store_pb2.Execution.FAILED
+    )
+    assert 0 < cache.stats.hit_rate < 1
+
+
+def test_snapshot_persists_finished_executions(tmp_path):
+    """Tests that finished executions are stored in the snapshot and served
+    from it by a new cache, while running executions are not stored."""
+    from coalescenceml.metadata_store.snapshot import MetadataSnapshot
+
+    path = str(tmp_path / "snapshot.db")
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=False
+    )
+    cache = MetadataCache(metadata_store.store, snapshot=MetadataSnapshot(path))
+    complete_id = _put_execution(cache, metadata_store_pb2.Execution.COMPLETE)
+    running_id = _put_execution(cache, metadata_store_pb2.Execution.RUNNING)
+    assert len(cache.get_executions_by_id([complete_id, running_id])) == 2
+    cache.get_events_by_execution_ids([complete_id])
+
+    # the new cache wraps an empty store, so it can only find the execution
+    # in the snapshot
+    empty_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "empty.db"), cache_enabled=False
+    )
+    cache = MetadataCache(empty_store.store, snapshot=MetadataSnapshot(path))
+    executions = cache.get_executions_by_id([complete_id, running_id])
+    assert [execution.id for execution in executions] == [complete_id]
+    assert cache.get_events_by_execution_ids([complete_id]) == []
+    assert cache.stats.misses["get_events_by_execution_ids"] == 0
+
+    cache.clear()
+    assert cache.get_executions_by_id([complete_id]) == []
+
+
+def test_snapshot_syncs_changes_since_last_sync(tmp_path):
+    """Tests that a sync fetches executions written after the last sync."""
+    from coalescenceml.metadata_store.snapshot import MetadataSnapshot
+
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db"), cache_enabled=False
+    )
+    store = metadata_store.store
+    snapshot = MetadataSnapshot(str(tmp_path / "snapshot.db"))
+    old_id = _put_execution(store, metadata_store_pb2.Execution.COMPLETE)
+    # a new snapshot is filled lazily
+    assert snapshot.sync(store) == 0
+    assert snapshot.get_executions([old_id]) == []
+
+    new_id = _put_execution(store, metadata_store_pb2.Execution.COMPLETE)
+    running_id = _put_execution(store, metadata_store_pb2.Execution.RUNNING)
+    snapshot.sync(store)
+    assert [e.id for e in snapshot.get_executions([new_id, running_id])] == [
+        new_id
+    ]
+    assert snapshot.get_events([new_id]) == {new_id: []}
+
+    # snapshots of a different metadata store are cleared
+    snapshot.close()
+    snapshot = MetadataSnapshot(
+        str(tmp_path / "snapshot.db"), fingerprint="other"
+    )
+    assert snapshot.get_executions([new_id]) == []
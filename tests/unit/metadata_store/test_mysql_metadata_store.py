@@ -9,4 +9,33 @@ def test_mysql_metadata_store_attributes():
         name="", host="", port=0, database="", username="", password=""
     )
     assert metadata_store.TYPE == StackComponentFlavor.METADATA_STORE
-    assert metadata_store.FLAVOR == "mysql"
\ No newline at end of file
+    assert metadata_store.FLAVOR == "mysql"
+
+
+def test_mysql_metadata_store_replica_config():
+    """Tests that the read replica uses the credentials of the primary
+    server."""
+    metadata_store = MySQLMetadataStore(
+        name="",
+        host="primary",
+        port=3306,
+        database="db",
+        username="",
+        password="",
+    )
+    assert metadata_store.get_replica_tfx_metadata_config() is None
+
+    metadata_store = MySQLMetadataStore(
+        name="",
+        host="primary",
+        port=3306,
+        database="db",
+        username="user",
+        password="",
+        replica_host="replica",
+    )
+    config = metadata_store.get_replica_tfx_metadata_config()
+    assert config.mysql.host == "replica"
+    assert config.mysql.port == 3306
+    assert config.mysql.database == "db"
+    assert config.mysql.user == "user"
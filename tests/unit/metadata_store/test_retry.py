@@ -0,0 +1,57 @@
+import pytest
+
+from coalescenceml.metadata_store.retry import RetryingConnection
+
+
+class _LockedError(Exception):
+    """Error raised by the flaky store below."""
+
+
+class _FlakyStore:
+    """Store whose method fails a number of times before it succeeds."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def get_artifacts(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise _LockedError("database is locked")
+        return ["artifact"]
+
+
+def test_retrying_connection_retries_retryable_errors():
+    """Tests that calls are retried until they succeed."""
+    store = _FlakyStore(failures=2)
+    connection = RetryingConnection(
+        store,
+        is_retryable=lambda e: isinstance(e, _LockedError),
+        timeout=10,
+        initial_backoff=0,
+    )
+    assert connection.get_artifacts() == ["artifact"]
+    assert store.calls == 3
+
+
+def test_retrying_connection_raises_other_errors_and_after_timeout():
+    """Tests that non-retryable errors and errors after the timeout are
+    raised."""
+    store = _FlakyStore(failures=1)
+    connection = RetryingConnection(
+        store, is_retryable=lambda e: False, timeout=10
+    )
+    with pytest.raises(_LockedError):
+        connection.get_artifacts()
+    assert store.calls == 1
+
+    store = _FlakyStore(failures=100)
+    connection = RetryingConnection(
+        store,
+        is_retryable=lambda e: True,
+        timeout=0.05,
+        initial_backoff=0.01,
+    )
+    with pytest.raises(_LockedError):
+        connection.get_artifacts()
+    assert 1 < store.calls < 100
@@ -1,3 +1,5 @@
+import sqlite3
+
 import pydantic
 import pytest
 
@@ -23,4 +25,30 @@ def test_sqlite_metadata_store_only_supports_local_uris():
         SQLiteMetadataStore(name="", uri="s3://remote/uri")
 
     metadata_store = SQLiteMetadataStore(name="", uri="/local/uri")
-    assert metadata_store.uri == "/local/uri"
\ No newline at end of file
+    assert metadata_store.uri == "/local/uri"
+
+
+def test_sqlite_metadata_store_validates_journal_mode():
+    """Checks that only journal modes supported by SQLite are accepted."""
+    with pytest.raises(pydantic.ValidationError):
+        SQLiteMetadataStore(name="", uri="/local/uri", journal_mode="fast")
+
+    metadata_store = SQLiteMetadataStore(
+        name="", uri="/local/uri", journal_mode="wal"
+    )
+    assert metadata_store.journal_mode == "WAL"
+
+
+def test_sqlite_metadata_store_enables_wal(tmp_path):
+    """Checks that the journal mode is set when connecting to a new store
+    whose directory doesn't exist yet."""
+    uri = str(tmp_path / "new" / "metadata.db")
+    metadata_store = SQLiteMetadataStore(name="", uri=uri)
+    metadata_store.store.get_artifact_types()
+
+    connection = sqlite3.connect(uri)
+    try:
+        (journal_mode,) = connection.execute("PRAGMA journal_mode").fetchone()
+    finally:
+        connection.close()
+    assert journal_mode == "wal"
@@ -3,15 +3,19 @@ import json
 from typing import Optional
 
 import pytest
+from ml_metadata.proto import metadata_store_pb2
 from pydantic.main import BaseModel
 from tfx.proto.orchestration.pipeline_pb2 import PipelineNode
 from tfx.orchestration.portable.data_types import ExecutionInfo
 from tfx.proto.orchestration.pipeline_pb2 import PipelineInfo
 
 from coalescenceml.enums import MetadataContextFlavor, StackComponentFlavor
+from coalescenceml.metadata_store import SQLiteMetadataStore
 from coalescenceml.orchestrator.utils import (
+    SharedMetadataConnection,
     add_runtime_configuration_to_node,
     get_cache_status,
+    get_context_name,
 )
 from coalescenceml.directory import Directory
 from coalescenceml.step import step
@@ -76,6 +80,52 @@ def test_get_cache_status_works_when_running_pipeline_twice():
     assert get_cache_status(first_run_execution_object) is False
     assert get_cache_status(second_run_execution_object) is True
 
+def test_get_cache_status_looks_up_execution_by_id(tmp_path):
+    """Check that the cache status is read from the execution with the ID
+    of the execution info."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db")
+    )
+    store = metadata_store.store
+    type_id = store.put_execution_type(
+        metadata_store_pb2.ExecutionType(name="step")
+    )
+    cached_id, completed_id = store.put_executions(
+        [
+            metadata_store_pb2.Execution(
+                type_id=type_id,
+                last_known_state=metadata_store_pb2.Execution.CACHED,
+            ),
+            metadata_store_pb2.Execution(
+                type_id=type_id,
+                last_known_state=metadata_store_pb2.Execution.COMPLETE,
+            ),
+        ]
+    )
+
+    assert get_cache_status(
+        ExecutionInfo(execution_id=cached_id), metadata_store=metadata_store
+    )
+    assert not get_cache_status(
+        ExecutionInfo(execution_id=completed_id),
+        metadata_store=metadata_store,
+    )
+
+
+def test_shared_metadata_connection_reuses_store(tmp_path):
+    """Check that all uses of a shared connection get the same store."""
+    metadata_store = SQLiteMetadataStore(
+        name="", uri=str(tmp_path / "metadata.db")
+    )
+    connection = SharedMetadataConnection(metadata_store)
+
+    with connection as m:
+        first_store = m.store
+    with connection as m:
+        assert m.store is first_store
+    assert first_store is metadata_store.mlmd_store
+
+
 def test_pipeline_storing_stack_in_the_metadata_store(one_step_pipeline):
     """Tests that returning an object of a type that wasn't specified (either
     directly or as part of the `Output` tuple annotation) raises an error."""
@@ -140,8 +190,8 @@ def test_pydantic_object_to_metadata_context():
     print(f"methods: {dir(node1.contexts.contexts)}")
     ctx1 = node1.contexts.contexts[0]
     assert ctx1.type.name == "stringattributes"
-    assert ctx1.name.field_value.string_value == str(
-        hash('{"a": "alice", "b": "bob"}')
+    assert ctx1.name.field_value.string_value == get_context_name(
+        json.dumps({"a": '"alice"', "b": '"bob"'}, sort_keys=True)
     )
 
     # object with serialization difficulties
@@ -178,4 +228,31 @@ def test_pydantic_object_to_metadata_context():
     assert (
         ctx4.properties.get("t").field_value.string_value
         == '"2022-10-20T16:42:05"'
-    )
\ No newline at end of file
+    )
+
+
+def test_context_names_are_stable_across_processes():
+    """Tests that context names don't depend on the salt of `hash()`."""
+    assert get_context_name('{"name": "default"}') == (
+        "7518eadea51db72a3bad4b53a30e98cc762d1eb5de3f6ec0c4cf02380402d51a"
+    )
+
+
+def test_step_metrics_are_recorded(one_step_pipeline):
+    """Check that executing a step records its timing and I/O metrics."""
+
+    @step
+    def some_step_1() -> int:
+        return 3
+
+    pipeline_ = one_step_pipeline(some_step_1())
+    pipeline_.run()
+
+    run = Directory().get_pipeline(pipeline_.name).runs[-1]
+    step_view = run.steps[0]
+    metrics = step_view.metrics
+    assert metrics is not None
+    assert step_view.duration == metrics.wall_time >= 0
+    assert metrics.cpu_time >= 0
+    assert metrics.start_time <= metrics.end_time
+    assert metrics.bytes_written > 0
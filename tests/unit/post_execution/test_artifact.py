@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from coalescenceml.post_execution import ArtifactView, read_many
+
+
+class UriProducer:
+    """Producer which returns the URI of the artifact as its data."""
+
+    threads = set()
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+
+    def handle_input(self, data_type):
+        UriProducer.threads.add(threading.get_ident())
+        if self.artifact.uri == "broken":
+            raise RuntimeError("Unable to read artifact.")
+        return data_type(self.artifact.uri)
+
+
+def _artifact(id_, uri):
+    return ArtifactView(
+        id_=id_,
+        type_="DataArtifact",
+        uri=uri,
+        producer=f"{__name__}.UriProducer",
+        data_type="builtins.str",
+        metadata_store=None,
+        parent_step_id=1,
+    )
+
+
+def test_read_many_reads_all_artifacts():
+    """Tests that all artifacts are read with the producers they were
+    written with."""
+    artifacts = [_artifact(i, f"/artifacts/{i}") for i in range(20)]
+
+    results = dict(
+        (artifact.id, data)
+        for artifact, data in read_many(artifacts, max_workers=4)
+    )
+    assert results == {i: f"/artifacts/{i}" for i in range(20)}
+    assert threading.get_ident() not in UriProducer.threads
+
+
+def test_read_many_raises_read_errors():
+    """Tests that errors of single reads are raised to the caller."""
+    artifacts = [_artifact(1, "/artifacts/1"), _artifact(2, "broken")]
+    with pytest.raises(RuntimeError):
+        list(read_many(artifacts, producer_class=UriProducer))
+
+    with pytest.raises(ValueError):
+        list(read_many(artifacts, max_workers=0))
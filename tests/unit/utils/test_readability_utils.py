@@ -7,3 +7,13 @@ def test_get_human_readable_time():
     assert readability_utils.get_human_readable_time(301) == "5m1s"
     assert readability_utils.get_human_readable_time(0.1234) == "0.123s"
     assert readability_utils.get_human_readable_time(172799) == "1d23h59m59s"
+
+
+def test_get_human_readable_filesize():
+    """Check get_human_readable_filesize formats string properly."""
+    assert readability_utils.get_human_readable_filesize(0) == "0 B"
+    assert readability_utils.get_human_readable_filesize(1023) == "1023 B"
+    assert readability_utils.get_human_readable_filesize(1536) == "1.5 KiB"
+    assert readability_utils.get_human_readable_filesize(5 * 1024**3) == (
+        "5.0 GiB"
+    )